@@ -0,0 +1,152 @@
+import random
+import statistics
+import threading
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from academics.models import AttendanceRecord, ClassGroup, Enrollment
+from academics.services import save_class_attendance
+from core.models import AcademicYear
+from people.models import Student
+
+STATUSES = ["present", "absent", "late"]
+
+
+def _update_or_create_loop(class_group, attendance_date, statuses, user):
+    # the previous take_attendance_mark save path
+    with transaction.atomic():
+        for student_id, status in statuses.items():
+            AttendanceRecord.objects.update_or_create(
+                student_id=student_id, class_group=class_group, date=attendance_date,
+                defaults={"status": status, "recorded_by": user},
+            )
+
+
+def _bulk_upsert(class_group, attendance_date, statuses, user):
+    existing_map = {
+        ar.student_id: ar
+        for ar in AttendanceRecord.objects.filter(class_group=class_group, date=attendance_date)
+    }
+    save_class_attendance(class_group, attendance_date, statuses, user, existing_map=existing_map)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark concurrent attendance submissions (one thread per class, released together): "
+        "update_or_create per student vs the diffed bulk upsert. Uses WAL mode on SQLite. "
+        "Creates its own classes and students and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--classes", type=int, default=40)
+        parser.add_argument("--students", type=int, default=45, help="Students per class.")
+        parser.add_argument("--change-rate", type=float, default=0.1, help="Share of statuses changed on resubmission.")
+
+    def handle(self, *args, **options):
+        if connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode=WAL")
+                mode = cursor.fetchone()[0]
+            self.stdout.write(f"SQLite journal_mode={mode}")
+
+        user, groups = self._setup(options["classes"], options["students"])
+        try:
+            rosters = {
+                cg.id: list(Enrollment.objects.filter(class_group=cg).values_list("student_id", flat=True))
+                for cg in groups
+            }
+            self.stdout.write(f"{len(groups)} concurrent submissions x {options['students']} students")
+            for offset, (label, fn) in enumerate([
+                ("before: update_or_create", _update_or_create_loop),
+                ("after: bulk upsert", _bulk_upsert),
+            ]):
+                day = date(2000, 1, 3) + timedelta(days=offset)
+                first = {cg.id: {s: random.choice(STATUSES) for s in rosters[cg.id]} for cg in groups}
+                self._round(f"{label} (first submit)", fn, groups, day, first, user)
+                edited = {
+                    cg_id: {
+                        s: random.choice(STATUSES) if random.random() < options["change_rate"] else st
+                        for s, st in statuses.items()
+                    }
+                    for cg_id, statuses in first.items()
+                }
+                self._round(f"{label} (resubmit)", fn, groups, day, edited, user)
+        finally:
+            self._teardown(user, groups)
+
+    def _round(self, label, fn, groups, day, statuses, user):
+        barrier = threading.Barrier(len(groups))
+        latencies, queries, errors = [], [], []
+        lock = threading.Lock()
+
+        def submit(cg):
+            try:
+                barrier.wait()
+                with CaptureQueriesContext(connection) as ctx:
+                    start = time.perf_counter()
+                    fn(cg, day, statuses[cg.id], user)
+                    elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed * 1000)
+                    queries.append(len(ctx.captured_queries))
+            except OperationalError as e:
+                with lock:
+                    errors.append(str(e))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=submit, args=(cg,)) for cg in groups]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        wall = time.perf_counter() - start
+
+        if latencies:
+            latencies.sort()
+            p95 = latencies[max(int(len(latencies) * 0.95) - 1, 0)]
+            self.stdout.write(
+                f"{label:<38} wall {wall * 1000:8.1f} ms  p50 {statistics.median(latencies):8.1f} ms  "
+                f"p95 {p95:8.1f} ms  {statistics.mean(queries):6.1f} queries/submit  {len(errors)} errors"
+            )
+            if errors:
+                self.stdout.write(f"  first error: {errors[0]}")
+        else:
+            self.stdout.write(f"{label:<38} all {len(errors)} submissions failed: {errors[0]}")
+
+    def _setup(self, classes, students):
+        User = get_user_model()
+        year = AcademicYear.objects.create(
+            name="bench-att", start_date=date(2000, 1, 1), end_date=date(2000, 12, 31)
+        )
+        user = User.objects.create_user(username="bench_attendance_teacher", is_teacher=True)
+        groups = ClassGroup.objects.bulk_create([
+            ClassGroup(name=f"Bench {i}", grade_level="Bench", academic_year=year) for i in range(classes)
+        ])
+        kids = Student.objects.bulk_create([
+            Student(
+                student_id=f"BENCH-ATT-{i}", first_name="Bench", last_name=str(i),
+                date_of_birth=date(2010, 1, 1), admission_date=date(2000, 1, 1),
+            )
+            for i in range(classes * students)
+        ])
+        Enrollment.objects.bulk_create([
+            Enrollment(student=kid, class_group=groups[i // students], academic_year=year)
+            for i, kid in enumerate(kids)
+        ])
+        return user, groups
+
+    def _teardown(self, user, groups):
+        year_id = groups[0].academic_year_id if groups else None
+        AttendanceRecord.objects.filter(class_group__in=groups).delete()
+        Enrollment.objects.filter(class_group__in=groups).delete()
+        Student.objects.filter(student_id__startswith="BENCH-ATT-").delete()
+        ClassGroup.objects.filter(id__in=[g.id for g in groups]).delete()
+        AcademicYear.objects.filter(id=year_id).delete()
+        user.delete()
@@ -0,0 +1,18 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from academics.services_rollups import rebuild_attendance_rollups
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily (date, class, status) and monthly (student, month) attendance rollups "
+        "from AttendanceRecord. Whole months covering --start..--end are rebuilt (default: all)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--start", type=date.fromisoformat, help="YYYY-MM-DD")
+        parser.add_argument("--end", type=date.fromisoformat, help="YYYY-MM-DD")
+
+    def handle(self, *args, **options):
+        daily, monthly = rebuild_attendance_rollups(options["start"], options["end"])
+        self.stdout.write(self.style.SUCCESS(f"Attendance rollups rebuilt: {daily} daily rows, {monthly} monthly rows."))
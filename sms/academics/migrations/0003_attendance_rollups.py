@@ -0,0 +1,71 @@
+# Generated by Django 6.0 on 2026-10-18 16:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Max, Q
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    AttendanceRecord = apps.get_model("academics", "AttendanceRecord")
+    AttendanceDailyCount = apps.get_model("academics", "AttendanceDailyCount")
+    AttendanceMonthlyCount = apps.get_model("academics", "AttendanceMonthlyCount")
+
+    daily = AttendanceRecord.objects.values("date", "class_group_id", "status").annotate(n=Count("id")).order_by()
+    AttendanceDailyCount.objects.bulk_create(
+        [AttendanceDailyCount(date=r["date"], class_group_id=r["class_group_id"], status=r["status"], count=r["n"]) for r in daily],
+        batch_size=500,
+    )
+    monthly = AttendanceRecord.objects.annotate(m=TruncMonth("date")).values("student_id", "m").annotate(
+        present=Count("id", filter=Q(status="present")),
+        late=Count("id", filter=Q(status="late")),
+        absent=Count("id", filter=Q(status="absent")),
+        total=Count("id"),
+        last_date=Max("date"),
+    ).order_by()
+    AttendanceMonthlyCount.objects.bulk_create(
+        [AttendanceMonthlyCount(month=r.pop("m"), **r) for r in monthly],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0002_initial'),
+        ('people', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('present', 'Present'), ('absent', 'Absent'), ('late', 'Late')], max_length=10)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('class_group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_daily', to='academics.classgroup')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date', 'status'], name='academics_attday_date_idx')],
+                'unique_together': {('date', 'class_group', 'status')},
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceMonthlyCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField()),
+                ('present', models.PositiveIntegerField(default=0)),
+                ('late', models.PositiveIntegerField(default=0)),
+                ('absent', models.PositiveIntegerField(default=0)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_monthly', to='people.student')),
+            ],
+            options={
+                'unique_together': {('student', 'month')},
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
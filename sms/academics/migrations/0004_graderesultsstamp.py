@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 20:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('academics', '0003_attendance_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradeResultsStamp',
+            fields=[
+                ('class_group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='grade_stamp', serialize=False, to='academics.classgroup')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
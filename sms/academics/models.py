@@ -70,6 +70,30 @@ class AttendanceRecord(models.Model):
         unique_together = ("student", "class_group", "date")
         ordering = ("-date",)
 
+class AttendanceDailyCount(models.Model):
+    """Rollup of AttendanceRecord: rows per (date, class group, status). Kept by academics.services_rollups."""
+    date = models.DateField()
+    class_group = models.ForeignKey(ClassGroup, on_delete=models.CASCADE, related_name="attendance_daily")
+    status = models.CharField(max_length=10, choices=AttendanceRecord.STATUS_CHOICES)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("date", "class_group", "status")
+        indexes = [models.Index(fields=["date", "status"], name="academics_attday_date_idx")]
+
+class AttendanceMonthlyCount(models.Model):
+    """Rollup of AttendanceRecord: status counts per student and month (first day of the month)."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="attendance_monthly")
+    month = models.DateField()
+    present = models.PositiveIntegerField(default=0)
+    late = models.PositiveIntegerField(default=0)
+    absent = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    last_date = models.DateField(null=True, blank=True)
+
+    class Meta:
+        unique_together = ("student", "month")
+
 class Assessment(models.Model):
     TYPE_CHOICES = [
         ("test", "Test"),
@@ -98,3 +122,13 @@ class Grade(models.Model):
 
     class Meta:
         unique_together = ("assessment", "student")
+
+
+class GradeResultsStamp(models.Model):
+    """
+    Per-class version of grade data for cached averages (services_grades).
+    Bumped in the same transaction as any grade or assessment change, so every
+    worker stops using results cached under an older version.
+    """
+    class_group = models.OneToOneField(ClassGroup, on_delete=models.CASCADE, primary_key=True, related_name="grade_stamp")
+    version = models.PositiveBigIntegerField(default=0)
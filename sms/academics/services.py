@@ -0,0 +1,135 @@
+import csv
+from decimal import Decimal, InvalidOperation
+from io import StringIO
+
+from django.db import transaction
+
+from reports.metrics import invalidate_dashboard_metrics
+from reports.pdf_cache import touch_report_data
+from .models import AttendanceRecord, Grade
+from .services_grades import touch_grade_results
+from .services_rollups import refresh_attendance_rollups
+
+
+def save_class_attendance(class_group, attendance_date, statuses, recorded_by, existing_map=None) -> int:
+    """
+    Persist a class register. statuses maps student id -> status; rows whose
+    stored status already matches are skipped, the rest are written with one
+    INSERT ... ON CONFLICT (student, class_group, date) DO UPDATE.
+    Returns the number of rows written.
+    """
+    if existing_map is None:
+        existing_map = {
+            ar.student_id: ar
+            for ar in AttendanceRecord.objects.filter(class_group=class_group, date=attendance_date)
+        }
+
+    changed = [
+        AttendanceRecord(
+            student_id=student_id,
+            class_group=class_group,
+            date=attendance_date,
+            status=status,
+            recorded_by=recorded_by,
+        )
+        for student_id, status in statuses.items()
+        if getattr(existing_map.get(student_id), "status", None) != status
+    ]
+    if changed:
+        with transaction.atomic():
+            AttendanceRecord.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=["student", "class_group", "date"],
+                update_fields=["status", "recorded_by"],
+            )
+            # bulk_create sends no post_save, so keep the rollups and dashboard counters in step here
+            refresh_attendance_rollups((a.student_id, class_group.id, attendance_date) for a in changed)
+            invalidate_dashboard_metrics()
+            touch_report_data([a.student_id for a in changed])
+    return len(changed)
+
+
+def parse_score(raw: str, max_score: Decimal):
+    """Return (Decimal, None) for a valid score or (None, error message)."""
+    try:
+        score = Decimal(raw.strip())
+    except InvalidOperation:
+        return None, f"'{raw}' is not a number."
+    if not score.is_finite():
+        return None, f"'{raw}' is not a number."
+    if score.as_tuple().exponent < -2:
+        return None, "Use at most 2 decimal places."
+    if score < 0 or score > max_score:
+        return None, f"Score must be between 0 and {max_score}."
+    return score, None
+
+
+def parse_mark_sheet(text: str):
+    """
+    Parse a pasted mark sheet: one "student_id, score[, comment]" per line,
+    comma-, tab- or semicolon-separated (as copied from a spreadsheet).
+    Cells after the score are all comment. A header line is skipped.
+    Returns ([(line_no, student_id, score, comment)], [errors]).
+    """
+    text = text.strip()
+    if not text:
+        return [], []
+    try:
+        dialect = csv.Sniffer().sniff(text.splitlines()[0], delimiters=",\t;")
+    except csv.Error:
+        dialect = csv.excel_tab if "\t" in text else csv.excel
+
+    rows, errors = [], []
+    for line_no, cells in enumerate(csv.reader(StringIO(text), dialect), start=1):
+        cells = [c.strip() for c in cells]
+        if not any(cells):
+            continue
+        if len(cells) < 2:
+            errors.append(f"Line {line_no}: expected student ID and score.")
+            continue
+        if line_no == 1 and cells[1].lower() in ("score", "mark", "marks"):
+            continue
+        # an unquoted comment containing the delimiter spills into more cells
+        rows.append((line_no, cells[0], cells[1], ", ".join(c for c in cells[2:] if c)))
+    return rows, errors
+
+
+def save_grades(assessment, entries, existing=None):
+    """
+    entries maps student id -> (score string, comment); blank scores are
+    skipped. All scores are validated against assessment.max_score first and
+    nothing is written if any row is invalid. Valid rows whose score or
+    comment changed are written with one upsert on (assessment, student).
+    Returns (rows written, {student id: error}).
+    """
+    if existing is None:
+        existing = {g.student_id: g for g in Grade.objects.filter(assessment=assessment)}
+
+    errors, changed = {}, []
+    for student_id, (raw, comment) in entries.items():
+        if not raw.strip():
+            continue
+        score, error = parse_score(raw, assessment.max_score)
+        if error:
+            errors[student_id] = error
+            continue
+        comment = comment[:255]
+        current = existing.get(student_id)
+        if current is not None and current.score == score and current.comment == comment:
+            continue
+        changed.append(Grade(assessment=assessment, student_id=student_id, score=score, comment=comment))
+
+    if errors:
+        return 0, errors
+    if changed:
+        Grade.objects.bulk_create(
+            changed,
+            update_conflicts=True,
+            unique_fields=["assessment", "student"],
+            update_fields=["score", "comment"],
+        )
+        # no post_save from bulk_create: expire cached report PDFs and averages here
+        touch_report_data([g.student_id for g in changed])
+        touch_grade_results([assessment.class_group_id])
+    return len(changed), {}
@@ -0,0 +1,210 @@
+import statistics
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from core.models import Term
+from .models import Grade, GradeResultsStamp
+
+BANDS = [(90, "90-100"), (80, "80-89"), (70, "70-79"), (60, "60-69"), (50, "50-59"), (0, "0-49")]
+
+
+def touch_grade_results(class_group_ids) -> None:
+    """
+    Bump the grade-data version of these classes (ids or a values subquery)
+    in the caller's transaction. Cached results are keyed by the version read
+    from the database, so every worker stops serving them at once, whatever
+    the cache backend. Only existing stamps are bumped; a stamp is created the
+    first time a class's results are cached. Called by the Grade/Assessment
+    signals in academics.signals and by save_grades, whose bulk upsert sends none.
+    """
+    GradeResultsStamp.objects.filter(class_group_id__in=class_group_ids).update(version=F("version") + 1)
+
+
+def _class_version(class_group_id) -> int:
+    stamp, _ = GradeResultsStamp.objects.get_or_create(class_group_id=class_group_id)
+    return stamp.version
+
+
+def term_for(class_group, day):
+    """The class's academic-year Term containing day, or None."""
+    return Term.objects.filter(
+        academic_year_id=class_group.academic_year_id, start_date__lte=day, end_date__gte=day,
+    ).first()
+
+
+def _period(class_group, term):
+    if term is not None:
+        return f"t{term.pk}", term.start_date, term.end_date
+    year = class_group.academic_year
+    return "y", year.start_date, year.end_date
+
+
+def _ranked(averages) -> dict:
+    """{student id: {"average", "rank"}} with competition ranking (1, 2, 2, 4)."""
+    ordered = sorted(averages.values(), reverse=True)
+    first_at = {}
+    for i, avg in enumerate(ordered, 1):
+        first_at.setdefault(avg, i)
+    return {sid: {"average": avg, "rank": first_at[avg]} for sid, avg in averages.items()}
+
+
+def distribution(values) -> dict:
+    values = list(values)
+    if not values:
+        return {"count": 0, "mean": None, "median": None, "min": None, "max": None, "stdev": None,
+                "bands": {label: 0 for _, label in BANDS}}
+    bands = {label: 0 for _, label in BANDS}
+    for v in values:
+        bands[next(label for floor, label in BANDS if v >= floor)] += 1
+    return {
+        "count": len(values),
+        "mean": round(statistics.fmean(values), 2),
+        "median": round(statistics.median(values), 2),
+        "min": min(values),
+        "max": max(values),
+        "stdev": round(statistics.pstdev(values), 2),
+        "bands": bands,
+    }
+
+
+def _compute(rows) -> dict:
+    """
+    rows: (subject id, subject name, student id, score, max score, weight)
+    for one class and period. Each grade becomes score / max_score scaled by
+    the assessment weight; a student's subject average is the weighted mean
+    over the assessments they have a grade for (a plain mean if every weight
+    is 0), as a percentage.
+    """
+    acc, names = {}, {}
+    for subject_id, name, student_id, score, max_score, weight in rows:
+        names[subject_id] = name
+        pct = float(score) * 100 / float(max_score)
+        a = acc.setdefault(subject_id, {}).setdefault(student_id, [0.0, 0.0, 0.0, 0])
+        a[0] += pct * float(weight)
+        a[1] += float(weight)
+        a[2] += pct
+        a[3] += 1
+
+    results = {}
+    for subject_id, per_student in acc.items():
+        averages = {
+            sid: round(w_sum / w if w else plain / n, 2)
+            for sid, (w_sum, w, plain, n) in per_student.items()
+        }
+        students = _ranked(averages)
+        for sid, r in students.items():
+            r["count"] = per_student[sid][3]
+        results[subject_id] = {
+            "subject_id": subject_id,
+            "subject": names[subject_id],
+            "students": students,
+            "stats": distribution(averages.values()),
+        }
+    return results
+
+
+def _fetch(class_group, start, end, subject_id=None):
+    qs = Grade.objects.filter(
+        assessment__class_group=class_group,
+        assessment__date__gte=start, assessment__date__lte=end,
+        assessment__max_score__gt=0,
+    )
+    if subject_id is not None:
+        qs = qs.filter(assessment__subject_id=subject_id)
+    return qs.values_list(
+        "assessment__subject_id", "assessment__subject__name", "student_id",
+        "score", "assessment__max_score", "assessment__weight",
+    ).order_by()
+
+
+def subject_results(class_group, subject_id, term=None) -> dict:
+    """
+    Weighted averages, ranks and distribution for one subject of a class in
+    a term (None: the whole academic year), cached per (class group,
+    subject, term) until a grade or assessment of the class changes.
+    """
+    period, start, end = _period(class_group, term)
+    key = f"grades:{class_group.pk}:{_class_version(class_group.pk)}:{period}:{subject_id}"
+    result = cache.get(key)
+    if result is None:
+        result = _compute(_fetch(class_group, start, end, subject_id)).get(subject_id) or {
+            "subject_id": subject_id, "subject": "", "students": {}, "stats": distribution([]),
+        }
+        cache.set(key, result, getattr(settings, "GRADE_RESULTS_TTL", 3600))
+    return result
+
+
+def class_results(class_group, term=None) -> dict:
+    """
+    {"subjects": {subject id: subject result}, "overall": {"students", "stats"}}
+    for a class and term (None: the academic year). On a miss every grade of
+    the class in the period is read in one query and each subject's result is
+    cached under its own (class group, subject, term) key. A student's
+    overall average is the mean of their subject averages.
+    """
+    period, start, end = _period(class_group, term)
+    prefix = f"grades:{class_group.pk}:{_class_version(class_group.pk)}:{period}"
+    subject_ids = cache.get(f"{prefix}:subjects")
+    subjects = None
+    if subject_ids is not None:
+        cached = cache.get_many([f"{prefix}:{sid}" for sid in subject_ids])
+        if len(cached) == len(subject_ids):
+            subjects = {r["subject_id"]: r for r in cached.values()}
+    if subjects is None:
+        subjects = _compute(_fetch(class_group, start, end))
+        ttl = getattr(settings, "GRADE_RESULTS_TTL", 3600)
+        cache.set_many({f"{prefix}:{sid}": r for sid, r in subjects.items()}, ttl)
+        cache.set(f"{prefix}:subjects", list(subjects), ttl)
+
+    per_student = {}
+    for r in subjects.values():
+        for sid, s in r["students"].items():
+            per_student.setdefault(sid, []).append(s["average"])
+    overall = {sid: round(statistics.fmean(avgs), 2) for sid, avgs in per_student.items()}
+    return {
+        "subjects": subjects,
+        "overall": {"students": _ranked(overall), "stats": distribution(overall.values())},
+    }
+
+
+def student_results(student_id, class_group, term=None) -> dict:
+    """
+    One student's rows from class_results, ready for the report pages:
+    {"subjects": [{"subject", "average", "rank", "of", "count", "class_mean"}],
+     "average", "rank", "of"}. Subjects without a grade for the student are left out.
+    """
+    results = class_results(class_group, term)
+    rows = []
+    for r in sorted(results["subjects"].values(), key=lambda r: r["subject"]):
+        mine = r["students"].get(student_id)
+        if mine:
+            rows.append({
+                "subject": r["subject"],
+                "average": mine["average"],
+                "rank": mine["rank"],
+                "of": r["stats"]["count"],
+                "count": mine["count"],
+                "class_mean": r["stats"]["mean"],
+            })
+    overall = results["overall"]["students"].get(student_id, {})
+    return {
+        "subjects": rows,
+        "average": overall.get("average"),
+        "rank": overall.get("rank"),
+        "of": results["overall"]["stats"]["count"],
+        "term": term,
+    }
+
+
+def enrollment_results(enrollment, day):
+    """
+    student_results for an enrollment's class in the term containing day,
+    or over the whole academic year when no term covers it. None without an
+    enrollment.
+    """
+    if enrollment is None:
+        return None
+    class_group = enrollment.class_group
+    return student_results(enrollment.student_id, class_group, term_for(class_group, day))
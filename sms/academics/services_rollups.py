@@ -0,0 +1,147 @@
+from calendar import monthrange
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Q, Sum
+
+from .models import AttendanceDailyCount, AttendanceMonthlyCount, AttendanceRecord
+
+STATUSES = ("present", "late", "absent")
+
+
+def month_start(d):
+    return d.replace(day=1)
+
+
+def month_end(d):
+    return d.replace(day=monthrange(d.year, d.month)[1])
+
+
+def _months(start, end) -> list:
+    months, m = [], month_start(start)
+    while m <= end:
+        months.append(m)
+        m = month_end(m) + timedelta(days=1)
+    return months
+
+
+def _per_student(records):
+    return records.values("student_id").annotate(
+        present=Count("id", filter=Q(status="present")),
+        late=Count("id", filter=Q(status="late")),
+        absent=Count("id", filter=Q(status="absent")),
+        total=Count("id"),
+        last_date=Max("date"),
+    ).order_by()
+
+
+def _write_daily(records_filter, rollup_filter) -> int:
+    rows = [
+        AttendanceDailyCount(date=r["date"], class_group_id=r["class_group_id"], status=r["status"], count=r["n"])
+        for r in AttendanceRecord.objects.filter(records_filter)
+        .values("date", "class_group_id", "status").annotate(n=Count("id")).order_by()
+    ]
+    AttendanceDailyCount.objects.filter(rollup_filter).delete()
+    AttendanceDailyCount.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def _write_monthly(month, student_ids=None) -> int:
+    records = AttendanceRecord.objects.filter(date__gte=month, date__lte=month_end(month))
+    stale = AttendanceMonthlyCount.objects.filter(month=month)
+    if student_ids is not None:
+        records = records.filter(student_id__in=student_ids)
+        stale = stale.filter(student_id__in=student_ids)
+    rows = [AttendanceMonthlyCount(month=month, **r) for r in _per_student(records)]
+    stale.delete()
+    AttendanceMonthlyCount.objects.bulk_create(rows, batch_size=500)
+    return len(rows)
+
+
+def refresh_attendance_rollups(keys) -> None:
+    """
+    Recompute the rollup rows touched by attendance writes. keys are
+    (student id, class group id, date) of records that were created,
+    changed or deleted. Counts are re-derived from AttendanceRecord for
+    just those (date, class group) and (student, month) keys, so a refresh
+    is idempotent and never drifts.
+    """
+    keys = list(keys)
+    if not keys:
+        return
+    days = {(d, cg) for _, cg, d in keys}
+    by_month = {}
+    for student_id, _, d in keys:
+        by_month.setdefault(month_start(d), set()).add(student_id)
+
+    day_filter = reduce(or_, (Q(date=d, class_group_id=cg) for d, cg in days))
+    with transaction.atomic(savepoint=False):
+        _write_daily(day_filter, day_filter)
+        for month, student_ids in by_month.items():
+            _write_monthly(month, student_ids)
+
+
+def rebuild_attendance_rollups(start=None, end=None) -> tuple:
+    """
+    Rebuild both rollups from AttendanceRecord for the whole months covering
+    start..end (default: every month with attendance), one month per
+    transaction. Returns (daily rows, monthly rows) written.
+    """
+    if start is None or end is None:
+        bounds = AttendanceRecord.objects.aggregate(first=Min("date"), last=Max("date"))
+        start = start or bounds["first"]
+        end = end or bounds["last"]
+        if start is None or end is None:
+            return 0, 0
+    daily = monthly = 0
+    for month in _months(start, end):
+        in_month = Q(date__gte=month, date__lte=month_end(month))
+        with transaction.atomic():
+            daily += _write_daily(in_month, in_month)
+            monthly += _write_monthly(month)
+    return daily, monthly
+
+
+def attendance_totals(start, end) -> dict:
+    """{status: count} for all classes between start and end, from the daily rollup."""
+    return dict(
+        AttendanceDailyCount.objects.filter(date__gte=start, date__lte=end)
+        .values_list("status").annotate(n=Sum("count")).order_by()
+    )
+
+
+def student_attendance_totals(student_ids, start, end) -> dict:
+    """
+    {student id: {"present", "late", "absent", "total", "last_date"}} between
+    start and end. Months the range covers entirely (or up to their last
+    recorded day) come from the monthly rollup; only partially covered months
+    are counted from AttendanceRecord, in one more query.
+    """
+    student_ids = list(student_ids)
+    totals = {}
+    partial = {}
+
+    def add(student_id, row):
+        t = totals.setdefault(student_id, {**dict.fromkeys(STATUSES + ("total",), 0), "last_date": None})
+        for k in STATUSES + ("total",):
+            t[k] += row[k]
+        if row["last_date"] and (t["last_date"] is None or row["last_date"] > t["last_date"]):
+            t["last_date"] = row["last_date"]
+
+    rows = AttendanceMonthlyCount.objects.filter(student_id__in=student_ids, month__gte=month_start(start), month__lte=end)
+    for row in rows.values("student_id", "month", "present", "late", "absent", "total", "last_date"):
+        if start <= row["month"] and end >= min(month_end(row["month"]), row["last_date"]):
+            add(row["student_id"], row)
+        else:
+            partial.setdefault(row["month"], []).append(row["student_id"])
+
+    if partial:
+        raw = AttendanceRecord.objects.filter(reduce(or_, (
+            Q(student_id__in=ids, date__gte=max(start, month), date__lte=min(end, month_end(month)))
+            for month, ids in partial.items()
+        )))
+        for row in _per_student(raw):
+            add(row["student_id"], row)
+    return totals
@@ -0,0 +1,38 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .models import Assessment, AttendanceRecord, Grade
+from .services_grades import touch_grade_results
+from .services_rollups import refresh_attendance_rollups
+
+
+@receiver([post_save, post_delete], sender=AttendanceRecord)
+def _refresh_rollups_for_record(sender, instance, **kwargs):
+    # after commit, so cascading deletes (student, class group) have finished first;
+    # bulk writers skip this signal and refresh the rollups themselves
+    key = (instance.student_id, instance.class_group_id, instance.date)
+    transaction.on_commit(lambda: refresh_attendance_rollups([key]))
+
+
+@receiver([post_save, post_delete], sender=Grade)
+def _touch_grade_results_for_grade(sender, instance, origin=None, **kwargs):
+    # an assessment delete cascades here once per grade; its own signal covers them
+    if isinstance(origin, Assessment):
+        return
+    touch_grade_results(Assessment.objects.filter(pk=instance.assessment_id).values("class_group_id"))
+
+
+@receiver(pre_save, sender=Assessment)
+def _touch_grade_results_for_moved_assessment(sender, instance, **kwargs):
+    # moving an assessment to another class also changes the class it leaves
+    if instance.pk is not None:
+        touch_grade_results(
+            Assessment.objects.filter(pk=instance.pk).exclude(class_group_id=instance.class_group_id).values("class_group_id")
+        )
+
+
+@receiver([post_save, post_delete], sender=Assessment)
+def _touch_grade_results_for_assessment(sender, instance, **kwargs):
+    # max_score, weight, date or subject may have moved every average of the class
+    touch_grade_results([instance.class_group_id])
@@ -1,3 +1,249 @@
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
 from django.test import TestCase
 
-# Create your tests here.
+from core.models import AcademicYear, Term
+from people.models import Student
+from .models import (
+    Assessment, AttendanceDailyCount, AttendanceMonthlyCount, AttendanceRecord, ClassGroup, Enrollment, Grade,
+    GradeResultsStamp, Subject,
+)
+from .services import parse_mark_sheet, save_class_attendance, save_grades
+from .services_grades import class_results, distribution, student_results, subject_results, term_for
+from .services_rollups import attendance_totals, rebuild_attendance_rollups, student_attendance_totals
+
+User = get_user_model()
+
+# existing-row read, upsert, read/delete/insert for each rollup table and the report
+# stamp bump, inside one savepoint
+ATTENDANCE_SAVE_QUERIES = 11
+
+
+class AttendanceSaveTests(TestCase):
+    def setUp(self):
+        year = AcademicYear.objects.create(name="2025", start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        self.cg = ClassGroup.objects.create(name="Form 2A", grade_level="Form 2", academic_year=year)
+        self.teacher = User.objects.create_user(username="t", is_teacher=True)
+        self.day = date(2025, 3, 3)
+        self.students = Student.objects.bulk_create([
+            Student(student_id=f"S{i}", first_name="Kid", last_name=str(i),
+                    date_of_birth=date(2015, 1, 1), admission_date=date(2025, 1, 1))
+            for i in range(45)
+        ])
+        Enrollment.objects.bulk_create([
+            Enrollment(student=s, class_group=self.cg, academic_year=year) for s in self.students
+        ])
+
+    def _statuses(self, absent=()):
+        return {s.id: "absent" if s.id in absent else "present" for s in self.students}
+
+    def test_whole_class_in_constant_queries(self):
+        with self.assertNumQueries(ATTENDANCE_SAVE_QUERIES):
+            written = save_class_attendance(self.cg, self.day, self._statuses(), self.teacher)
+        self.assertEqual(written, 45)
+        self.assertEqual(AttendanceRecord.objects.filter(status="present").count(), 45)
+
+    def test_resubmit_writes_only_changes(self):
+        save_class_attendance(self.cg, self.day, self._statuses(), self.teacher)
+        absent = {self.students[0].id, self.students[1].id}
+        with self.assertNumQueries(ATTENDANCE_SAVE_QUERIES):
+            written = save_class_attendance(self.cg, self.day, self._statuses(absent), self.teacher)
+        self.assertEqual(written, 2)
+        self.assertEqual(
+            set(AttendanceRecord.objects.filter(status="absent").values_list("student_id", flat=True)), absent
+        )
+        self.assertEqual(AttendanceRecord.objects.count(), 45)
+        with self.assertNumQueries(1):
+            self.assertEqual(save_class_attendance(self.cg, self.day, self._statuses(absent), self.teacher), 0)
+
+
+class AttendanceRollupTests(TestCase):
+    def setUp(self):
+        year = AcademicYear.objects.create(name="2025", start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        self.cg = ClassGroup.objects.create(name="Form 2A", grade_level="Form 2", academic_year=year)
+        self.teacher = User.objects.create_user(username="t", is_teacher=True)
+        self.students = Student.objects.bulk_create([
+            Student(student_id=f"S{i}", first_name="Kid", last_name=str(i),
+                    date_of_birth=date(2015, 1, 1), admission_date=date(2025, 1, 1))
+            for i in range(4)
+        ])
+        self.ids = [s.id for s in self.students]
+        # Feb 27 .. Mar 4, first student absent on even days, second late on Mar 3
+        for day in (date(2025, 2, 27), date(2025, 2, 28), date(2025, 3, 3), date(2025, 3, 4)):
+            statuses = {sid: "present" for sid in self.ids}
+            if day.day % 2 == 0:
+                statuses[self.ids[0]] = "absent"
+            if day == date(2025, 3, 3):
+                statuses[self.ids[1]] = "late"
+            save_class_attendance(self.cg, day, statuses, self.teacher)
+
+    def _raw(self, start, end):
+        qs = AttendanceRecord.objects.filter(date__gte=start, date__lte=end)
+        return {
+            sid: {status: qs.filter(student_id=sid, status=status).count() for status in ("present", "late", "absent")}
+            for sid in self.ids
+        }
+
+    def test_saves_keep_rollups_in_step(self):
+        self.assertEqual(attendance_totals(date(2025, 3, 1), date(2025, 3, 31)), {"present": 6, "late": 1, "absent": 1})
+        feb = AttendanceMonthlyCount.objects.get(student_id=self.ids[0], month=date(2025, 2, 1))
+        self.assertEqual((feb.present, feb.absent, feb.total, feb.last_date), (1, 1, 2, date(2025, 2, 28)))
+
+        # a single edit through the ORM is picked up by the signal after commit
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceRecord.objects.filter(student_id=self.ids[1], date=date(2025, 3, 3)).get().delete()
+        self.assertEqual(attendance_totals(date(2025, 3, 3), date(2025, 3, 3)), {"present": 3})
+
+    def test_student_totals_match_raw_for_any_range(self):
+        for start, end in [
+            (date(2025, 2, 1), date(2025, 3, 31)),
+            (date(2025, 2, 28), date(2025, 3, 3)),
+            (date(2025, 3, 1), date(2025, 3, 10)),
+        ]:
+            totals = student_attendance_totals(self.ids, start, end)
+            for sid, expected in self._raw(start, end).items():
+                got = {k: totals.get(sid, {}).get(k, 0) for k in expected}
+                self.assertEqual(got, expected, (start, end))
+
+    def test_rebuild_repairs_drift(self):
+        AttendanceDailyCount.objects.all().delete()
+        AttendanceMonthlyCount.objects.update(present=0)
+        self.assertEqual(rebuild_attendance_rollups(date(2025, 2, 15), date(2025, 3, 5)), (7, 8))
+        self.assertEqual(attendance_totals(date(2025, 2, 1), date(2025, 3, 31)), {"present": 13, "late": 1, "absent": 2})
+        self.assertEqual(AttendanceMonthlyCount.objects.get(student_id=self.ids[3], month=date(2025, 3, 1)).present, 2)
+
+
+class GradeSaveTests(TestCase):
+    def setUp(self):
+        year = AcademicYear.objects.create(name="2025", start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        cg = ClassGroup.objects.create(name="Form 2A", grade_level="Form 2", academic_year=year)
+        subject = Subject.objects.create(code="MATH", name="Maths")
+        self.assessment = Assessment.objects.create(
+            class_group=cg, subject=subject, title="Quiz", type="test", max_score=20
+        )
+        self.students = Student.objects.bulk_create([
+            Student(student_id=f"S{i}", first_name="Kid", last_name=str(i),
+                    date_of_birth=date(2015, 1, 1), admission_date=date(2025, 1, 1))
+            for i in range(200)
+        ])
+
+    def test_invalid_rows_reported_and_nothing_written(self):
+        entries = {
+            self.students[0].id: ("12.5", ""),
+            self.students[1].id: ("21", ""),
+            self.students[2].id: ("abc", ""),
+            self.students[3].id: ("1.234", ""),
+            self.students[4].id: ("", "absent"),
+        }
+        saved, errors = save_grades(self.assessment, entries)
+        self.assertEqual(saved, 0)
+        self.assertEqual(set(errors), {self.students[1].id, self.students[2].id, self.students[3].id})
+        self.assertFalse(Grade.objects.exists())
+
+    def test_whole_sheet_in_one_upsert_then_only_changes(self):
+        entries = {s.id: (str(i % 21), "") for i, s in enumerate(self.students)}
+        # existing-row read, one upsert, report and grade-results stamp bumps
+        with self.assertNumQueries(4):
+            self.assertEqual(save_grades(self.assessment, entries), (200, {}))
+        entries[self.students[0].id] = ("19.5", "Well done")
+        with self.assertNumQueries(4):
+            self.assertEqual(save_grades(self.assessment, entries), (1, {}))
+        g = Grade.objects.get(student=self.students[0])
+        self.assertEqual((g.score, g.comment), (Decimal("19.5"), "Well done"))
+
+    def test_parse_pasted_sheet(self):
+        rows, errors = parse_mark_sheet("student_id\tscore\tcomment\nS1\t15\tGood\nS2\t7\n\nS3\n")
+        self.assertEqual(rows, [(2, "S1", "15", "Good"), (3, "S2", "7", "")])
+        self.assertEqual(errors, ["Line 5: expected student ID and score."])
+        rows, _ = parse_mark_sheet("S1,15\nS2,\"8.5\",\"late, but fine\"")
+        self.assertEqual(rows, [(1, "S1", "15", ""), (2, "S2", "8.5", "late, but fine")])
+        rows, _ = parse_mark_sheet("S1,45,good effort, needs revision")
+        self.assertEqual(rows, [(1, "S1", "45", "good effort, needs revision")])
+        rows, _ = parse_mark_sheet("S1\t9\tneat\t\t")
+        self.assertEqual(rows, [(1, "S1", "9", "neat")])
+
+
+class GradeEngineTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        year = AcademicYear.objects.create(name="2025", start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        self.term1 = Term.objects.create(academic_year=year, name="Term 1", start_date=date(2025, 1, 1), end_date=date(2025, 4, 30))
+        self.cg = ClassGroup.objects.create(name="Form 2A", grade_level="Form 2", academic_year=year)
+        self.maths = Subject.objects.create(code="MATH", name="Maths")
+        self.english = Subject.objects.create(code="ENG", name="English")
+        self.a, self.b, self.c = Student.objects.bulk_create([
+            Student(student_id=f"S{i}", first_name="Kid", last_name=str(i),
+                    date_of_birth=date(2015, 1, 1), admission_date=date(2025, 1, 1))
+            for i in range(3)
+        ])
+        # quiz out of 20 counts 25, exam out of 100 counts 75
+        self.quiz = Assessment.objects.create(class_group=self.cg, subject=self.maths, title="Quiz", type="test",
+                                              max_score=20, weight=25, date=date(2025, 2, 1))
+        self.exam = Assessment.objects.create(class_group=self.cg, subject=self.maths, title="Exam", type="exam",
+                                              max_score=100, weight=75, date=date(2025, 4, 1))
+        essay = Assessment.objects.create(class_group=self.cg, subject=self.english, title="Essay", type="test",
+                                          max_score=50, weight=100, date=date(2025, 6, 1))
+        Grade.objects.bulk_create([
+            Grade(assessment=self.quiz, student=self.a, score=20),   # 100%
+            Grade(assessment=self.exam, student=self.a, score=60),   # 60%  -> 70
+            Grade(assessment=self.quiz, student=self.b, score=10),   # 50%
+            Grade(assessment=self.exam, student=self.b, score=80),   # 80%  -> 72.5
+            Grade(assessment=self.quiz, student=self.c, score=14),   # 70%  -> 70 (no exam)
+            Grade(assessment=essay, student=self.a, score=40),       # 80%
+        ])
+
+    def test_weighted_normalized_averages_rank_and_stats(self):
+        maths = subject_results(self.cg, self.maths.id, self.term1)
+        self.assertEqual({sid: r["average"] for sid, r in maths["students"].items()},
+                         {self.a.id: 70.0, self.b.id: 72.5, self.c.id: 70.0})
+        self.assertEqual({sid: r["rank"] for sid, r in maths["students"].items()},
+                         {self.a.id: 2, self.b.id: 1, self.c.id: 2})
+        self.assertEqual((maths["stats"]["count"], maths["stats"]["mean"], maths["stats"]["median"]), (3, 70.83, 70.0))
+        self.assertEqual(maths["stats"]["bands"]["70-79"], 3)
+        self.assertEqual(distribution([])["count"], 0)
+
+        # the essay falls outside term 1; the year aggregate averages both subjects
+        self.assertEqual(term_for(self.cg, date(2025, 3, 1)), self.term1)
+        self.assertIsNone(term_for(self.cg, date(2025, 6, 1)))
+        self.assertEqual(list(class_results(self.cg, self.term1)["subjects"]), [self.maths.id])
+        mine = student_results(self.a.id, self.cg)
+        self.assertEqual([(r["subject"], r["average"], r["rank"], r["of"]) for r in mine["subjects"]],
+                         [("English", 80.0, 1, 1), ("Maths", 70.0, 2, 3)])
+        self.assertEqual((mine["average"], mine["rank"], mine["of"]), (75.0, 1, 3))
+
+    def test_one_query_per_class_then_cached_until_a_grade_changes(self):
+        class_results(self.cg, self.term1)  # creates the class's stamp
+        GradeResultsStamp.objects.filter(class_group=self.cg).update(version=F("version") + 1)
+        # stamp read, then every grade of the class in one query
+        with self.assertNumQueries(2):
+            class_results(self.cg, self.term1)
+        # cached: only the stamp read
+        with self.assertNumQueries(1):
+            class_results(self.cg, self.term1)
+        with self.assertNumQueries(1):
+            subject_results(self.cg, self.maths.id, self.term1)
+
+        # the version lives in the database, so the bump is seen by every worker
+        save_grades(self.exam, {self.a.id: ("100", "")})
+        self.assertEqual(GradeResultsStamp.objects.get(class_group=self.cg).version, 2)
+        self.assertEqual(subject_results(self.cg, self.maths.id, self.term1)["students"][self.a.id]["average"], 100.0)
+
+        # a single grade deleted through the ORM, and an assessment re-weighted
+        Grade.objects.filter(assessment=self.quiz, student=self.c).get().delete()
+        self.assertNotIn(self.c.id, subject_results(self.cg, self.maths.id, self.term1)["students"])
+        self.exam.weight = 0
+        self.exam.save()
+        self.assertEqual(subject_results(self.cg, self.maths.id, self.term1)["students"][self.b.id]["average"], 50.0)
+
+    def test_moving_an_assessment_expires_both_classes(self):
+        other = ClassGroup.objects.create(name="Form 2B", grade_level="Form 2", academic_year=self.cg.academic_year)
+        self.assertEqual(len(subject_results(self.cg, self.maths.id, self.term1)["students"]), 3)
+        self.assertEqual(subject_results(other, self.maths.id, self.term1)["students"], {})
+        self.exam.class_group = other
+        self.exam.save()
+        self.assertEqual(subject_results(self.cg, self.maths.id, self.term1)["students"][self.a.id]["average"], 100.0)
+        self.assertEqual(set(subject_results(other, self.maths.id, self.term1)["students"]), {self.a.id, self.b.id})
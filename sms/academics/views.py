@@ -2,7 +2,6 @@ from decimal import Decimal
 from datetime import date
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db import transaction
 from django.http import FileResponse, HttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
@@ -14,6 +13,8 @@ from .models import (
     Assessment, Grade, ClassGroup, Subject
 )
 from .forms import AttendancePickForm, AssessmentFilterForm, CreateAssessmentForm
+from .services import parse_mark_sheet, save_class_attendance, save_grades
+from .services_grades import enrollment_results
 from .models import ClassGroup, Enrollment, TimetableEntry, AttendanceRecord, Assessment, Grade
 
 
@@ -117,15 +118,13 @@ def take_attendance_mark(request):
             "status_choices": ATTENDANCE_STATUS,
         })
 
-    with transaction.atomic():
-        for enr in enrollments:
-            status = request.POST.get(f"status_{enr.student.id}", "present")
-            if status not in ATTENDANCE_STATUS:
-                status = "present"
-            AttendanceRecord.objects.update_or_create(
-                student=enr.student, class_group=class_group, date=attendance_date,
-                defaults={"status": status, "recorded_by": request.user}
-            )
+    statuses = {}
+    for student_id in enrollments.values_list("student_id", flat=True):
+        status = request.POST.get(f"status_{student_id}", "present")
+        if status not in ATTENDANCE_STATUS:
+            status = "present"
+        statuses[student_id] = status
+    save_class_attendance(class_group, attendance_date, statuses, request.user, existing_map=existing_map)
 
     messages.success(request, f"Attendance saved: {class_group} · {attendance_date}")
     return redirect(f"/academics/attendance/take/mark/?class_group_id={class_group.id}&date={attendance_date.isoformat()}")
@@ -193,7 +192,7 @@ def parent_student_hub(request):
         return render(request, "academics/parent_student_hub.html", {"note": "No linked student."})
 
     # timetable = class timetable for student
-    enr = Enrollment.objects.filter(student=student).select_related("class_group").first()
+    enr = Enrollment.objects.filter(student=student).select_related("class_group__academic_year").first()
     timetable = TimetableEntry.objects.filter(class_group=enr.class_group).select_related("subject").order_by("day_of_week", "start_time") if enr else TimetableEntry.objects.none()
 
     attendance = AttendanceRecord.objects.filter(student=student).select_related("class_group").order_by("-date")[:30]
@@ -205,6 +204,7 @@ def parent_student_hub(request):
         "timetable": timetable,
         "attendance": attendance,
         "grades": grades,
+        "results": enrollment_results(enr, timezone.localdate()),
     })
 
 @login_required
@@ -248,23 +248,41 @@ def enter_grades(request, assessment_id: int):
     assessment = get_object_or_404(Assessment, id=assessment_id, teacher_user=request.user)
     enrollments = Enrollment.objects.filter(class_group=assessment.class_group).select_related("student").order_by("student__last_name", "student__first_name")
 
+    existing = {g.student_id: g for g in Grade.objects.filter(assessment=assessment)}
     if request.method == "GET":
-        existing = {g.student_id: g for g in Grade.objects.filter(assessment=assessment)}
         return render(request, "academics/enter_grades.html", {"assessment": assessment, "enrollments": enrollments, "existing": existing})
 
-    with transaction.atomic():
-        for enr in enrollments:
-            score_str = request.POST.get(f"score_{enr.student.id}", "").strip()
-            comment = request.POST.get(f"comment_{enr.student.id}", "").strip()
-            if score_str == "":
-                continue
-            Grade.objects.update_or_create(
-                assessment=assessment,
-                student=enr.student,
-                defaults={"score": score_str, "comment": comment},
-            )
+    entries = {}
+    for enr in enrollments:
+        entries[enr.student.id] = (
+            request.POST.get(f"score_{enr.student.id}", "").strip(),
+            request.POST.get(f"comment_{enr.student.id}", "").strip(),
+        )
 
-    messages.success(request, "Grades saved.")
+    # a pasted mark sheet (student ID, score, comment) overrides the table inputs
+    sheet = request.POST.get("sheet", "")
+    sheet_rows, sheet_errors = parse_mark_sheet(sheet)
+    by_code = {enr.student.student_id: enr.student.id for enr in enrollments}
+    for line_no, code, score_str, comment in sheet_rows:
+        if code not in by_code:
+            sheet_errors.append(f"Line {line_no}: student {code} is not enrolled in {assessment.class_group}.")
+            continue
+        entries[by_code[code]] = (score_str, comment)
+
+    saved, row_errors = (0, {}) if sheet_errors else save_grades(assessment, entries, existing=existing)
+    if sheet_errors or row_errors:
+        messages.error(request, "No grades were saved. Fix the highlighted rows.")
+        posted = {sid: {"score": score, "comment": comment} for sid, (score, comment) in entries.items()}
+        return render(request, "academics/enter_grades.html", {
+            "assessment": assessment,
+            "enrollments": enrollments,
+            "existing": posted,
+            "row_errors": row_errors,
+            "sheet": sheet,
+            "sheet_errors": sheet_errors,
+        })
+
+    messages.success(request, f"Grades saved ({saved} changed).")
     return redirect("academics:teacher_assessments")
 
 @login_required
@@ -276,7 +294,13 @@ def my_grades(request):
         return render(request, "academics/my_grades.html", {"grades": [], "note": "No linked student."})
 
     grades = Grade.objects.filter(student=student).select_related("assessment", "assessment__subject").order_by("-assessment__date")[:80]
-    return render(request, "academics/my_grades.html", {"grades": grades, "student": student})
+    enr = Enrollment.objects.filter(student=student).select_related("class_group__academic_year")\
+        .order_by("-academic_year__start_date", "-id").first()
+    return render(request, "academics/my_grades.html", {
+        "grades": grades,
+        "student": student,
+        "results": enrollment_results(enr, timezone.localdate()),
+    })
 
 @login_required
 def parent_student_hub(request):
@@ -288,7 +312,7 @@ def parent_student_hub(request):
         return render(request, "academics/parent_student_hub.html", {"note": "No linked student."})
 
     # timetable = class timetable for student
-    enr = Enrollment.objects.filter(student=student).select_related("class_group").first()
+    enr = Enrollment.objects.filter(student=student).select_related("class_group__academic_year").first()
     timetable = TimetableEntry.objects.filter(class_group=enr.class_group).select_related("subject").order_by("day_of_week", "start_time") if enr else TimetableEntry.objects.none()
 
     attendance = AttendanceRecord.objects.filter(student=student).select_related("class_group").order_by("-date")[:30]
@@ -300,4 +324,5 @@ def parent_student_hub(request):
         "timetable": timetable,
         "attendance": attendance,
         "grades": grades,
+        "results": enrollment_results(enr, timezone.localdate()),
     })
@@ -1,18 +1,12 @@
 from django.contrib.auth import authenticate, login, logout
-from datetime import timedelta
-
 from django.contrib.auth.decorators import login_required
-from django.db.models import Count, Q
 from django.shortcuts import redirect, render
 from django.views.decorators.http import require_http_methods
-from django.utils import timezone
 
-from people.models import Student, TeacherProfile
-from academics.models import AttendanceRecord, ClassGroup, Subject
+from academics.models import AttendanceRecord, ClassGroup
 from finance.models import FeeInvoice
 from comms.models import Thread, Message, NotificationLog
-from registrar.models import AdmissionApplication
-from .models import User
+from reports.metrics import dashboard_metrics, set_metrics_header
 
 
 def _role_matches_user(user, selected_role: str) -> bool:
@@ -85,22 +79,11 @@ def dashboard(request):
     role = request.user.primary_role()
     ctx = {"role": role, "notifications": NotificationLog.objects.none()}
 
+    metrics_timing = None
     if role in ("principal", "admin"):
-        employee_filter = (
-            Q(is_principal=True)
-            | Q(is_school_admin=True)
-            | Q(is_teacher=True)
-            | Q(is_staff=True)
-        )
-        employees_count = User.objects.filter(employee_filter).distinct().count()
-        subjects_count = Subject.objects.count()
-        since = timezone.localdate() - timedelta(days=30)
-        attendance_rows = (
-            AttendanceRecord.objects.filter(date__gte=since)
-            .values("status")
-            .annotate(total=Count("id"))
-        )
-        attendance_summary = {row["status"]: row["total"] for row in attendance_rows}
+        metrics, hit, ms = dashboard_metrics()
+        metrics_timing = (hit, ms)
+        since = metrics["last_30"]
         absent_recent = (
             AttendanceRecord.objects.filter(status="absent", date__gte=since)
             .select_related("student", "class_group")
@@ -108,24 +91,20 @@ def dashboard(request):
         )
         ctx.update(
             {
-                "students_count": Student.objects.count(),
-                "teachers_count": TeacherProfile.objects.count(),
-                "employees_count": employees_count,
-                "subjects_count": subjects_count,
-                "unpaid_invoices": FeeInvoice.objects.filter(
-                    status__in=["unpaid", "partial", "pending_verification"]
-                ).count(),
-                "finance_invoices_total": FeeInvoice.objects.count(),
-                "finance_pending_verification": FeeInvoice.objects.filter(status="pending_verification").count(),
-                "finance_overdue": FeeInvoice.objects.filter(
-                    status__in=["unpaid", "partial"], due_date__lt=timezone.localdate()
-                ).count(),
-                "threads_count": Thread.objects.count(),
+                "students_count": metrics["students_total"],
+                "teachers_count": metrics["teachers_count"],
+                "employees_count": metrics["employees_count"],
+                "subjects_count": metrics["subjects_count"],
+                "unpaid_invoices": metrics["inv_open"],
+                "finance_invoices_total": metrics["inv_total"],
+                "finance_pending_verification": metrics["inv_pending"],
+                "finance_overdue": metrics["inv_overdue"],
+                "threads_count": metrics["threads_count"],
                 "notifications": NotificationLog.objects.order_by("-created_at")[:10],
-                "admissions_total": AdmissionApplication.objects.count(),
-                "admissions_new": AdmissionApplication.objects.filter(status="new").count(),
-                "admissions_accepted": AdmissionApplication.objects.filter(status="accepted").count(),
-                "attendance_summary": attendance_summary,
+                "admissions_total": metrics["admissions_total"],
+                "admissions_new": metrics["admissions"].get("new", 0),
+                "admissions_accepted": metrics["admissions"].get("accepted", 0),
+                "attendance_summary": metrics["attendance"],
                 "absent_recent": absent_recent,
             }
         )
@@ -148,7 +127,10 @@ def dashboard(request):
             }
         )
 
-    return render(request, "accounts/dashboard.html", ctx)
+    response = render(request, "accounts/dashboard.html", ctx)
+    if metrics_timing:
+        set_metrics_header(response, *metrics_timing)
+    return response
 
 
 @login_required
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Thread, Message, PerformanceNote, BehaviourRecord, NotificationLog, ThreadReadState, NotificationPreference
+from .models import Thread, Message, PerformanceNote, BehaviourRecord, NotificationLog, ThreadReadState, NotificationPreference, ThreadSummary
 
 class MessageInline(admin.TabularInline):
     model = Message
@@ -25,7 +25,7 @@ class BehaviourRecordAdmin(admin.ModelAdmin):
 
 @admin.register(NotificationLog)
 class NotificationLogAdmin(admin.ModelAdmin):
-    list_display = ("channel", "to", "status", "created_at", "sent_at")
+    list_display = ("channel", "to", "status", "attempts", "created_at", "sent_at", "next_attempt_at")
     list_filter = ("channel", "status")
     search_fields = ("to", "subject", "body")
 
@@ -40,3 +40,9 @@ class NotificationPreferenceAdmin(admin.ModelAdmin):
     list_display = ("user", "enable_email", "enable_sms", "enable_in_app")
     list_filter = ("enable_email", "enable_sms", "enable_in_app")
     search_fields = ("user__username", "user__email")
+
+@admin.register(ThreadSummary)
+class ThreadSummaryAdmin(admin.ModelAdmin):
+    list_display = ("thread", "user", "message_count", "unread_count", "last_message_at")
+    search_fields = ("user__username", "thread__student__student_id")
+    raw_id_fields = ("thread", "user", "last_message")
@@ -0,0 +1,82 @@
+import contextlib
+import io
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import override_settings
+from comms.models import NotificationLog
+from comms.services import BaseNotificationProvider, send_sms, send_sms_bulk
+from comms.services_outbox import dispatch_batch
+
+
+class LatencyProvider(BaseNotificationProvider):
+    """Fake provider that sleeps per call, like a remote gateway round-trip."""
+    supports_batch = True
+    latency = 0.02
+
+    def send_sms(self, to, body):
+        time.sleep(self.latency)
+
+    def send_email(self, to, subject, body):
+        time.sleep(self.latency)
+
+    def send_sms_batch(self, messages):
+        time.sleep(self.latency)
+        return [{"to": to, "ok": True, "error": ""} for to, _ in messages]
+
+    def send_email_batch(self, messages):
+        time.sleep(self.latency)
+        return [{"to": to, "ok": True, "error": ""} for to, _, _ in messages]
+
+
+class Command(BaseCommand):
+    help = "Throughput benchmark: per-message vs batch sends. Runs in a rolled-back transaction."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=10000)
+        parser.add_argument("--latency-ms", type=float, default=20.0, help="Simulated provider round-trip.")
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--skip-single", action="store_true", help="Skip the slow per-message runs.")
+
+    def _run(self, label, fn, count):
+        with transaction.atomic():
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                fn()
+            elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        self.stdout.write(f"{label:<40} {elapsed:8.2f}s  {count / elapsed:10.0f} msg/s")
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        LatencyProvider.latency = options["latency_ms"] / 1000
+        recipients = [f"+26377{i:07d}" for i in range(count)]
+        latency_path = f"{__name__}.LatencyProvider"
+        console_path = "comms.services.ConsoleNotificationProvider"
+
+        def single(n=count):
+            for to in recipients[:n]:
+                send_sms(to=to, body="Benchmark")
+
+        def bulk():
+            send_sms_bulk(recipients, body="Benchmark")
+
+        def pooled():
+            logs = NotificationLog.objects.bulk_create(
+                [NotificationLog(channel="sms", to=to, body="Benchmark") for to in recipients], batch_size=500
+            )
+            dispatch_batch(logs, provider=LatencyProvider(), concurrency=options["concurrency"])
+
+        with override_settings(NOTIFICATION_OUTBOX=False, NOTIFICATION_PROVIDER=console_path):
+            if not options["skip_single"]:
+                self._run("console: send_sms loop", single, count)
+            self._run("console: send_sms_bulk", bulk, count)
+
+        with override_settings(NOTIFICATION_OUTBOX=False, NOTIFICATION_PROVIDER=latency_path):
+            if not options["skip_single"]:
+                # one round-trip per message; capped so the run finishes
+                n = min(count, 200)
+                self._run(f"latency: send_sms loop ({n} msgs)", lambda: single(n), n)
+            self._run("latency: send_sms_bulk", bulk, count)
+            self._run(f"latency: outbox dispatch x{options['concurrency']}", pooled, count)
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand, CommandError
+from comms.services_summary import diff_summaries
+
+class Command(BaseCommand):
+    help = "Diff ThreadSummary rows against live Message aggregates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=50, help="Max mismatches to print.")
+
+    def handle(self, *args, **options):
+        diffs = diff_summaries()
+        if not diffs:
+            self.stdout.write(self.style.SUCCESS("Thread summaries are consistent."))
+            return
+
+        for thread_id, user_id, field, stored, live in diffs[: options["limit"]]:
+            self.stdout.write(f"thread={thread_id} user={user_id} {field}: stored={stored} live={live}")
+        raise CommandError(f"{len(diffs)} mismatches found. Run rebuild_thread_summaries to repair.")
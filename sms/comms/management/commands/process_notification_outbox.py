@@ -0,0 +1,32 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from comms.services_outbox import process_outbox
+
+class Command(BaseCommand):
+    help = "Deliver queued NotificationLog rows in batches through the configured provider."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--concurrency", type=int, default=getattr(settings, "NOTIFICATION_WORKER_CONCURRENCY", 8))
+        parser.add_argument("--max-attempts", type=int, default=getattr(settings, "NOTIFICATION_MAX_ATTEMPTS", 5))
+        parser.add_argument("--lease-seconds", type=int, default=300, help="Reclaim rows stuck in 'sending' after this long.")
+        parser.add_argument("--idle-sleep", type=float, default=5.0, help="Seconds to wait when the outbox is empty.")
+        parser.add_argument("--once", action="store_true", help="Drain what is due now and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            totals = process_outbox(
+                batch_size=options["batch_size"],
+                concurrency=options["concurrency"],
+                max_attempts=options["max_attempts"],
+                lease_seconds=options["lease_seconds"],
+            )
+            if any(totals.values()):
+                self.stdout.write(
+                    f"Sent {totals['sent']}, retrying {totals['retry']}, failed {totals['failed']}."
+                )
+            if options["once"]:
+                break
+            time.sleep(options["idle_sleep"])
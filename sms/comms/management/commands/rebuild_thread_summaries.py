@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+from comms.models import Thread
+from comms.services_summary import rebuild_summaries
+
+class Command(BaseCommand):
+    help = "Rebuild ThreadSummary rows from the Message table (all threads, or --thread ids)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--thread", type=int, action="append", dest="thread_ids", help="Limit to this thread id (repeatable).")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        threads = Thread.objects.all()
+        if options["thread_ids"]:
+            threads = threads.filter(id__in=options["thread_ids"])
+
+        written = rebuild_summaries(threads, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} thread summaries."))
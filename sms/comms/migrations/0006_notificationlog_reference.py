@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 06:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comms', '0005_notificationlog_outbox'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notificationlog',
+            name='reference',
+            field=models.CharField(blank=True, db_index=True, max_length=100),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 6.0 on 2026-10-18 19:20
+
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import migrations
+from django.db.models import Count, DateTimeField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def populate_summaries(apps, schema_editor):
+    # rebuild_summaries on the historical models: threads that predate
+    # ThreadSummary would otherwise be missing from inboxes until the next post
+    Thread = apps.get_model("comms", "Thread")
+    Message = apps.get_model("comms", "Message")
+    ThreadReadState = apps.get_model("comms", "ThreadReadState")
+    ThreadSummary = apps.get_model("comms", "ThreadSummary")
+
+    latest = Message.objects.filter(thread=OuterRef("pk")).order_by("-created_at", "-id")
+    total = Message.objects.filter(thread=OuterRef("pk")).order_by().values("thread").annotate(c=Count("id")).values("c")
+    rows = {}
+    for user_field in ("teacher_user", "parent_user"):
+        last_read = ThreadReadState.objects.filter(thread=OuterRef("pk"), user=OuterRef(user_field)).values("last_read_at")[:1]
+        unread = (
+            Message.objects.filter(thread=OuterRef("pk"))
+            .exclude(sender=OuterRef(user_field))
+            .filter(created_at__gt=OuterRef("read_at"))
+            .order_by()
+            .values("thread")
+            .annotate(c=Count("id"))
+            .values("c")
+        )
+        qs = Thread.objects.order_by().annotate(
+            last_id=Subquery(latest.values("id")[:1]),
+            last_at=Subquery(latest.values("created_at")[:1]),
+            n=Coalesce(Subquery(total, output_field=IntegerField()), 0),
+            read_at=Coalesce(Subquery(last_read), Value(_EPOCH), output_field=DateTimeField()),
+        ).annotate(
+            unread_n=Coalesce(Subquery(unread, output_field=IntegerField()), 0),
+        ).values_list("id", f"{user_field}_id", "last_id", "last_at", "n", "unread_n")
+        for thread_id, user_id, last_id, last_at, n, unread_n in qs:
+            rows[(thread_id, user_id)] = ThreadSummary(
+                thread_id=thread_id, user_id=user_id, last_message_id=last_id,
+                last_message_at=last_at, message_count=n, unread_count=unread_n,
+            )
+
+    ThreadSummary.objects.all().delete()
+    ThreadSummary.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comms', '0006_notificationlog_reference'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
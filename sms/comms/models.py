@@ -52,11 +52,22 @@ class NotificationLog(models.Model):
     to = models.CharField(max_length=255)
     subject = models.CharField(max_length=255, blank=True)
     body = models.TextField()
-    status = models.CharField(max_length=40, default="queued")  # queued/sent/failed
+    status = models.CharField(max_length=40, default="queued")  # queued/sending/sent/failed
     error = models.TextField(blank=True)
     created_at = models.DateTimeField(default=timezone.now)
     sent_at = models.DateTimeField(null=True, blank=True)
 
+    # outbox bookkeeping: next_attempt_at is the retry time while queued
+    # and the claim lease expiry while sending
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(null=True, blank=True)
+
+    # what the message is about, e.g. "fee_reminder:invoice:42" (used to avoid re-sends)
+    reference = models.CharField(max_length=100, blank=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "next_attempt_at"], name="comms_notif_outbox_idx")]
+
     def __str__(self):
         return f"{self.channel} -> {self.to} [{self.status}]"
 
@@ -83,4 +94,23 @@ class ThreadReadState(models.Model):
         unique_together = ("thread", "user")
 
     def __str__(self):
-        return f"{self.user} read {self.thread} at {self.last_read_at}"
\ No newline at end of file
+        return f"{self.user} read {self.thread} at {self.last_read_at}"
+
+class ThreadSummary(models.Model):
+    """
+    Denormalized per-(thread, participant) inbox row, maintained on message write.
+    Rebuild with `manage.py rebuild_thread_summaries`.
+    """
+    thread = models.ForeignKey(Thread, on_delete=models.CASCADE, related_name="summaries")
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="thread_summaries")
+    last_message = models.ForeignKey(Message, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    message_count = models.PositiveIntegerField(default=0)
+    unread_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("thread", "user")
+        indexes = [models.Index(fields=["user", "-last_message_at"], name="comms_summary_inbox_idx")]
+
+    def __str__(self):
+        return f"{self.user} · {self.thread} ({self.unread_count} unread)"
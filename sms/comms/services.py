@@ -1,13 +1,42 @@
+from django.conf import settings
 from django.utils import timezone
+from django.utils.module_loading import import_string
 from .models import NotificationLog
 
 class BaseNotificationProvider:
+    # Providers with a real bulk endpoint set supports_batch and override the
+    # *_batch methods; the outbox worker then sends max_batch_size per call.
+    supports_batch = False
+    max_batch_size = 100
+
     def send_sms(self, to: str, body: str) -> None:
         raise NotImplementedError
 
     def send_email(self, to: str, subject: str, body: str) -> None:
         raise NotImplementedError
 
+    def send_sms_batch(self, messages) -> list:
+        """
+        messages: [(to, body), ...]. Returns one result per message, in order:
+        {"to": ..., "ok": bool, "error": str}. Default loops over send_sms.
+        """
+        return [self._try(self.send_sms, to=to, body=body) for to, body in messages]
+
+    def send_email_batch(self, messages) -> list:
+        """messages: [(to, subject, body), ...]. Same result shape as send_sms_batch."""
+        return [
+            self._try(self.send_email, to=to, subject=subject, body=body)
+            for to, subject, body in messages
+        ]
+
+    @staticmethod
+    def _try(fn, **kwargs) -> dict:
+        try:
+            fn(**kwargs)
+        except Exception as e:
+            return {"to": kwargs["to"], "ok": False, "error": str(e) or e.__class__.__name__}
+        return {"to": kwargs["to"], "ok": True, "error": ""}
+
 class ConsoleNotificationProvider(BaseNotificationProvider):
     def send_sms(self, to: str, body: str) -> None:
         print(f"[SMS to {to}] {body}")
@@ -16,30 +45,99 @@ class ConsoleNotificationProvider(BaseNotificationProvider):
         print(f"[EMAIL to {to}] {subject}\n{body}")
 
 def get_provider() -> BaseNotificationProvider:
-    return ConsoleNotificationProvider()
+    path = getattr(settings, "NOTIFICATION_PROVIDER", "comms.services.ConsoleNotificationProvider")
+    return import_string(path)()
+
+def outbox_enabled() -> bool:
+    """When on, sends only write queued logs; `process_notification_outbox` delivers them."""
+    return getattr(settings, "NOTIFICATION_OUTBOX", False)
+
+def deliver_batch(provider: BaseNotificationProvider, logs) -> list:
+    """
+    Send logs through the provider's batch API, one call per channel and
+    max_batch_size slice.
+    Returns an error string (or None on success) per log, in order; logs the
+    provider returned no result for count as failed.
+    """
+    errors = [None] * len(logs)
+    by_channel = {}
+    for i, log in enumerate(logs):
+        by_channel.setdefault(log.channel, []).append(i)
+
+    size = max(provider.max_batch_size, 1)
+    for channel, all_idxs in by_channel.items():
+        for start in range(0, len(all_idxs), size):
+            idxs = all_idxs[start:start + size]
+            try:
+                if channel == "sms":
+                    results = provider.send_sms_batch([(logs[i].to, logs[i].body) for i in idxs])
+                elif channel == "email":
+                    results = provider.send_email_batch([(logs[i].to, logs[i].subject, logs[i].body) for i in idxs])
+                else:
+                    raise ValueError(f"Unsupported channel: {channel}")
+            except Exception as e:
+                results = [{"ok": False, "error": str(e) or e.__class__.__name__}] * len(idxs)
+            for n, i in enumerate(idxs):
+                # a short result list leaves the tail unconfirmed: fail it so it's retried
+                result = results[n] if n < len(results) else {"ok": False, "error": "no result from provider"}
+                errors[i] = None if result["ok"] else (result["error"] or "send failed")
+    return errors
+
+def _apply_results(logs, errors) -> None:
+    now = timezone.now()
+    for log, error in zip(logs, errors):
+        log.attempts += 1
+        if error is None:
+            log.status, log.sent_at = "sent", now
+        else:
+            log.status, log.error = "failed", error
+
+def save_results(logs, fields, batch_size: int = 500) -> None:
+    """
+    Persist send outcomes. Rows sharing the same values (typically all "sent"
+    with one timestamp) are written with one UPDATE ... WHERE id IN per group,
+    which is far cheaper than bulk_update's per-row CASE on large batches.
+    """
+    groups = {}
+    for log in logs:
+        key = tuple(getattr(log, f) for f in fields)
+        groups.setdefault(key, []).append(log.id)
+    for key, ids in groups.items():
+        values = dict(zip(fields, key))
+        for start in range(0, len(ids), batch_size):
+            NotificationLog.objects.filter(id__in=ids[start:start + batch_size]).update(**values)
+
+def _send_bulk(logs, batch_size: int = 500) -> list:
+    logs = NotificationLog.objects.bulk_create(logs, batch_size=batch_size)
+    if outbox_enabled() or not logs:
+        return logs
+    _apply_results(logs, deliver_batch(get_provider(), logs))
+    save_results(logs, ["status", "sent_at", "error", "attempts"], batch_size=batch_size)
+    return logs
+
+def send_sms_bulk(recipients, body: str) -> list:
+    """One NotificationLog per recipient, written with bulk_create plus grouped updates."""
+    return _send_bulk([NotificationLog(channel="sms", to=to, body=body, status="queued") for to in recipients])
+
+def send_email_bulk(recipients, subject: str, body: str) -> list:
+    return _send_bulk([
+        NotificationLog(channel="email", to=to, subject=subject, body=body, status="queued")
+        for to in recipients
+    ])
+
+def _send_now(log: NotificationLog) -> NotificationLog:
+    _apply_results([log], deliver_batch(get_provider(), [log]))
+    log.save(update_fields=["status", "sent_at", "error", "attempts"])
+    return log
 
 def send_sms(to: str, body: str) -> NotificationLog:
     log = NotificationLog.objects.create(channel="sms", to=to, body=body, status="queued")
-    provider = get_provider()
-    try:
-        provider.send_sms(to=to, body=body)
-        log.status = "sent"
-        log.sent_at = timezone.now()
-    except Exception as e:
-        log.status = "failed"
-        log.error = str(e)
-    log.save(update_fields=["status", "sent_at", "error"])
-    return log
+    if outbox_enabled():
+        return log
+    return _send_now(log)
 
 def send_email(to: str, subject: str, body: str) -> NotificationLog:
     log = NotificationLog.objects.create(channel="email", to=to, subject=subject, body=body, status="queued")
-    provider = get_provider()
-    try:
-        provider.send_email(to=to, subject=subject, body=body)
-        log.status = "sent"
-        log.sent_at = timezone.now()
-    except Exception as e:
-        log.status = "failed"
-        log.error = str(e)
-    log.save(update_fields=["status", "sent_at", "error"])
-    return log
+    if outbox_enabled():
+        return log
+    return _send_now(log)
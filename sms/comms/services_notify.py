@@ -1,20 +1,138 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from .models import NotificationLog
 from .services import send_email, send_sms
-from .models import NotificationPreference
+from .services_outbox import queue_notifications
 
-def notify_user(user, subject: str, body: str):
-    # default preferences if not created yet
-    pref, _ = NotificationPreference.objects.get_or_create(user=user)
 
-    email = getattr(user, "email", "") or ""
-    phone = ""
-    if hasattr(user, "parent_profile"):
-        phone = user.parent_profile.phone or ""
+class ContactInfo(NamedTuple):
+    email: str
+    phone: str
+    enable_email: bool
+    enable_sms: bool
+    enable_in_app: bool
+
+
+class _ContactCache:
+    """
+    Small per-process LRU with TTL. Signals (comms.signals) evict entries when
+    the underlying rows change in this process; the TTL bounds staleness for
+    changes made by other processes.
+    """
+
+    def __init__(self):
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def maxsize(self):
+        return getattr(settings, "NOTIFICATION_CONTACT_CACHE_SIZE", 2048)
+
+    @property
+    def ttl(self):
+        return getattr(settings, "NOTIFICATION_CONTACT_CACHE_TTL", 300)
+
+    def get_many(self, keys):
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for key in keys:
+                item = self._data.get(key)
+                if item is None:
+                    continue
+                expires, value = item
+                if expires < now:
+                    del self._data[key]
+                    continue
+                self._data.move_to_end(key)
+                found[key] = value
+        return found
+
+    def set_many(self, items):
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, value in items.items():
+                self._data[key] = (expires, value)
+                self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
 
-    if pref.enable_email and email:
-        send_email(to=email, subject=subject, body=body)
 
-    if pref.enable_sms and phone:
-        send_sms(to=phone, body=body)
+contact_cache = _ContactCache()
+
+
+def resolve_contacts(users) -> dict:
+    """
+    Map user id -> ContactInfo for users (instances or ids) using one query for
+    any cache misses. Missing NotificationPreference rows fall back to the
+    model defaults, so nothing is written on the read path.
+    """
+    ids = {getattr(u, "pk", u) for u in users}
+    found = contact_cache.get_many(ids)
+    missing = ids - found.keys()
+    if missing:
+        rows = get_user_model().objects.filter(id__in=missing).values(
+            "id",
+            "email",
+            "parent_profile__phone",
+            "notif_pref__enable_email",
+            "notif_pref__enable_sms",
+            "notif_pref__enable_in_app",
+        )
+        fresh = {}
+        for r in rows:
+            has_pref = r["notif_pref__enable_email"] is not None
+            fresh[r["id"]] = ContactInfo(
+                email=r["email"] or "",
+                phone=r["parent_profile__phone"] or "",
+                enable_email=r["notif_pref__enable_email"] if has_pref else True,
+                enable_sms=r["notif_pref__enable_sms"] if has_pref else False,
+                enable_in_app=r["notif_pref__enable_in_app"] if has_pref else True,
+            )
+        contact_cache.set_many(fresh)
+        found.update(fresh)
+    return found
+
+
+def resolve_contact(user):
+    return resolve_contacts([user]).get(getattr(user, "pk", user))
+
+
+def notify_user(user, subject: str, body: str):
+    contact = resolve_contact(user)
+    if contact is None:
+        return
+
+    if contact.enable_email and contact.email:
+        send_email(to=contact.email, subject=subject, body=body)
+
+    if contact.enable_sms and contact.phone:
+        send_sms(to=contact.phone, body=body)
 
     # in-app is already covered by NotificationLog (we log sms/email).
     # If you want explicit "in-app inbox notifications", we can add a model later.
+
+
+def notify_users(users, subject: str, body: str) -> list:
+    """Broadcast variant: one contact query and one bulk insert for all users."""
+    logs = []
+    for contact in resolve_contacts(users).values():
+        if contact.enable_email and contact.email:
+            logs.append(NotificationLog(channel="email", to=contact.email, subject=subject, body=body))
+        if contact.enable_sms and contact.phone:
+            logs.append(NotificationLog(channel="sms", to=contact.phone, body=body))
+    return queue_notifications(logs)
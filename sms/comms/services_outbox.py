@@ -0,0 +1,121 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import NotificationLog
+from .services import deliver_batch, get_provider, outbox_enabled, save_results
+
+OUTBOX_UPDATE_FIELDS = ["status", "sent_at", "error", "attempts", "next_attempt_at"]
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def queue_notifications(logs, batch_size: int = 500, concurrency: int = None) -> list:
+    """
+    Insert unsaved NotificationLog rows as `queued` in one bulk insert.
+    Without outbox mode they are dispatched straight away (no retries,
+    matching send_sms/send_email).
+    """
+    for log in logs:
+        log.status = "queued"
+    logs = NotificationLog.objects.bulk_create(logs, batch_size=batch_size)
+    if logs and not outbox_enabled():
+        dispatch_batch(logs, concurrency=concurrency, max_attempts=1)
+    return logs
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """Exponential backoff: base, 2*base, 4*base ... capped."""
+    base = _setting("NOTIFICATION_RETRY_BASE_SECONDS", 30)
+    cap = _setting("NOTIFICATION_RETRY_MAX_SECONDS", 3600)
+    return timedelta(seconds=min(base * 2 ** max(attempts - 1, 0), cap))
+
+
+def _claimable(now):
+    return Q(status__in=["queued", "sending"]) & (Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+
+
+def claim_batch(batch_size: int = 100, lease_seconds: int = 300) -> list:
+    """
+    Claim up to batch_size due rows by flipping them to `sending` with a lease.
+    Rows whose lease expires (crashed worker) become claimable again.
+    """
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=lease_seconds)
+    with transaction.atomic():
+        ids = list(
+            NotificationLog.objects.select_for_update(skip_locked=True)
+            .filter(_claimable(now))
+            .order_by("id")
+            .values_list("id", flat=True)[:batch_size]
+        )
+        if not ids:
+            return []
+        NotificationLog.objects.filter(_claimable(now), id__in=ids).update(
+            status="sending", next_attempt_at=lease_until
+        )
+    return list(
+        NotificationLog.objects.filter(id__in=ids, status="sending", next_attempt_at=lease_until).order_by("id")
+    )
+
+
+def _chunks(logs, size):
+    for i in range(0, len(logs), size):
+        yield logs[i:i + size]
+
+
+def dispatch_batch(logs, provider=None, concurrency: int = None, max_attempts: int = None) -> dict:
+    """
+    Send logs through the provider's batch API on a thread pool, then write
+    all outcomes back in grouped bulk updates. Failures are re-queued with
+    backoff until max_attempts is reached. Providers without a bulk endpoint
+    get one message per task so concurrency still applies.
+    """
+    provider = provider or get_provider()
+    concurrency = concurrency or _setting("NOTIFICATION_WORKER_CONCURRENCY", 8)
+    max_attempts = max_attempts or _setting("NOTIFICATION_MAX_ATTEMPTS", 5)
+
+    chunk_size = provider.max_batch_size if provider.supports_batch else 1
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        chunk_errors = pool.map(lambda chunk: deliver_batch(provider, chunk), _chunks(logs, chunk_size))
+        errors = [e for chunk in chunk_errors for e in chunk]
+
+    now = timezone.now()
+    counts = {"sent": 0, "retry": 0, "failed": 0}
+    for log, error in zip(logs, errors):
+        log.attempts += 1
+        if error is None:
+            log.status, log.sent_at, log.error, log.next_attempt_at = "sent", now, "", None
+            counts["sent"] += 1
+        elif log.attempts < max_attempts:
+            log.status, log.error, log.next_attempt_at = "queued", error, now + retry_delay(log.attempts)
+            counts["retry"] += 1
+        else:
+            log.status, log.error, log.next_attempt_at = "failed", error, None
+            counts["failed"] += 1
+
+    save_results(logs, OUTBOX_UPDATE_FIELDS)
+    return counts
+
+
+def process_outbox(batch_size: int = 100, concurrency: int = None, max_attempts: int = None,
+                   lease_seconds: int = 300, max_batches: int = None) -> dict:
+    """Drain due rows batch by batch until none are left (or max_batches)."""
+    provider = get_provider()
+    totals = {"sent": 0, "retry": 0, "failed": 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        logs = claim_batch(batch_size=batch_size, lease_seconds=lease_seconds)
+        if not logs:
+            break
+        counts = dispatch_batch(logs, provider=provider, concurrency=concurrency, max_attempts=max_attempts)
+        for k, v in counts.items():
+            totals[k] += v
+        batches += 1
+    return totals
@@ -0,0 +1,149 @@
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.db.models import Case, Count, DateTimeField, F, IntegerField, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Message, Thread, ThreadReadState, ThreadSummary
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+SUMMARY_FIELDS = ("last_message_id", "last_message_at", "message_count", "unread_count")
+
+
+def annotate_thread_stats(threads, user):
+    """
+    Annotate threads with last_msg_id, last_msg_at, message_count and unread_count.
+    `user` is either a User or an OuterRef to a user column on Thread
+    (e.g. OuterRef("teacher_user")) so it can be evaluated per row.
+    """
+    latest = Message.objects.filter(thread=OuterRef("pk")).order_by("-created_at", "-id")
+    last_read = ThreadReadState.objects.filter(thread=OuterRef("pk"), user=user).values("last_read_at")[:1]
+    total_qs = (
+        Message.objects.filter(thread=OuterRef("pk"))
+        .order_by()
+        .values("thread")
+        .annotate(c=Count("id"))
+        .values("c")
+    )
+    unread_qs = (
+        Message.objects.filter(thread=OuterRef("pk"))
+        .exclude(sender=user)
+        .filter(created_at__gt=OuterRef("last_read_at_or_epoch"))
+        .order_by()
+        .values("thread")
+        .annotate(c=Count("id"))
+        .values("c")
+    )
+
+    return threads.annotate(
+        last_msg_id=Subquery(latest.values("id")[:1]),
+        last_msg_at=Subquery(latest.values("created_at")[:1]),
+        message_count=Coalesce(Subquery(total_qs, output_field=IntegerField()), 0),
+        last_read_at_or_epoch=Coalesce(
+            Subquery(last_read), Value(_EPOCH), output_field=DateTimeField()
+        ),
+    ).annotate(
+        unread_count=Coalesce(Subquery(unread_qs, output_field=IntegerField()), 0),
+    )
+
+
+def live_summaries(threads=None) -> dict:
+    """
+    Compute summary values from the Message table for every thread participant.
+    Returns {(thread_id, user_id): {field: value}}.
+    """
+    threads = Thread.objects.all() if threads is None else threads
+    rows = {}
+    for user_field in ("teacher_user", "parent_user"):
+        qs = annotate_thread_stats(threads.order_by(), OuterRef(user_field)).values(
+            "id", f"{user_field}_id", "last_msg_id", "last_msg_at", "message_count", "unread_count"
+        )
+        for r in qs:
+            rows[(r["id"], r[f"{user_field}_id"])] = {
+                "last_message_id": r["last_msg_id"],
+                "last_message_at": r["last_msg_at"],
+                "message_count": r["message_count"],
+                "unread_count": r["unread_count"],
+            }
+    return rows
+
+
+def ensure_summaries(thread: Thread) -> None:
+    """Create empty summary rows for both participants of a new thread."""
+    ThreadSummary.objects.bulk_create(
+        [
+            ThreadSummary(thread=thread, user_id=thread.teacher_user_id),
+            ThreadSummary(thread=thread, user_id=thread.parent_user_id),
+        ],
+        ignore_conflicts=True,
+    )
+
+
+def record_message(message: Message) -> None:
+    """Fold a newly posted message into its thread's summary rows."""
+    thread = message.thread
+    participants = [thread.teacher_user_id, thread.parent_user_id]
+    rows = ThreadSummary.objects.filter(thread=thread, user_id__in=participants)
+    updated = rows.update(
+        message_count=F("message_count") + 1,
+        # the sender's own counter is reset by mark_thread_read
+        unread_count=Case(
+            When(user_id=message.sender_id, then=F("unread_count")),
+            default=F("unread_count") + 1,
+        ),
+    )
+    rows.filter(Q(last_message_at__isnull=True) | Q(last_message_at__lte=message.created_at)).update(
+        last_message=message, last_message_at=message.created_at
+    )
+    if updated < len(set(participants)):
+        # summaries missing (thread predates the table) – rebuild just this one
+        rebuild_summaries(Thread.objects.filter(id=thread.id))
+
+
+def mark_thread_read(thread: Thread, user) -> None:
+    """Stamp the user's read state and reset their unread counter."""
+    ThreadReadState.objects.update_or_create(
+        thread=thread, user=user, defaults={"last_read_at": timezone.now()}
+    )
+    ThreadSummary.objects.filter(thread=thread, user=user).update(unread_count=0)
+
+
+def rebuild_summaries(threads=None, batch_size: int = 1000) -> int:
+    """Replace summary rows for `threads` (default: all) with live aggregates."""
+    threads = Thread.objects.all() if threads is None else threads
+    live = live_summaries(threads)
+    objs = [
+        ThreadSummary(thread_id=thread_id, user_id=user_id, **values)
+        for (thread_id, user_id), values in live.items()
+    ]
+    with transaction.atomic():
+        ThreadSummary.objects.filter(thread__in=threads).delete()
+        ThreadSummary.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
+
+
+def diff_summaries(threads=None) -> list:
+    """
+    Compare stored summaries against live aggregates.
+    Returns a list of (thread_id, user_id, field, stored, live) tuples.
+    """
+    threads = Thread.objects.all() if threads is None else threads
+    live = live_summaries(threads)
+    stored = {
+        (r["thread_id"], r["user_id"]): r
+        for r in ThreadSummary.objects.filter(thread__in=threads).values("thread_id", "user_id", *SUMMARY_FIELDS)
+    }
+
+    diffs = []
+    for key in sorted(set(live) | set(stored)):
+        s = stored.get(key)
+        lv = live.get(key)
+        if s is None or lv is None:
+            diffs.append((*key, "row", "present" if s else "missing", "present" if lv else "missing"))
+            continue
+        for field in SUMMARY_FIELDS:
+            if s[field] != lv[field]:
+                diffs.append((*key, field, s[field], lv[field]))
+    return diffs
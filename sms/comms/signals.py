@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from people.models import ParentProfile
+from .models import NotificationPreference
+from .services_notify import contact_cache
+
+
+@receiver([post_save, post_delete], sender=NotificationPreference)
+@receiver([post_save, post_delete], sender=ParentProfile)
+def _evict_contact_for_related(sender, instance, **kwargs):
+    contact_cache.invalidate(instance.user_id)
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def _evict_contact_for_user(sender, instance, update_fields=None, **kwargs):
+    # saves that only touch e.g. last_login can't change the email
+    if update_fields is not None and "email" not in update_fields:
+        return
+    contact_cache.invalidate(instance.pk)
@@ -1,3 +1,202 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from people.models import ParentProfile, Student
+from .models import Thread, Message, ThreadReadState, NotificationLog, NotificationPreference
+from .services import BaseNotificationProvider, deliver_batch, send_sms, send_sms_bulk
+from .services_outbox import queue_notifications
+from .services_notify import contact_cache, notify_users, resolve_contact
+from .services_summary import diff_summaries, ensure_summaries, mark_thread_read, rebuild_summaries, record_message
+from .views import _inbox_rows, _inbox_summary_rows
+
+
+def _make_threads(teacher, n, offset=0):
+    students = Student.objects.bulk_create([
+        Student(
+            student_id=f"T{offset + i:05d}",
+            first_name="Kid",
+            last_name=str(offset + i),
+            date_of_birth=date(2015, 1, 1),
+            admission_date=date(2024, 1, 10),
+        )
+        for i in range(n)
+    ])
+    parent = User.objects.create_user(username=f"parent{offset}", is_parent=True)
+    threads = Thread.objects.bulk_create([
+        Thread(student=s, teacher_user=teacher, parent_user=parent) for s in students
+    ])
+    now = timezone.now() - timedelta(hours=1)
+    Message.objects.bulk_create([
+        Message(thread=t, sender=sender, body=f"msg {i}", created_at=now + timedelta(seconds=i))
+        for t in threads
+        for i, sender in enumerate([teacher, parent, parent])
+    ])
+    return threads
+
+
+class InboxQueryTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username="teacher", is_teacher=True)
+
+    def _count_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            _inbox_rows(Thread.objects.filter(teacher_user=self.teacher), self.teacher)
+        return len(ctx.captured_queries)
+
+    def test_query_count_is_flat(self):
+        _make_threads(self.teacher, 10)
+        small = self._count_queries()
+        _make_threads(self.teacher, 990, offset=10)
+        large = self._count_queries()
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, 2)
+
+    def test_unread_and_last_message(self):
+        thread, other = _make_threads(self.teacher, 2)
+        read_at = Message.objects.filter(thread=thread).order_by("created_at")[1].created_at
+        ThreadReadState.objects.create(thread=thread, user=self.teacher, last_read_at=read_at)
+
+        threads, unread, last_msg_map = _inbox_rows(Thread.objects.filter(teacher_user=self.teacher), self.teacher)
+
+        self.assertEqual(len(threads), 2)
+        self.assertEqual(unread[thread.id], 1)
+        self.assertEqual(unread[other.id], 2)
+        self.assertEqual(last_msg_map[thread.id].body, "msg 2")
+
+
+class ThreadSummaryTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(username="teacher", is_teacher=True)
+
+    def test_incremental_updates_match_live_aggregates(self):
+        threads = _make_threads(self.teacher, 3)
+        rebuild_summaries()
+        self.assertEqual(diff_summaries(), [])
+
+        thread = threads[0]
+        msg = Message.objects.create(thread=thread, sender=self.teacher, body="hello")
+        record_message(msg)
+        mark_thread_read(thread, thread.parent_user)
+        self.assertEqual(diff_summaries(), [])
+
+        rows, unread, last_msg_map = _inbox_summary_rows(Thread.objects.filter(teacher_user=self.teacher), self.teacher)
+        self.assertEqual(rows[0].id, thread.id)
+        self.assertEqual(last_msg_map[thread.id].id, msg.id)
+
+    def test_new_thread_gets_empty_rows(self):
+        parent = User.objects.create_user(username="p", is_parent=True)
+        student = Student.objects.create(
+            student_id="X1", first_name="A", last_name="B",
+            date_of_birth=date(2015, 1, 1), admission_date=date(2024, 1, 1),
+        )
+        thread = Thread.objects.create(student=student, teacher_user=self.teacher, parent_user=parent)
+        ensure_summaries(thread)
+        self.assertEqual(thread.summaries.count(), 2)
+        self.assertEqual(diff_summaries(), [])
+
+
+class FakeProvider(BaseNotificationProvider):
+    """Local provider for outbox tests: records sends, fails for 'bad' recipients."""
+    sent = []
+
+    def send_sms(self, to, body):
+        if to.startswith("bad"):
+            raise RuntimeError("provider rejected")
+        self.sent.append(("sms", to))
+
+    def send_email(self, to, subject, body):
+        if to.startswith("bad"):
+            raise RuntimeError("provider rejected")
+        self.sent.append(("email", to))
+
+
+@override_settings(
+    NOTIFICATION_PROVIDER="comms.tests.FakeProvider",
+    NOTIFICATION_OUTBOX=True,
+    NOTIFICATION_MAX_ATTEMPTS=2,
+    NOTIFICATION_RETRY_BASE_SECONDS=60,
+)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        FakeProvider.sent = []
+
+    def test_send_only_queues_in_outbox_mode(self):
+        log = send_sms(to="+263770000001", body="hi")
+        self.assertEqual(log.status, "queued")
+        self.assertEqual(FakeProvider.sent, [])
+
+    def test_worker_delivers_and_backs_off(self):
+        queue_notifications([
+            NotificationLog(channel="sms", to=f"+2637700000{i:02d}", body="reminder") for i in range(20)
+        ] + [NotificationLog(channel="email", to="bad@example.com", subject="s", body="b")])
+
+        call_command("process_notification_outbox", once=True, batch_size=7, concurrency=4, stdout=StringIO())
+
+        self.assertEqual(len(FakeProvider.sent), 20)
+        self.assertEqual(NotificationLog.objects.filter(status="sent").count(), 20)
+        bad = NotificationLog.objects.get(to="bad@example.com")
+        self.assertEqual((bad.status, bad.attempts), ("queued", 1))
+        self.assertGreater(bad.next_attempt_at, timezone.now())
+
+        # due again after the backoff window, then exhausted
+        NotificationLog.objects.filter(id=bad.id).update(next_attempt_at=timezone.now())
+        call_command("process_notification_outbox", once=True, stdout=StringIO())
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.attempts, bad.error), ("failed", 2, "provider rejected"))
+
+
+@override_settings(NOTIFICATION_PROVIDER="comms.tests.FakeProvider", NOTIFICATION_OUTBOX=False)
+class BatchSendTests(TestCase):
+    def test_default_batch_returns_per_recipient_results(self):
+        results = FakeProvider().send_sms_batch([("+1", "a"), ("bad-number", "b")])
+        self.assertEqual([r["ok"] for r in results], [True, False])
+        self.assertEqual(results[1]["to"], "bad-number")
+
+    def test_bulk_helper_logs_every_recipient(self):
+        logs = send_sms_bulk(["+1", "+2", "bad-number"], body="Closed tomorrow")
+        self.assertEqual([log.status for log in logs], ["sent", "sent", "failed"])
+        self.assertEqual(NotificationLog.objects.filter(status="sent").count(), 2)
+        self.assertEqual(NotificationLog.objects.get(to="bad-number").error, "provider rejected")
+
+    def test_results_missing_from_a_short_batch_are_failures(self):
+        class ShortProvider(FakeProvider):
+            def send_sms_batch(self, messages):
+                return super().send_sms_batch(messages)[:-1]
+
+        logs = [NotificationLog(channel="sms", to=to, body="hi") for to in ("+1", "+2", "+3")]
+        self.assertEqual(deliver_batch(ShortProvider(), logs), [None, None, "no result from provider"])
+
+
+class ContactResolverTests(TestCase):
+    def setUp(self):
+        contact_cache.clear()
+        self.parent = User.objects.create_user(username="p", email="p@example.com", is_parent=True)
+        ParentProfile.objects.create(user=self.parent, phone="+263771000000")
+
+    def test_cached_until_preference_changes(self):
+        with self.assertNumQueries(1):
+            contact = resolve_contact(self.parent)
+            resolve_contact(self.parent)
+        self.assertEqual((contact.email, contact.phone, contact.enable_sms), ("p@example.com", "+263771000000", False))
+
+        NotificationPreference.objects.create(user=self.parent, enable_email=False, enable_sms=True)
+        contact = resolve_contact(self.parent)
+        self.assertEqual((contact.enable_email, contact.enable_sms), (False, True))
+
+        self.parent.email = "new@example.com"
+        self.parent.save()
+        self.assertEqual(resolve_contact(self.parent).email, "new@example.com")
+
+    @override_settings(NOTIFICATION_OUTBOX=True)
+    def test_notify_users_single_insert(self):
+        others = [User.objects.create_user(username=f"u{i}", email=f"u{i}@example.com") for i in range(3)]
+        with self.assertNumQueries(2):
+            logs = notify_users(others + [self.parent], subject="Closed", body="School closed tomorrow")
+        self.assertEqual(len(logs), 4)
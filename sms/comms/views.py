@@ -1,15 +1,16 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q, Max
+from django.db import transaction
+from django.db.models import F, Q
 from django.shortcuts import get_object_or_404, redirect, render
-from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 
 from people.models import Student
 from .forms import StartThreadForm, MessageForm
-from .models import Thread, Message, ThreadReadState
+from .models import Thread, Message, ThreadSummary
 from .utils import can_view_thread
 from .services_notify import notify_user
+from .services_summary import annotate_thread_stats, ensure_summaries, mark_thread_read, record_message
 
 
 def _threads_for_user(u):
@@ -20,12 +21,48 @@ def _threads_for_user(u):
     return Thread.objects.all()
 
 
+def _inbox_rows(threads, u):
+    """
+    Live path for staff who are not thread participants (no summary rows).
+    Runs a fixed number of queries regardless of how many threads there are.
+    """
+    threads = list(
+        annotate_thread_stats(threads, u).order_by(F("last_msg_at").desc(nulls_last=True), "-created_at")
+    )
+
+    last_ids = [t.last_msg_id for t in threads if t.last_msg_id]
+    last_msg_map = {
+        m.thread_id: m
+        for m in Message.objects.filter(id__in=last_ids).select_related("sender")
+    }
+    unread = {t.id: t.unread_count for t in threads}
+    return threads, unread, last_msg_map
+
+
+def _inbox_summary_rows(threads, u):
+    """Participant path: a single indexed read of ThreadSummary."""
+    summaries = (
+        ThreadSummary.objects.filter(user=u, thread__in=threads)
+        .select_related("thread__student", "thread__teacher_user", "thread__parent_user", "last_message__sender")
+        .order_by(F("last_message_at").desc(nulls_last=True), "-thread__created_at")
+    )
+    rows, unread, last_msg_map = [], {}, {}
+    for s in summaries:
+        t = s.thread
+        t.last_msg_at = s.last_message_at
+        rows.append(t)
+        unread[t.id] = s.unread_count
+        if s.last_message:
+            last_msg_map[t.id] = s.last_message
+    return rows, unread, last_msg_map
+
+
 @login_required
 def inbox(request):
     u = request.user
     q = (request.GET.get("q") or "").strip()
 
-    threads = _threads_for_user(u).select_related("student", "teacher_user", "parent_user")
+    threads = _threads_for_user(u)
 
     if q:
         threads = threads.filter(
@@ -36,38 +73,11 @@ def inbox(request):
             Q(parent_user__username__icontains=q)
         )
 
-    # last message time for ordering
-    threads = threads.annotate(last_msg_at=Max("messages__created_at")).order_by("-last_msg_at", "-created_at")
-
-    # prepare unread counts
-    thread_ids = list(threads.values_list("id", flat=True))
-    read_map = {
-        rs.thread_id: rs.last_read_at
-        for rs in ThreadReadState.objects.filter(user=u, thread_id__in=thread_ids)
-    }
-
-    last_msg_map = {
-        m.thread_id: m
-        for m in Message.objects.filter(thread_id__in=thread_ids)
-                           .select_related("sender")
-                           .order_by("thread_id", "-created_at")
-                           .distinct("thread_id")
-    } if Message._meta.managed and Message.objects.model._meta.db_table else {}
-
-    # portable fallback without distinct("thread_id") if your DB is sqlite:
-    last_msg_map = {}
-    for tid in thread_ids:
-        lm = Message.objects.filter(thread_id=tid).select_related("sender").order_by("-created_at").first()
-        if lm:
-            last_msg_map[tid] = lm
-
-    unread = {}
-    for t in threads:
-        last_read = read_map.get(t.id)
-        base = Message.objects.filter(thread=t).exclude(sender=u)
-        if last_read:
-            base = base.filter(created_at__gt=last_read)
-        unread[t.id] = base.count()
+    if u.is_teacher or u.is_parent:
+        threads, unread, last_msg_map = _inbox_summary_rows(threads, u)
+    else:
+        threads = threads.select_related("student", "teacher_user", "parent_user")
+        threads, unread, last_msg_map = _inbox_rows(threads, u)
 
     return render(
         request,
@@ -104,6 +114,7 @@ def start_thread(request):
             teacher_user=request.user,
             parent_user=parent_user,
         )
+        ensure_summaries(thread)
         return redirect("comms:thread_detail", thread_id=thread.id)
 
     return render(request, "comms/start_thread.html", {"form": form})
@@ -118,24 +129,20 @@ def thread_detail(request, thread_id: int):
         return redirect("comms:inbox")
 
     # mark as read on view (GET) and after sending (POST)
-    ThreadReadState.objects.update_or_create(
-        thread=thread,
-        user=request.user,
-        defaults={"last_read_at": timezone.now()},
-    )
+    mark_thread_read(thread, request.user)
 
     form = MessageForm(request.POST or None)
 
     if request.method == "POST" and form.is_valid():
         body = form.cleaned_data["body"].strip()
-        Message.objects.create(thread=thread, sender=request.user, body=body)
+        with transaction.atomic():
+            msg = Message.objects.create(thread=thread, sender=request.user, body=body)
+            record_message(msg)
 
         other = thread.parent_user if request.user == thread.teacher_user else thread.teacher_user
         notify_user(other, subject="SMS: New message", body=body[:300])
 
-        ThreadReadState.objects.update_or_create(
-            thread=thread, user=request.user, defaults={"last_read_at": timezone.now()}
-        )
+        mark_thread_read(thread, request.user)
 
         return redirect("comms:thread_detail", thread_id=thread.id)
 
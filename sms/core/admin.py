@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import AcademicYear, Term, SchoolSettings
+from .models import AcademicYear, Term, SchoolSettings, ImportJob
 
 @admin.register(AcademicYear)
 class AcademicYearAdmin(admin.ModelAdmin):
@@ -15,3 +15,10 @@ class TermAdmin(admin.ModelAdmin):
 @admin.register(SchoolSettings)
 class SchoolSettingsAdmin(admin.ModelAdmin):
     list_display = ("school_name", "current_academic_year")
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "kind", "status", "rows_done", "total_rows", "created", "skipped", "created_by", "created_at")
+    list_filter = ("kind", "status")
+    readonly_fields = ("stats", "errors", "started_at", "finished_at", "lease_until")
+    exclude = ("file",)  # private upload, not served
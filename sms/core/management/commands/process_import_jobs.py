@@ -0,0 +1,23 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from core.services_imports import process_import_jobs
+
+class Command(BaseCommand):
+    help = "Run queued CSV import jobs in chunks, resuming jobs whose worker stopped mid-file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=getattr(settings, "IMPORT_CHUNK_SIZE", 500))
+        parser.add_argument("--lease-seconds", type=int, default=300, help="Reclaim running jobs with no progress for this long.")
+        parser.add_argument("--idle-sleep", type=float, default=5.0, help="Seconds to wait when no job is queued.")
+        parser.add_argument("--once", action="store_true", help="Run what is queued now and exit.")
+
+    def handle(self, *args, **options):
+        while True:
+            n = process_import_jobs(chunk_size=options["chunk_size"], lease_seconds=options["lease_seconds"])
+            if n:
+                self.stdout.write(f"Processed {n} import job(s).")
+            if options["once"]:
+                break
+            time.sleep(options["idle_sleep"])
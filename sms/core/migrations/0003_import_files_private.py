@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 16:05
+
+import os
+
+import core.storage
+from django.conf import settings
+from django.core.files import File
+from django.db import migrations, models
+
+
+def move_uploads_out_of_media(apps, schema_editor):
+    """Move the files of unfinished jobs into IMPORT_FILES_DIR; drop the rest from MEDIA_ROOT."""
+    ImportJob = apps.get_model("core", "ImportJob")
+    storage = core.storage.ImportFileStorage()
+    for job in ImportJob.objects.exclude(file=""):
+        old_path = os.path.join(settings.MEDIA_ROOT, job.file.name)
+        name = ""
+        if os.path.exists(old_path):
+            if job.status in ("queued", "running"):
+                with open(old_path, "rb") as f:
+                    name = storage.save(core.storage.import_upload_to(job, job.file.name), File(f))
+            os.remove(old_path)
+        ImportJob.objects.filter(pk=job.pk).update(file=name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_importjob_importedrow'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='importjob',
+            name='file',
+            field=models.FileField(blank=True, storage=core.storage.ImportFileStorage(), upload_to=core.storage.import_upload_to),
+        ),
+        migrations.RunPython(move_uploads_out_of_media, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,8 @@
+from django.conf import settings
 from django.db import models
 
+from .storage import ImportFileStorage, import_upload_to
+
 class AcademicYear(models.Model):
     name = models.CharField(max_length=20, unique=True)  # "2025"
     start_date = models.DateField()
@@ -39,3 +42,56 @@ class SchoolSettings(models.Model):
 
     def __str__(self) -> str:
         return self.school_name
+
+class ImportJob(models.Model):
+    """A CSV upload processed in chunks by `manage.py process_import_jobs`."""
+    KIND_CHOICES = [
+        ("applications", "Admission applications"),
+        ("admit", "Bulk admit"),
+        ("users", "Users"),
+    ]
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    file = models.FileField(upload_to=import_upload_to, storage=ImportFileStorage(), blank=True)
+    options = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="queued")
+
+    total_rows = models.PositiveIntegerField(null=True, blank=True)
+    rows_done = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    stats = models.JSONField(default=dict, blank=True)    # kind-specific counters
+    errors = models.JSONField(default=list, blank=True)
+
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    lease_until = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        indexes = [models.Index(fields=["status", "lease_until"], name="core_importjob_claim_idx")]
+
+    def __str__(self) -> str:
+        return f"{self.get_kind_display()} import #{self.pk} ({self.status})"
+
+    @property
+    def percent(self) -> int:
+        if not self.total_rows:
+            return 100 if self.status == "done" else 0
+        return min(100, self.rows_done * 100 // self.total_rows)
+
+class ImportedRow(models.Model):
+    """Idempotency key: a row (by content hash) already applied for a job."""
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name="imported_rows")
+    row_hash = models.CharField(max_length=64)
+
+    class Meta:
+        unique_together = ("job", "row_hash")
@@ -0,0 +1,195 @@
+import csv
+import hashlib
+import json
+from contextlib import nullcontext
+from datetime import timedelta
+from io import TextIOWrapper
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import ImportedRow, ImportJob
+
+# kind -> callable(rows, options) -> {"created": n, "skipped": n, "errors": [...], **other counters}
+# rows are (line number, csv dict) pairs. A processor may also carry a
+# `prepare(options)` context manager, entered once per import, that yields
+# chunk -> extra options; it runs before each chunk's transaction, for slow
+# work (password hashing) that shouldn't hold the chunk's locks.
+DEFAULT_IMPORT_PROCESSORS = {
+    "applications": "registrar.services.import_application_rows",
+    "admit": "registrar.services.import_admit_rows",
+    "users": "rbac.services.import_user_rows",
+}
+MAX_STORED_ERRORS = 1000
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def imports_in_background() -> bool:
+    """When on, uploads only queue an ImportJob; `process_import_jobs` runs it."""
+    return _setting("IMPORTS_IN_BACKGROUND", False)
+
+
+def get_processor(kind: str):
+    return import_string(_setting("IMPORT_PROCESSORS", DEFAULT_IMPORT_PROCESSORS)[kind])
+
+
+def row_hash(row: dict) -> str:
+    payload = json.dumps(row, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def enqueue_import(kind: str, upload, user=None, options=None) -> ImportJob:
+    """Store the upload and create a queued job; runs it inline unless imports_in_background()."""
+    job = ImportJob(kind=kind, options=options or {}, created_by=user if user and user.is_authenticated else None)
+    job.file.save(upload.name, upload, save=False)
+    job.save()
+    if not imports_in_background():
+        job.status = "running"
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+        run_job(job)
+    return job
+
+
+def _open_rows(job):
+    """(line number, row dict) for every data row, header being line 1."""
+    f = job.file.open("rb")
+    reader = csv.DictReader(TextIOWrapper(f, encoding="utf-8-sig", newline=""))
+    return f, ((line, {k: v for k, v in row.items() if k is not None}) for line, row in enumerate(reader, start=2))
+
+
+def claim_job(lease_seconds: int = 300):
+    """Claim the oldest queued job, or a running one whose worker's lease expired."""
+    now = timezone.now()
+    claimable = Q(status="queued") | Q(status="running", lease_until__lt=now)
+    with transaction.atomic():
+        job = ImportJob.objects.select_for_update(skip_locked=True).filter(claimable).order_by("id").first()
+        if job is None:
+            return None
+        job.status = "running"
+        job.started_at = job.started_at or now
+        job.lease_until = now + timedelta(seconds=lease_seconds)
+        job.save(update_fields=["status", "started_at", "lease_until"])
+    return job
+
+
+def _apply_chunk(job, expected_done, chunk, processor, lease_seconds, extra=None) -> bool:
+    """
+    Apply one chunk and record its progress in a single transaction, so a
+    crash either keeps the whole chunk or none of it. Rows whose hash is
+    already recorded for the job (file duplicates, replays) are skipped.
+    Returns False if another worker has taken the job over.
+    """
+    with transaction.atomic():
+        locked = ImportJob.objects.select_for_update().get(pk=job.pk)
+        if locked.status != "running" or locked.rows_done != expected_done:
+            return False
+
+        hashed = {}
+        for line, row in chunk:
+            hashed.setdefault(row_hash(row), (line, row))
+        seen = set(
+            ImportedRow.objects.filter(job=job, row_hash__in=list(hashed)).values_list("row_hash", flat=True)
+        )
+        fresh = {h: item for h, item in hashed.items() if h not in seen}
+        duplicates = len(chunk) - len(fresh)
+
+        options = {**job.options, **extra} if extra else job.options
+        result = dict(processor(list(fresh.values()), options)) if fresh else {}
+        ImportedRow.objects.bulk_create([ImportedRow(job=job, row_hash=h) for h in fresh])
+
+        job.rows_done = expected_done + len(chunk)
+        job.created += result.pop("created", 0)
+        job.skipped += result.pop("skipped", 0) + duplicates
+        room = MAX_STORED_ERRORS - len(job.errors)
+        job.errors.extend(result.pop("errors", [])[:max(room, 0)])
+        if duplicates:
+            result["duplicate_rows"] = duplicates
+        for key, value in result.items():
+            job.stats[key] = job.stats.get(key, 0) + value
+        job.lease_until = timezone.now() + timedelta(seconds=lease_seconds)
+        job.save(update_fields=["rows_done", "created", "skipped", "errors", "stats", "lease_until"])
+    return True
+
+
+def run_job(job, chunk_size: int = None, lease_seconds: int = 300) -> ImportJob:
+    """Process a claimed job from its last checkpoint to the end."""
+    chunk_size = chunk_size or _setting("IMPORT_CHUNK_SIZE", 500)
+    try:
+        processor = get_processor(job.kind)
+        if job.total_rows is None:
+            f, rows = _open_rows(job)
+            with f:
+                job.total_rows = sum(1 for _ in rows)
+            job.save(update_fields=["total_rows"])
+
+        prepare = getattr(processor, "prepare", None)
+        f, rows = _open_rows(job)
+        with f, (prepare(job.options) if prepare else nullcontext()) as prepare_chunk:
+            rows = islice(rows, job.rows_done, None)
+            while True:
+                chunk = list(islice(rows, chunk_size))
+                if not chunk:
+                    break
+                extra = prepare_chunk(chunk) if prepare_chunk else None
+                if not _apply_chunk(job, job.rows_done, chunk, processor, lease_seconds, extra):
+                    return job
+    except Exception as exc:
+        job.status = "failed"
+        job.errors.append(f"Import failed: {exc}")
+        job.finished_at = timezone.now()
+        job.lease_until = None
+        job.file.delete(save=False)  # a failed job is not retried; fix the file and upload it again
+        job.save(update_fields=["status", "errors", "finished_at", "lease_until", "file"])
+        return job
+
+    job.status = "done"
+    job.finished_at = timezone.now()
+    job.lease_until = None
+    job.save(update_fields=["status", "finished_at", "lease_until"])
+    # the upload may hold personal data or passwords; progress and errors are kept on the job
+    job.file.delete(save=True)
+    return job
+
+
+def discard_stale_jobs(max_age: int = None) -> int:
+    """
+    Fail jobs still queued IMPORT_QUEUED_MAX_AGE seconds after upload and
+    delete their files, so an upload nobody ran doesn't stay on disk.
+    Returns the number discarded.
+    """
+    max_age = max_age or _setting("IMPORT_QUEUED_MAX_AGE", 24 * 3600)
+    stale = ImportJob.objects.filter(status="queued", created_at__lt=timezone.now() - timedelta(seconds=max_age))
+    discarded = 0
+    for job in stale:
+        # conditional, so a job a worker has just claimed is left alone
+        if ImportJob.objects.filter(pk=job.pk, status="queued").update(
+            status="failed", finished_at=timezone.now(), file="",
+            errors=job.errors + ["Discarded: queued too long without being run; upload the file again."],
+        ):
+            job.file.delete(save=False)
+            discarded += 1
+    return discarded
+
+
+def process_import_jobs(chunk_size: int = None, lease_seconds: int = 300, max_jobs: int = None) -> int:
+    """
+    Discard stale queued jobs, then claim and run jobs until none are left
+    (or max_jobs). Returns the number processed.
+    """
+    discard_stale_jobs()
+    done = 0
+    while max_jobs is None or done < max_jobs:
+        job = claim_job(lease_seconds)
+        if job is None:
+            break
+        run_job(job, chunk_size=chunk_size, lease_seconds=lease_seconds)
+        done += 1
+    return done
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import ImportJob
+
+
+@receiver(post_delete, sender=ImportJob)
+def _delete_import_file(sender, instance, **kwargs):
+    # a discarded job's upload would otherwise stay on disk
+    if instance.file:
+        instance.file.delete(save=False)
@@ -0,0 +1,33 @@
+import os
+import uuid
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+
+
+def import_files_dir() -> str:
+    # never under MEDIA_ROOT: /media/ is served without a login check
+    return getattr(settings, "IMPORT_FILES_DIR", None) or os.path.join(settings.BASE_DIR, "var", "imports")
+
+
+@deconstructible(path="core.storage.ImportFileStorage")
+class ImportFileStorage(FileSystemStorage):
+    """Uploaded import CSVs (personal data, passwords): stored in IMPORT_FILES_DIR and never served."""
+
+    @property
+    def base_location(self):
+        return import_files_dir()
+
+    @property
+    def location(self):
+        return os.path.abspath(self.base_location)
+
+    def url(self, name):
+        raise ValueError("Import files are not served.")
+
+
+def import_upload_to(instance, filename) -> str:
+    """A random name: the original file name is not kept."""
+    return f"{timezone.now():%Y/%m}/{uuid.uuid4().hex}.csv"
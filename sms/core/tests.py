@@ -1,3 +1,149 @@
-from django.test import TestCase
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+import zipfile
+from decimal import Decimal
+from io import BytesIO
+from xml.etree import ElementTree
 
-# Create your tests here.
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.conf import settings
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from registrar.models import AdmissionApplication
+from .exports import iter_csv, iter_xlsx
+from .models import ImportedRow, ImportJob
+from .services_imports import claim_job, discard_stale_jobs, enqueue_import, process_import_jobs, run_job
+
+HEADER = "first_name,last_name,date_of_birth,guardian_name\n"
+FAILS = {"armed": False}
+
+
+def _upload(lines):
+    return SimpleUploadedFile("apps.csv", (HEADER + "\n".join(lines) + "\n").encode("utf-8"))
+
+
+def flaky_processor(numbered_rows, options):
+    """The applications processor, but exits like a killed worker on a row named Crash while FAILS is armed."""
+    from registrar.services import import_application_rows
+
+    if FAILS["armed"] and any(row["first_name"] == "Crash" for _, row in numbered_rows):
+        raise SystemExit("worker died")
+    return import_application_rows(numbered_rows, options)
+
+
+class ImportJobTests(TestCase):
+    def setUp(self):
+        self.files = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.files, ignore_errors=True)
+        override = override_settings(IMPORT_FILES_DIR=self.files, IMPORTS_IN_BACKGROUND=True)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def _lines(self, n):
+        return [f"Kid{i},Test,2015-01-01,Guardian{i}" for i in range(n)]
+
+    def test_worker_processes_in_chunks_and_removes_upload(self):
+        job = enqueue_import("applications", _upload(self._lines(5) + ["Bad,Row,not-a-date,G"]))
+        self.assertEqual(job.status, "queued")
+
+        self.assertEqual(process_import_jobs(chunk_size=2), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertEqual((job.total_rows, job.rows_done, job.created, job.skipped), (6, 6, 5, 1))
+        self.assertEqual(len(job.errors), 1)
+        self.assertFalse(job.file)
+        self.assertEqual(AdmissionApplication.objects.count(), 5)
+
+    def test_duplicate_rows_in_file_are_skipped(self):
+        job = enqueue_import("applications", _upload(self._lines(3) + self._lines(2)))
+        process_import_jobs(chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.created, job.skipped, job.stats["duplicate_rows"]), (3, 2, 2))
+        self.assertEqual(AdmissionApplication.objects.count(), 3)
+
+    @override_settings(IMPORT_PROCESSORS={"applications": "core.tests.flaky_processor"})
+    def test_restart_resumes_from_checkpoint_without_duplicates(self):
+        lines = self._lines(4) + ["Crash,Test,2015-01-01,G"] + self._lines(6)[4:]
+        job = enqueue_import("applications", _upload(lines))
+
+        FAILS["armed"] = True
+        self.addCleanup(FAILS.update, armed=False)
+        with self.assertRaises(SystemExit):
+            run_job(claim_job(), chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_done), ("running", 4))
+        self.assertEqual(AdmissionApplication.objects.count(), 4)
+
+        # even replayed from the first row, rows already applied are recognised by hash
+        FAILS["armed"] = False
+        ImportJob.objects.filter(pk=job.pk).update(lease_until=timezone.now() - timedelta(seconds=1), rows_done=0)
+        process_import_jobs(chunk_size=2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_done, job.created), ("done", 7, 7))
+        self.assertEqual(job.stats["duplicate_rows"], 4)
+        self.assertEqual(AdmissionApplication.objects.count(), 7)
+        self.assertEqual(ImportedRow.objects.filter(job=job).count(), 7)
+
+    def test_upload_is_private_and_removed_when_the_job_fails(self):
+        job = enqueue_import("applications", _upload(self._lines(2)))
+        path = job.file.path
+        self.assertTrue(path.startswith(os.path.realpath(self.files) + os.sep))
+        self.assertFalse(path.startswith(os.path.realpath(settings.MEDIA_ROOT)))
+        self.assertNotIn("apps", os.path.basename(path))
+        with self.assertRaises(ValueError):
+            job.file.url
+
+        with override_settings(IMPORT_PROCESSORS={"applications": "core.tests.missing_processor"}):
+            process_import_jobs()
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertFalse(job.file)
+        self.assertFalse(os.path.exists(path))
+
+    def test_stale_and_deleted_jobs_lose_their_upload(self):
+        stale = enqueue_import("applications", _upload(self._lines(2)))
+        fresh = enqueue_import("applications", _upload(self._lines(3)))
+        ImportJob.objects.filter(pk=stale.pk).update(created_at=timezone.now() - timedelta(days=2))
+        path = stale.file.path
+        self.assertEqual(discard_stale_jobs(), 1)
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.file.name), ("failed", ""))
+        self.assertFalse(os.path.exists(path))
+
+        path = fresh.file.path
+        fresh.delete()
+        self.assertFalse(os.path.exists(path))
+
+    def test_inline_mode_runs_during_upload(self):
+        with override_settings(IMPORTS_IN_BACKGROUND=False):
+            job = enqueue_import("applications", _upload(self._lines(3)))
+        self.assertEqual((job.status, job.created), ("done", 3))
+
+
+class ExportStreamTests(SimpleTestCase):
+    def test_csv_is_yielded_in_batches(self):
+        chunks = list(iter_csv(["n"], ([i] for i in range(5)), batch=2))
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("".join(chunks).split(), ["n", "0", "1", "2", "3", "4"])
+
+    def test_formulas_are_exported_as_text(self):
+        rows = [("=1+1", "-2", "@SUM(A1)", "\tx", "a=b", -3)]
+        self.assertEqual("".join(iter_csv(["a", "b", "c", "d", "e", "f"], rows)).splitlines()[1],
+                         "'=1+1,'-2,'@SUM(A1),'\tx,a=b,-3")
+        data = b"".join(iter_xlsx(["a"], [("+cmd",)]))
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            self.assertIn(b"'+cmd", archive.read("xl/worksheets/sheet1.xml"))
+
+    def test_xlsx_is_a_valid_package(self):
+        data = b"".join(iter_xlsx(["name", "score"], [("Ada & <Bo>", Decimal("12.50")), ("\x01x", None)], batch=1))
+        with zipfile.ZipFile(BytesIO(data)) as archive:
+            self.assertIn("[Content_Types].xml", archive.namelist())
+            sheet = ElementTree.fromstring(archive.read("xl/worksheets/sheet1.xml"))
+        ns = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+        rows = sheet.find(f"{ns}sheetData").findall(f"{ns}row")
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][0].find(f"{ns}is/{ns}t").text, "Ada & <Bo>")
+        self.assertEqual(rows[1][1].find(f"{ns}v").text, "12.50")
@@ -0,0 +1,9 @@
+from django.urls import path
+from .views import import_job_detail, import_job_status
+
+app_name = "core"
+
+urlpatterns = [
+    path("imports/<int:job_id>/", import_job_detail, name="import_job_detail"),
+    path("imports/<int:job_id>/status/", import_job_status, name="import_job_status"),
+]
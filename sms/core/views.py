@@ -1,3 +1,43 @@
-from django.shortcuts import render
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, redirect, render
 
-# Create your views here.
+from .models import ImportJob
+
+
+def _can_view_job(user, job):
+    return job.created_by_id == user.id or user.is_superuser or user.is_principal or user.is_school_admin
+
+
+def _job_status(job):
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "status": job.status,
+        "total_rows": job.total_rows,
+        "rows_done": job.rows_done,
+        "percent": job.percent,
+        "created": job.created,
+        "skipped": job.skipped,
+        "stats": job.stats,
+        "error_count": len(job.errors),
+        "finished": job.status in ("done", "failed"),
+    }
+
+
+@login_required
+def import_job_detail(request, job_id: int):
+    job = get_object_or_404(ImportJob, id=job_id)
+    if not _can_view_job(request.user, job):
+        messages.error(request, "Not allowed.")
+        return redirect("accounts:dashboard")
+    return render(request, "core/import_job.html", {"job": job, "status": _job_status(job)})
+
+
+@login_required
+def import_job_status(request, job_id: int):
+    job = get_object_or_404(ImportJob, id=job_id)
+    if not _can_view_job(request.user, job):
+        return JsonResponse({"error": "Not allowed."}, status=403)
+    return JsonResponse(_job_status(job))
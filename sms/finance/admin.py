@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.utils import timezone
-from .models import FeeStructure, FeeInvoice, Payment, PaymentProof
+from .models import FeeStructure, FeeInvoice, Payment, PaymentProof, LedgerEntry
 
 class PaymentInline(admin.TabularInline):
     model = Payment
@@ -44,3 +44,19 @@ class PaymentProofAdmin(admin.ModelAdmin):
             inv.status = "paid"
             inv.save(update_fields=["status"])
     mark_verified.short_description = "Mark selected proofs verified (and invoice paid)"
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("student", "kind", "amount", "balance_after", "invoice_id", "payment_id", "created_at")
+    list_filter = ("kind",)
+    search_fields = ("student__student_id", "student__last_name")
+
+    # append-only: written by finance.services_ledger
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+from finance.services_ledger import audit_ledger, rebuild_ledger
+
+class Command(BaseCommand):
+    help = (
+        "Check the fee ledger and the cached student/invoice balances against FeeInvoice and Payment. "
+        "Exits non-zero on any mismatch; --fix rebuilds the ledger from the source tables instead."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fix", action="store_true", help="Rebuild the ledger when the audit fails.")
+        parser.add_argument("--limit", type=int, default=20, help="Mismatches to print per check.")
+
+    def handle(self, *args, **options):
+        problems = audit_ledger()
+        failed = 0
+        for check, rows in problems.items():
+            failed += len(rows)
+            if not rows:
+                continue
+            self.stdout.write(self.style.WARNING(f"{check}: {len(rows)} mismatch(es)"))
+            for pk, expected, found in rows[: options["limit"]]:
+                self.stdout.write(f"  #{pk}: expected {expected}, found {found}")
+
+        if not failed:
+            self.stdout.write(self.style.SUCCESS("Fee ledger matches invoices and payments."))
+            return
+        if not options["fix"]:
+            raise CommandError(f"Fee ledger audit failed with {failed} mismatch(es); rerun with --fix to rebuild.")
+        written = rebuild_ledger()
+        self.stdout.write(self.style.SUCCESS(f"Fee ledger rebuilt: {written} entries."))
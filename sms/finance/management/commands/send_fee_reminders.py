@@ -1,47 +1,102 @@
 from django.core.management.base import BaseCommand
 from django.utils import timezone
 from finance.models import FeeInvoice
-from comms.services import send_sms, send_email
+from comms.models import NotificationLog
+from comms.services_outbox import queue_notifications
+
+REMINDER_SUBJECT = "School Fees Reminder"
+
+
+def reminder_reference(invoice_id) -> str:
+    return f"fee_reminder:invoice:{invoice_id}"
+
 
 class Command(BaseCommand):
-    help = "Send fee reminders (MVP: logs + prints via ConsoleNotificationProvider)."
+    help = (
+        "Send fee reminders for overdue invoices. Streams invoices in keyset-paginated chunks, "
+        "skips invoices already reminded within --window-days and queues each chunk in one bulk insert."
+    )
 
     def add_arguments(self, parser):
         parser.add_argument("--days-overdue", type=int, default=15)
+        parser.add_argument("--window-days", type=int, default=1, help="Skip invoices reminded within this many days.")
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=None, help="Send concurrency when not in outbox mode.")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be sent without writing anything.")
 
     def handle(self, *args, **options):
         days = options["days_overdue"]
+        chunk_size = options["chunk_size"]
+        dry_run = options["dry_run"]
+        verbose = options["verbosity"] > 1
+
         cutoff = timezone.now().date() - timezone.timedelta(days=days)
+        window_start = timezone.now() - timezone.timedelta(days=options["window_days"])
 
-        invoices = FeeInvoice.objects.filter(
+        base = FeeInvoice.objects.filter(
             status__in=["unpaid", "partial"],
             due_date__lte=cutoff,
-        ).select_related("parent_user", "student")
+        ).select_related(
+            "student", "parent_user", "parent_user__parent_profile", "parent_user__notif_pref"
+        ).order_by("id")
+
+        queued = skipped = 0
+        last_id = 0
+        while True:
+            chunk = list(base.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+            last_id = chunk[-1].id
 
-        if not invoices.exists():
+            already = set(
+                NotificationLog.objects.filter(
+                    reference__in=[reminder_reference(inv.id) for inv in chunk],
+                    created_at__gte=window_start,
+                    status__in=["queued", "sending", "sent"],
+                ).values_list("reference", flat=True)
+            )
+
+            logs = []
+            for inv in chunk:
+                ref = reminder_reference(inv.id)
+                if ref in already:
+                    skipped += 1
+                    continue
+                logs.append(self._build_log(inv, ref))
+                if verbose:
+                    self.stdout.write(f"Reminder {'would be ' if dry_run else ''}queued for invoice {inv.id}")
+
+            if logs and not dry_run:
+                queue_notifications(logs, concurrency=options["workers"])
+            queued += len(logs)
+
+        if not queued and not skipped:
             self.stdout.write("No reminders to send.")
             return
 
-        for inv in invoices:
-            parent = inv.parent_user
-            student = inv.student
+        verb = "Would queue" if dry_run else "Queued"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {queued} reminders; skipped {skipped} already reminded in the last {options['window_days']} day(s)."
+        ))
 
-            msg = (
-                f"School Fees Reminder: {student.first_name} {student.last_name} "
-                f"(ID {student.student_id}) outstanding invoice #{inv.id}. "
-                f"Amount {inv.total_amount}. Due {inv.due_date}."
-            )
+    def _build_log(self, inv, ref) -> NotificationLog:
+        parent = inv.parent_user
+        student = inv.student
 
-            email = getattr(parent, "email", "") if parent else ""
-            phone = ""
-            if parent and hasattr(parent, "parent_profile"):
-                phone = parent.parent_profile.phone or ""
+        msg = (
+            f"School Fees Reminder: {student.first_name} {student.last_name} "
+            f"(ID {student.student_id}) outstanding invoice #{inv.id}. "
+            f"Amount {inv.total_amount}. Due {inv.due_date}."
+        )
 
-            if email:
-                send_email(to=email, subject="School Fees Reminder", body=msg)
-            elif phone:
-                send_sms(to=phone, body=msg)
-            else:
-                send_sms(to="UNKNOWN_PHONE", body=msg)
+        email = getattr(parent, "email", "") if parent else ""
+        phone = ""
+        if parent and hasattr(parent, "parent_profile"):
+            phone = parent.parent_profile.phone or ""
+        pref = getattr(parent, "notif_pref", None) if parent else None
+        if pref is not None and not pref.enable_email:
+            email = ""
 
-            self.stdout.write(f"Reminder queued for invoice {inv.id}")
+        if email:
+            return NotificationLog(channel="email", to=email, subject=REMINDER_SUBJECT, body=msg, reference=ref)
+        return NotificationLog(channel="sms", to=phone or "UNKNOWN_PHONE", body=msg, reference=ref)
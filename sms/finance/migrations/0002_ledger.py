@@ -0,0 +1,93 @@
+# Generated by Django 6.0 on 2026-10-18 18:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def populate_ledger(apps, schema_editor):
+    FeeInvoice = apps.get_model("finance", "FeeInvoice")
+    Payment = apps.get_model("finance", "Payment")
+    LedgerEntry = apps.get_model("finance", "LedgerEntry")
+    StudentBalance = apps.get_model("finance", "StudentBalance")
+    InvoiceBalance = apps.get_model("finance", "InvoiceBalance")
+
+    events = [
+        ((s, d, 0, pk), s, pk, None, Decimal(str(total)))
+        for pk, s, d, total in FeeInvoice.objects.values_list("id", "student_id", "issue_date", "total_amount")
+    ]
+    events += [
+        ((s, at.date(), 1, pk), s, inv, pk, -Decimal(str(amount)))
+        for pk, inv, s, at, amount in Payment.objects.values_list("id", "invoice_id", "invoice__student_id", "payment_date", "amount")
+    ]
+    events.sort(key=lambda e: e[0])
+
+    entries, students, invoices = [], {}, {}
+    for _, student_id, invoice_id, payment_id, amount in events:
+        for row in (
+            students.setdefault(student_id, StudentBalance(student_id=student_id, invoiced=0, paid=0, balance=0)),
+            invoices.setdefault(invoice_id, InvoiceBalance(invoice_id=invoice_id, invoiced=0, paid=0, balance=0)),
+        ):
+            if payment_id is None:
+                row.invoiced += amount
+            else:
+                row.paid -= amount
+            row.balance += amount
+        entries.append(LedgerEntry(
+            student_id=student_id, invoice_id=invoice_id, payment_id=payment_id,
+            kind="invoice" if payment_id is None else "payment",
+            amount=amount, balance_after=students[student_id].balance,
+        ))
+    LedgerEntry.objects.bulk_create(entries, batch_size=500)
+    StudentBalance.objects.bulk_create(students.values(), batch_size=500)
+    InvoiceBalance.objects.bulk_create(invoices.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finance', '0001_initial'),
+        ('people', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InvoiceBalance',
+            fields=[
+                ('invoice', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ledger_balance', serialize=False, to='finance.feeinvoice')),
+                ('invoiced', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='StudentBalance',
+            fields=[
+                ('student', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fee_balance', serialize=False, to='people.student')),
+                ('invoiced', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('paid', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('invoice', 'Invoice'), ('payment', 'Payment'), ('adjustment', 'Adjustment'), ('reversal', 'Reversal')], max_length=20)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('balance_after', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('invoice', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='finance.feeinvoice')),
+                ('payment', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='ledger_entries', to='finance.payment')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entries', to='people.student')),
+            ],
+            options={
+                'ordering': ['student_id', 'id'],
+            },
+        ),
+        migrations.RunPython(populate_ledger, migrations.RunPython.noop),
+    ]
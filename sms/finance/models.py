@@ -48,3 +48,58 @@ class PaymentProof(models.Model):
     note = models.CharField(max_length=255, blank=True)
     verified = models.BooleanField(default=False)
     verified_at = models.DateTimeField(null=True, blank=True)
+
+
+class LedgerEntry(models.Model):
+    """
+    Append-only fee ledger: one "invoice" entry per FeeInvoice and one
+    "payment" entry per Payment, plus adjustment/reversal entries when those
+    rows are edited or deleted. Amounts are signed (charges positive,
+    payments negative); balance_after is the student's running balance.
+    The invoice/payment links are kept without a database constraint so the
+    history survives deletes.
+    """
+    KINDS = [
+        ("invoice", "Invoice"),
+        ("payment", "Payment"),
+        ("adjustment", "Adjustment"),
+        ("reversal", "Reversal"),
+    ]
+
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name="ledger_entries")
+    invoice = models.ForeignKey(
+        FeeInvoice, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name="ledger_entries",
+    )
+    payment = models.ForeignKey(
+        Payment, on_delete=models.DO_NOTHING, db_constraint=False,
+        null=True, blank=True, related_name="ledger_entries",
+    )
+    kind = models.CharField(max_length=20, choices=KINDS)
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["student_id", "id"]
+
+    def __str__(self):
+        return f"{self.kind} {self.amount} ({self.student_id})"
+
+
+class StudentBalance(models.Model):
+    """Running ledger totals per student, kept in step with LedgerEntry."""
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name="fee_balance")
+    invoiced = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+
+class InvoiceBalance(models.Model):
+    """Running ledger totals per invoice, kept in step with LedgerEntry."""
+    invoice = models.OneToOneField(FeeInvoice, on_delete=models.CASCADE, primary_key=True, related_name="ledger_balance")
+    invoiced = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    paid = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
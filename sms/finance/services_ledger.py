@@ -0,0 +1,240 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Sum
+
+from .models import FeeInvoice, InvoiceBalance, LedgerEntry, Payment, StudentBalance
+
+ZERO = Decimal("0.00")
+
+
+def _money(value) -> Decimal:
+    return Decimal(str(value or 0)).quantize(ZERO)
+
+
+def _apply(row, amount: Decimal, is_payment: bool) -> None:
+    if is_payment:
+        row.paid -= amount
+    else:
+        row.invoiced += amount
+    row.balance += amount
+
+
+def _locked_student_balance(student_id):
+    try:
+        return StudentBalance.objects.select_for_update().get(student_id=student_id)
+    except StudentBalance.DoesNotExist:
+        StudentBalance.objects.get_or_create(student_id=student_id)
+        return StudentBalance.objects.select_for_update().get(student_id=student_id)
+
+
+def _locked_invoice_balance(invoice_id, create=True):
+    # None once the invoice is gone (its balance row cascades with it); deletes
+    # don't create, the invoice may be mid-cascade with its row already removed
+    try:
+        return InvoiceBalance.objects.select_for_update().get(invoice_id=invoice_id)
+    except InvoiceBalance.DoesNotExist:
+        if not create or not FeeInvoice.objects.filter(pk=invoice_id).exists():
+            return None
+        InvoiceBalance.objects.get_or_create(invoice_id=invoice_id)
+        return InvoiceBalance.objects.select_for_update().get(invoice_id=invoice_id)
+
+
+def _post(student_id, amount, kind, invoice_balance, invoice_id, payment_id=None) -> LedgerEntry:
+    is_payment = payment_id is not None
+    balance = _locked_student_balance(student_id)
+    _apply(balance, amount, is_payment)
+    balance.save()
+    if invoice_balance is not None:
+        _apply(invoice_balance, amount, is_payment)
+        invoice_balance.save()
+    return LedgerEntry.objects.create(
+        student_id=student_id, invoice_id=invoice_id, payment_id=payment_id,
+        kind=kind, amount=amount, balance_after=balance.balance,
+    )
+
+
+def _sync(entries, student_id, target, kind, invoice_id, payment_id=None) -> None:
+    """
+    Post whatever entries bring the ledger for one invoice or payment to
+    target (signed) for student_id on invoice_id: reversals for any other
+    student or invoice it was booked against, then the difference for this
+    one. student_id None reverses everything (the source row was deleted).
+    """
+    with transaction.atomic():
+        posted = {
+            (s, i): amount
+            for s, i, amount in entries.values_list("student_id", "invoice_id").annotate(s=Sum("amount")).order_by()
+        }
+        # the invoice balance rows serialise writers for an invoice and its payments;
+        # locked in id order so two payments moving in opposite directions can't deadlock
+        invoice_balances = {
+            i: _locked_invoice_balance(i, create=student_id is not None and i == invoice_id)
+            for i in sorted({i for _, i in posted} | {invoice_id}, key=lambda i: (i is None, i or 0))
+        }
+        for (other, other_invoice), amount in posted.items():
+            if (other, other_invoice) != (student_id, invoice_id) and amount:
+                _post(other, -amount, "reversal", invoice_balances[other_invoice], other_invoice, payment_id)
+        if student_id is None:
+            return
+        current = posted.get((student_id, invoice_id))
+        diff = target - (current or ZERO)
+        if diff:
+            _post(student_id, diff, "adjustment" if current is not None else kind, invoice_balances[invoice_id], invoice_id, payment_id)
+
+
+def record_invoice(invoice) -> None:
+    """
+    Book a created or edited FeeInvoice (charge = total_amount). Moving an
+    invoice to another student moves its payments with it.
+    """
+    with transaction.atomic():
+        _sync(
+            LedgerEntry.objects.filter(invoice_id=invoice.pk, payment_id=None),
+            invoice.student_id, _money(invoice.total_amount), "invoice", invoice.pk,
+        )
+        moved = LedgerEntry.objects.filter(invoice_id=invoice.pk, payment_id__isnull=False)\
+            .exclude(student_id=invoice.student_id).values_list("payment_id", flat=True)
+        for payment in Payment.objects.filter(pk__in=set(moved)):
+            record_payment(payment)
+
+
+def record_payment(payment) -> None:
+    """Book a created or edited Payment (credit = -amount)."""
+    student_id = FeeInvoice.objects.filter(pk=payment.invoice_id).values_list("student_id", flat=True).first()
+    _sync(
+        LedgerEntry.objects.filter(payment_id=payment.pk),
+        student_id, -_money(payment.amount), "payment", payment.invoice_id, payment.pk,
+    )
+
+
+def reverse_invoice(invoice_id) -> None:
+    _sync(LedgerEntry.objects.filter(invoice_id=invoice_id, payment_id=None), None, ZERO, "reversal", invoice_id)
+
+
+def reverse_payment(payment_id, invoice_id) -> None:
+    _sync(LedgerEntry.objects.filter(payment_id=payment_id), None, ZERO, "reversal", invoice_id, payment_id)
+
+
+def student_balances(student_ids) -> dict:
+    """{student id: StudentBalance}; students with nothing booked are absent."""
+    return StudentBalance.objects.in_bulk(list(student_ids))
+
+
+def student_balance(student_id) -> StudentBalance:
+    """One indexed read; an unsaved zero balance if the student has no entries."""
+    return StudentBalance.objects.filter(student_id=student_id).first() or StudentBalance(student_id=student_id)
+
+
+def invoice_balance(invoice) -> InvoiceBalance:
+    row = InvoiceBalance.objects.filter(invoice_id=invoice.pk).first()
+    if row is None:
+        amount = _money(invoice.total_amount)
+        row = InvoiceBalance(invoice_id=invoice.pk, invoiced=amount, balance=amount)
+    return row
+
+
+def _source_events():
+    """Every invoice and payment as (sort key, student, invoice, payment, signed amount)."""
+    events = [
+        ((student_id, issue_date, 0, pk), student_id, pk, None, _money(total))
+        for pk, student_id, issue_date, total in FeeInvoice.objects.values_list("id", "student_id", "issue_date", "total_amount")
+    ]
+    events += [
+        ((student_id, paid_at.date(), 1, pk), student_id, invoice_id, pk, -_money(amount))
+        for pk, invoice_id, student_id, paid_at, amount in Payment.objects.values_list(
+            "id", "invoice_id", "invoice__student_id", "payment_date", "amount"
+        )
+    ]
+    events.sort(key=lambda e: e[0])
+    return events
+
+
+@transaction.atomic
+def rebuild_ledger() -> int:
+    """
+    Replace the ledger and both balance tables with one entry per current
+    invoice and payment, in date order per student. Returns entries written.
+    """
+    entries, students, invoices = [], {}, {}
+    for _, student_id, invoice_id, payment_id, amount in _source_events():
+        is_payment = payment_id is not None
+        sb = students.setdefault(student_id, StudentBalance(student_id=student_id))
+        ib = invoices.setdefault(invoice_id, InvoiceBalance(invoice_id=invoice_id))
+        _apply(sb, amount, is_payment)
+        _apply(ib, amount, is_payment)
+        entries.append(LedgerEntry(
+            student_id=student_id, invoice_id=invoice_id, payment_id=payment_id,
+            kind="payment" if is_payment else "invoice", amount=amount, balance_after=sb.balance,
+        ))
+    LedgerEntry.objects.all().delete()
+    StudentBalance.objects.all().delete()
+    InvoiceBalance.objects.all().delete()
+    LedgerEntry.objects.bulk_create(entries, batch_size=500)
+    StudentBalance.objects.bulk_create(students.values(), batch_size=500)
+    InvoiceBalance.objects.bulk_create(invoices.values(), batch_size=500)
+    return len(entries)
+
+
+def audit_ledger() -> dict:
+    """
+    Compare the ledger with the source tables in a handful of grouped
+    queries. Returns {check: [(id, expected, found), ...]} with an empty
+    list for each check that passed:
+      invoices/payments - net booked amount per source row (and student)
+      students          - StudentBalance against the sum of its entries
+      invoice_balances  - InvoiceBalance against the invoice and its payments
+    """
+    booked_invoices, booked_payments = defaultdict(dict), defaultdict(dict)
+    by_student = defaultdict(lambda: [ZERO, ZERO])
+    rows = LedgerEntry.objects.values_list("student_id", "invoice_id", "payment_id").annotate(s=Sum("amount")).order_by()
+    for student_id, invoice_id, payment_id, amount in rows:
+        if payment_id is None:
+            booked_invoices[invoice_id][student_id] = booked_invoices[invoice_id].get(student_id, ZERO) + amount
+            by_student[student_id][0] += amount
+        else:
+            booked_payments[payment_id][student_id] = booked_payments[payment_id].get(student_id, ZERO) + amount
+            by_student[student_id][1] -= amount
+
+    def compare(expected, booked):
+        problems = []
+        for pk in expected.keys() | booked.keys():
+            want = expected.get(pk, {})
+            got = {s: a for s, a in booked.get(pk, {}).items() if a}
+            if want != got:
+                problems.append((pk, want, got))
+        return sorted(problems, key=lambda p: p[0])
+
+    paid_per_invoice = defaultdict(lambda: ZERO)
+    expected_invoices = {}
+    for pk, student_id, total in FeeInvoice.objects.values_list("id", "student_id", "total_amount"):
+        expected_invoices[pk] = {student_id: _money(total)} if total else {}
+    expected_payments = {}
+    for pk, invoice_id, student_id, amount in Payment.objects.values_list("id", "invoice_id", "invoice__student_id", "amount"):
+        expected_payments[pk] = {student_id: -_money(amount)} if amount else {}
+        paid_per_invoice[invoice_id] += _money(amount)
+
+    students = []
+    balances = {b.student_id: b for b in StudentBalance.objects.all()}
+    for student_id in balances.keys() | by_student.keys():
+        invoiced, paid = by_student.get(student_id, (ZERO, ZERO))
+        b = balances.get(student_id) or StudentBalance(student_id=student_id)
+        if (b.invoiced, b.paid, b.balance) != (invoiced, paid, invoiced - paid):
+            students.append((student_id, (invoiced, paid, invoiced - paid), (b.invoiced, b.paid, b.balance)))
+
+    invoice_balances = []
+    stored = {b.invoice_id: b for b in InvoiceBalance.objects.all()}
+    for pk, want in expected_invoices.items():
+        invoiced = sum(want.values(), ZERO)
+        paid = paid_per_invoice[pk]
+        b = stored.get(pk) or InvoiceBalance(invoice_id=pk)
+        if (b.invoiced, b.paid, b.balance) != (invoiced, paid, invoiced - paid):
+            invoice_balances.append((pk, (invoiced, paid, invoiced - paid), (b.invoiced, b.paid, b.balance)))
+
+    return {
+        "invoices": compare(expected_invoices, booked_invoices),
+        "payments": compare(expected_payments, booked_payments),
+        "students": sorted(students),
+        "invoice_balances": sorted(invoice_balances),
+    }
@@ -0,0 +1,41 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from people.models import Student
+from .models import FeeInvoice, Payment
+from .services_ledger import record_invoice, record_payment, reverse_invoice, reverse_payment
+
+INVOICE_FIELDS = {"student", "student_id", "total_amount"}
+PAYMENT_FIELDS = {"invoice", "invoice_id", "amount"}
+
+
+def _student_cascade(origin) -> bool:
+    # the student's ledger and balances cascade away with it
+    return isinstance(origin, Student) or getattr(origin, "model", None) is Student
+
+
+@receiver(post_save, sender=FeeInvoice)
+def _book_invoice(sender, instance, update_fields=None, **kwargs):
+    # status-only saves (verification, reminders) can't move the balance
+    if update_fields is not None and not INVOICE_FIELDS & set(update_fields):
+        return
+    record_invoice(instance)
+
+
+@receiver(post_save, sender=Payment)
+def _book_payment(sender, instance, update_fields=None, **kwargs):
+    if update_fields is not None and not PAYMENT_FIELDS & set(update_fields):
+        return
+    record_payment(instance)
+
+
+@receiver(post_delete, sender=FeeInvoice)
+def _reverse_invoice(sender, instance, origin=None, **kwargs):
+    if not _student_cascade(origin):
+        reverse_invoice(instance.pk)
+
+
+@receiver(post_delete, sender=Payment)
+def _reverse_payment(sender, instance, origin=None, **kwargs):
+    if not _student_cascade(origin):
+        reverse_payment(instance.pk, instance.invoice_id)
@@ -1,3 +1,125 @@
-from django.test import TestCase
+from datetime import date, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from accounts.models import User
+from comms.models import NotificationLog
+from people.models import ParentProfile, Student
+from .models import FeeInvoice, FeeStructure, LedgerEntry, Payment, StudentBalance
+from .services_ledger import audit_ledger, invoice_balance, student_balance
+
+
+@override_settings(NOTIFICATION_OUTBOX=True)
+class FeeReminderCommandTests(TestCase):
+    def setUp(self):
+        fs = FeeStructure.objects.create(name="Term 1", amount=100)
+        parent = User.objects.create_user(username="p", email="p@example.com", is_parent=True)
+        sms_parent = User.objects.create_user(username="q", is_parent=True)
+        ParentProfile.objects.create(user=sms_parent, phone="+263771000000")
+        overdue = date.today() - timedelta(days=30)
+        for i in range(5):
+            student = Student.objects.create(
+                student_id=f"S{i}", first_name="Kid", last_name=str(i),
+                date_of_birth=date(2015, 1, 1), admission_date=date(2024, 1, 1),
+            )
+            FeeInvoice.objects.create(
+                student=student, parent_user=parent if i % 2 else sms_parent, fee_structure=fs,
+                due_date=overdue, total_amount=100,
+            )
+
+    def _run(self, **kwargs):
+        out = StringIO()
+        call_command("send_fee_reminders", chunk_size=2, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_dry_run_writes_nothing(self):
+        self.assertIn("Would queue 5", self._run(dry_run=True))
+        self.assertEqual(NotificationLog.objects.count(), 0)
+
+    def test_rerun_same_day_is_idempotent(self):
+        self._run()
+        self.assertEqual(NotificationLog.objects.filter(channel="email").count(), 2)
+        self.assertEqual(NotificationLog.objects.filter(channel="sms", to="+263771000000").count(), 3)
+
+        self.assertIn("Queued 0 reminders; skipped 5", self._run())
+        self.assertEqual(NotificationLog.objects.count(), 5)
+
+
+class FeeLedgerTests(TestCase):
+    def setUp(self):
+        self.fs = FeeStructure.objects.create(name="Term 1", amount=100)
+        self.ada, self.bo = (
+            Student.objects.create(
+                student_id=sid, first_name=sid, last_name="Moyo",
+                date_of_birth=date(2015, 1, 1), admission_date=date(2024, 1, 1),
+            )
+            for sid in ("A1", "B1")
+        )
+        self.invoice = FeeInvoice.objects.create(student=self.ada, fee_structure=self.fs, due_date=date.today(), total_amount=100)
+
+    def _balance(self, student):
+        b = student_balance(student.id)
+        return b.invoiced, b.paid, b.balance
+
+    def assertClean(self):
+        self.assertEqual(audit_ledger(), {"invoices": [], "payments": [], "students": [], "invoice_balances": []})
+
+    def test_running_balances_follow_writes(self):
+        Payment.objects.create(invoice=self.invoice, amount=30)
+        payment = Payment.objects.create(invoice=self.invoice, amount=20)
+        self.assertEqual(list(LedgerEntry.objects.values_list("kind", "balance_after")), [
+            ("invoice", 100), ("payment", 70), ("payment", 50),
+        ])
+        self.assertEqual(self._balance(self.ada), (100, 50, 50))
+
+        payment.amount = 25
+        payment.save()
+        self.invoice.total_amount = 120
+        self.invoice.save()
+        self.assertEqual(self._balance(self.ada), (120, 55, 65))
+        payment.delete()
+        self.assertEqual(self._balance(self.ada), (120, 30, 90))
+        ib = invoice_balance(self.invoice)
+        self.assertEqual((ib.paid, ib.balance), (30, 90))
+        self.assertClean()
+
+    def test_reassigned_and_deleted_invoices_are_reversed(self):
+        Payment.objects.create(invoice=self.invoice, amount=40)
+        self.invoice.student = self.bo
+        self.invoice.save()
+        self.assertEqual(self._balance(self.ada), (0, 0, 0))
+        self.assertEqual(self._balance(self.bo), (100, 40, 60))
+        self.invoice.delete()
+        self.assertEqual(self._balance(self.bo), (0, 0, 0))
+        self.assertClean()
+
+        self.bo.delete()
+        self.assertClean()
+
+    def test_payment_moved_between_invoices_of_a_student(self):
+        second = FeeInvoice.objects.create(student=self.ada, fee_structure=self.fs, due_date=date.today(), total_amount=100)
+        payment = Payment.objects.create(invoice=self.invoice, amount=40)
+        payment.invoice = second
+        payment.save()
+        self.assertEqual((invoice_balance(self.invoice).paid, invoice_balance(second).paid), (0, 40))
+        self.assertEqual(self._balance(self.ada), (200, 40, 160))
+        self.assertEqual(list(LedgerEntry.objects.filter(payment=payment).values_list("invoice_id", "kind", "amount")), [
+            (self.invoice.id, "payment", -40), (self.invoice.id, "reversal", 40), (second.id, "payment", -40),
+        ])
+        self.assertClean()
+
+    def test_balance_read_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(student_balance(self.ada.id).balance, 100)
+
+    def test_audit_command_reports_and_fixes_drift(self):
+        StudentBalance.objects.filter(student=self.ada).update(balance=5)
+        with self.assertRaises(CommandError):
+            call_command("audit_fee_ledger", stdout=StringIO())
+        out = StringIO()
+        call_command("audit_fee_ledger", fix=True, stdout=out)
+        self.assertIn("rebuilt: 1 entries", out.getvalue())
+        self.assertEqual(self._balance(self.ada), (100, 0, 100))
+        self.assertClean()
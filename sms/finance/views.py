@@ -1,5 +1,6 @@
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db import transaction
 from django.db.models import Sum
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
@@ -9,6 +10,7 @@ from people.models import Student
 from accounts.models import User
 from .forms import UploadPOPForm, CreateInvoiceForm
 from .models import FeeInvoice, Payment, PaymentProof, FeeStructure
+from .services_ledger import invoice_balance
 
 
 def _is_staffish(u):
@@ -61,8 +63,9 @@ def invoice_detail(request, invoice_id: int):
     proofs = invoice.proofs.order_by("-uploaded_at")
     payments = invoice.payments.order_by("-payment_date")
 
-    paid_sum = payments.aggregate(s=Sum("amount"))["s"] or 0
-    remaining = max(invoice.total_amount - paid_sum, 0)
+    ledger = invoice_balance(invoice)
+    paid_sum = ledger.paid
+    remaining = max(ledger.balance, 0)
 
     return render(
         request,
@@ -169,15 +172,17 @@ def create_invoice(request):
         if parent_username:
             parent_user = get_object_or_404(User, username=parent_username)
 
-        inv = FeeInvoice.objects.create(
-            student=student,
-            parent_user=parent_user,
-            fee_structure=fee_structure,
-            issue_date=timezone.now().date(),
-            due_date=due_date,
-            total_amount=total_amount,
-            status="unpaid",
-        )
+        # the ledger entry is posted by a post_save signal; keep both in one transaction
+        with transaction.atomic():
+            inv = FeeInvoice.objects.create(
+                student=student,
+                parent_user=parent_user,
+                fee_structure=fee_structure,
+                issue_date=timezone.now().date(),
+                due_date=due_date,
+                total_amount=total_amount,
+                status="unpaid",
+            )
 
         messages.success(request, f"Invoice #{inv.id} created.")
         return redirect("finance:invoice_detail", invoice_id=inv.id)
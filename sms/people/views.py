@@ -4,7 +4,7 @@ from django.core.exceptions import PermissionDenied
 from datetime import timedelta
 from decimal import Decimal
 
-from django.db.models import Count, Max, Q, Sum
+from django.db.models import Count, F, Q
 from django.shortcuts import get_object_or_404, redirect, render
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
@@ -13,7 +13,8 @@ from rbac.utils import require_any_perm
 
 from .forms import ClassRoomForm, LinkStudentForm, StudentForm
 from .models import ClassRoom, Student
-from academics.models import AttendanceRecord, Enrollment
+from academics.models import Enrollment
+from academics.services_rollups import student_attendance_totals
 from core.models import AcademicYear, SchoolSettings
 from finance.models import FeeInvoice
 
@@ -103,21 +104,11 @@ def students_dashboard(request):
             if enr.student_id not in enrollment_map:
                 enrollment_map[enr.student_id] = enr
 
-        since = timezone.localdate() - timedelta(days=30)
-        attendance_rows = AttendanceRecord.objects.filter(
-            student_id__in=student_ids,
-            date__gte=since,
-        ).values("student_id").annotate(
-            present=Count("id", filter=Q(status="present")),
-            late=Count("id", filter=Q(status="late")),
-            absent=Count("id", filter=Q(status="absent")),
-            total=Count("id"),
-            last_date=Max("date"),
-        )
-        attendance_map = {row["student_id"]: row for row in attendance_rows}
+        today = timezone.localdate()
+        attendance_map = student_attendance_totals(student_ids, today - timedelta(days=30), today)
 
         invoices = FeeInvoice.objects.filter(student_id__in=student_ids).annotate(
-            paid=Sum("payments__amount"),
+            paid=F("ledger_balance__paid"),
         ).order_by("student_id", "-due_date", "-issue_date", "-id")
         for inv in invoices:
             if inv.student_id in fee_map:
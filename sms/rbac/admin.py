@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Role, Permission, UserRole
+from .models import Role, Permission, UserRole, UserPermission
 
 @admin.register(Permission)
 class PermissionAdmin(admin.ModelAdmin):
@@ -16,3 +16,8 @@ class RoleAdmin(admin.ModelAdmin):
 class UserRoleAdmin(admin.ModelAdmin):
     list_display = ("user", "role")
     search_fields = ("user__username", "role__name")
+
+@admin.register(UserPermission)
+class UserPermissionAdmin(admin.ModelAdmin):
+    list_display = ("user", "code")
+    search_fields = ("user__username", "code")
@@ -0,0 +1,57 @@
+ROLE_PRINCIPAL = "Principal"
+ROLE_ADMIN = "School Admin"
+ROLE_TEACHER = "Teacher"
+ROLE_PARENT = "Parent"
+
+# Role labels accepted in uploads (lower-cased) -> role name.
+ROLE_CANONICAL = {
+    "principal": ROLE_PRINCIPAL,
+    "school admin": ROLE_ADMIN,
+    "admin": ROLE_ADMIN,
+    "teacher": ROLE_TEACHER,
+    "parent": ROLE_PARENT,
+}
+
+# Default Django permission codes ("app_label.codename") per built-in role.
+# Roles named here may be auto-created (e.g. by bulk user upload).
+ROLE_PERMISSIONS = {
+    ROLE_PRINCIPAL: [
+        "people.view_student",
+        "people.add_student",
+        "people.change_student",
+        "people.delete_student",
+        "academics.view_classgroup",
+        "academics.view_grade",
+        "finance.view_feeinvoice",
+        "registrar.view_admissionapplication",
+        "rbac.view_role",
+        "auth.view_group",
+    ],
+    ROLE_ADMIN: [
+        "people.view_student",
+        "people.add_student",
+        "people.change_student",
+        "academics.view_classgroup",
+        "academics.change_classgroup",
+        "finance.view_feeinvoice",
+        "finance.change_feeinvoice",
+        "registrar.view_admissionapplication",
+        "registrar.change_admissionapplication",
+        "rbac.view_role",
+        "auth.view_group",
+    ],
+    ROLE_TEACHER: [
+        "people.view_student",
+        "academics.view_classgroup",
+        "academics.view_attendancerecord",
+        "academics.add_attendancerecord",
+        "academics.change_attendancerecord",
+        "academics.view_grade",
+        "academics.add_grade",
+        "academics.change_grade",
+    ],
+    ROLE_PARENT: [
+        "finance.view_feeinvoice",
+        "finance.add_paymentproof",
+    ],
+}
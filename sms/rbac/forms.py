@@ -26,3 +26,43 @@ class PermissionForm(forms.ModelForm):
 class AssignRoleForm(forms.Form):
     user = forms.ModelChoiceField(queryset=User.objects.all().order_by("username"), widget=forms.Select(attrs={"class":"form-select"}))
     role = forms.ModelChoiceField(queryset=Role.objects.all().order_by("name"), widget=forms.Select(attrs={"class":"form-select"}))
+
+class AssignPermissionForm(forms.Form):
+    role = forms.ModelChoiceField(queryset=Role.objects.all().order_by("name"), widget=forms.Select(attrs={"class":"form-select"}))
+    permission = forms.ModelChoiceField(queryset=Permission.objects.all().order_by("code"), widget=forms.Select(attrs={"class":"form-select"}))
+
+    def __init__(self, *args, role_queryset=None, permission_queryset=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if role_queryset is not None:
+            self.fields["role"].queryset = role_queryset.order_by("name")
+        if permission_queryset is not None:
+            self.fields["permission"].queryset = permission_queryset.order_by("code")
+
+class UserCreateForm(forms.ModelForm):
+    password = forms.CharField(widget=forms.PasswordInput(attrs={"class": "form-control"}))
+    role = forms.ModelChoiceField(queryset=Role.objects.all().order_by("name"), required=False, widget=forms.Select(attrs={"class":"form-select"}))
+
+    class Meta:
+        model = User
+        fields = ["username", "email", "first_name", "last_name"]
+        widgets = {
+            "username": forms.TextInput(attrs={"class": "form-control"}),
+            "email": forms.EmailInput(attrs={"class": "form-control"}),
+            "first_name": forms.TextInput(attrs={"class": "form-control"}),
+            "last_name": forms.TextInput(attrs={"class": "form-control"}),
+        }
+
+    def save(self, commit=True):
+        user = super().save(commit=False)
+        user.set_password(self.cleaned_data["password"])
+        if commit:
+            user.save()
+        return user
+
+class BulkUserUploadForm(forms.Form):
+    csv_file = forms.FileField(widget=forms.ClearableFileInput(attrs={"class": "form-control", "accept": ".csv"}))
+    default_password = forms.CharField(
+        initial="ChangeMe123!",
+        help_text="Used for new users whose row has no password.",
+        widget=forms.TextInput(attrs={"class": "form-control"}),
+    )
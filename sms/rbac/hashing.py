@@ -0,0 +1,41 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+
+# Kept free of model imports so pool workers started with "spawn" can import it.
+
+
+def _workers(workers=None) -> int:
+    return workers or getattr(settings, "PASSWORD_HASH_WORKERS", None) or os.cpu_count() or 1
+
+
+@contextmanager
+def password_hash_pool(workers: int = None, enabled: bool = True):
+    """
+    A process pool of PASSWORD_HASH_WORKERS (default: CPU count) processes
+    for hash_passwords, started once and shared by every chunk of an import.
+    Yields None, so hashing stays in-process, when disabled (imports run in
+    the request) or when only one worker would run, where a pool costs more
+    than it saves.
+    """
+    workers = _workers(workers)
+    if not enabled or workers <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield pool
+
+
+def hash_passwords(passwords, pool=None, min_parallel: int = 8) -> list:
+    """
+    make_password for each raw password, in order. PBKDF2 is CPU-bound, so
+    with a pool from password_hash_pool batches of min_parallel or more are
+    spread over its processes. Call it outside any transaction.
+    """
+    passwords = list(passwords)
+    if pool is None or len(passwords) < min_parallel:
+        return [make_password(p) for p in passwords]
+    return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (_workers() * 4))))
@@ -0,0 +1,57 @@
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rbac.models import Permission, Role, UserRole
+from rbac.utils import user_has_perm
+
+
+class Command(BaseCommand):
+    help = "Benchmark N rbac permission checks in one request: per-check query vs cached permission set."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--checks", type=int, default=1000)
+        parser.add_argument("--requests", type=int, default=5, help="Simulated requests (fresh user object each).")
+        parser.add_argument("--perms", type=int, default=50, help="Permissions on the benchmark role.")
+
+    def _measure(self, label, fn, requests, checks):
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for _ in range(requests):
+                fn()
+            elapsed = time.perf_counter() - start
+        per_request = elapsed / requests * 1000
+        self.stdout.write(
+            f"{label:<28} {per_request:8.2f} ms/request  {len(ctx.captured_queries) / requests:8.1f} queries/request"
+        )
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        checks, requests = options["checks"], options["requests"]
+
+        with transaction.atomic():
+            perms = Permission.objects.bulk_create([
+                Permission(code=f"bench.perm_{i}", name=f"Bench {i}") for i in range(options["perms"])
+            ])
+            role = Role.objects.create(name="Bench role")
+            role.permissions.set(perms)
+            user = User.objects.create_user(username="bench_perm_user")
+            UserRole.objects.create(user=user, role=role)
+            codes = [f"bench.perm_{i % (options['perms'] * 2)}" for i in range(checks)]
+
+            def before():
+                u = User.objects.get(pk=user.pk)
+                for code in codes:
+                    u.rbac_roles.filter(role__permissions__code=code).exists()
+
+            def after():
+                u = User.objects.get(pk=user.pk)
+                for code in codes:
+                    user_has_perm(u, code)
+
+            self.stdout.write(f"{checks} checks x {requests} requests")
+            self._measure("before: exists() per check", before, requests, checks)
+            self._measure("after: cached code set", after, requests, checks)
+            transaction.set_rollback(True)
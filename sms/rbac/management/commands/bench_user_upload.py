@@ -0,0 +1,76 @@
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts.models import User
+from rbac.constants import ROLE_CANONICAL, ROLE_TEACHER
+from rbac.models import Role, UserRole
+from rbac.hashing import password_hash_pool
+from rbac.services import import_users
+from rbac.utils import attach_user_to_role_group
+
+
+def _one_at_a_time(rows, default_hash):
+    # the previous upload loop: get_or_create, set_password, role lookup and link per row
+    for _, row in rows:
+        user, created = User.objects.get_or_create(username=row["username"], defaults={"email": row["email"]})
+        if created:
+            user.set_password(row["password"]) if row["password"] else setattr(user, "password", default_hash)
+        user.save()
+        role = Role.objects.filter(name__iexact=ROLE_CANONICAL.get(row["role"].lower(), row["role"])).first()
+        UserRole.objects.get_or_create(user=user, role=role)
+        attach_user_to_role_group(user, role.name)
+    return {}
+
+
+def _import_with_pool(rows, default_hash):
+    # as a background import job runs it: one hashing pool for the whole upload
+    with password_hash_pool() as pool:
+        return import_users(rows, default_hash, pool=pool)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the bulk user upload: the per-row loop vs import_users. Rows carry their own "
+        "passwords, so hashing dominates; the loop runs on a sample and is extrapolated. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=400)
+        parser.add_argument("--sample", type=int, default=40, help="Rows for the per-row loop before extrapolating.")
+        parser.add_argument("--workers", type=int, default=None, help="Hashing processes (default PASSWORD_HASH_WORKERS).")
+
+    def _measure(self, label, fn, rows, scale=1):
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        default_hash = make_password("ChangeMe123!")
+        with transaction.atomic():
+            Role.objects.get_or_create(name=ROLE_TEACHER)
+            with connection.execute_wrapper(count):
+                start = time.perf_counter()
+                fn(rows, default_hash)
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        suffix = f"  (measured {len(rows)}, x{scale:g})" if scale != 1 else ""
+        self.stdout.write(f"{label:<24} {elapsed * scale:9.2f} s  {len(queries) * scale:9.0f} queries{suffix}")
+
+    def handle(self, *args, **options):
+        if options["workers"]:
+            from django.conf import settings
+            settings.PASSWORD_HASH_WORKERS = options["workers"]
+        n = options["rows"]
+        sample = min(options["sample"], n)
+        rows = [
+            (i + 2, {"username": f"benchuser{i}", "email": f"benchuser{i}@example.com",
+                     "password": f"Pw-{i}-secret" if i % 2 else "", "role": "teacher"})
+            for i in range(n)
+        ]
+        self.stdout.write(f"Uploading {n} users, half with their own password")
+        self._measure("before: one at a time", _one_at_a_time, rows[:sample], scale=n / sample)
+        self._measure("after: import_users", _import_with_pool, rows)
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from rbac.services import rebuild_user_permissions
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the UserPermission closure (rbac roles + Django groups and user permissions) "
+        "for every user and fix any rows that drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Users per reconcile batch.")
+
+    def handle(self, *args, **options):
+        added, removed = rebuild_user_permissions(batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(f"Permission closure rebuilt: added {added}, removed {removed}."))
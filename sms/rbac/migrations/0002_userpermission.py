@@ -0,0 +1,49 @@
+# Generated by Django 6.0 on 2026-10-18 04:18
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_closure(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split("."))
+    UserRole = apps.get_model("rbac", "UserRole")
+    UserPermission = apps.get_model("rbac", "UserPermission")
+
+    rows = set(
+        UserRole.objects.filter(role__permissions__isnull=False).values_list("user_id", "role__permissions__code")
+    )
+    for user_id, app_label, codename in User.groups.through.objects.filter(
+        group__permissions__isnull=False
+    ).values_list("user_id", "group__permissions__content_type__app_label", "group__permissions__codename"):
+        rows.add((user_id, f"{app_label}.{codename}"))
+    for user_id, app_label, codename in User.user_permissions.through.objects.values_list(
+        "user_id", "permission__content_type__app_label", "permission__codename"
+    ):
+        rows.add((user_id, f"{app_label}.{codename}"))
+    UserPermission.objects.bulk_create(
+        [UserPermission(user_id=user_id, code=code) for user_id, code in rows], batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rbac', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserPermission',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=255)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='perm_closure', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'code'), name='rbac_userperm_user_code_uniq')],
+            },
+        ),
+        migrations.RunPython(populate_closure, migrations.RunPython.noop),
+    ]
@@ -27,3 +27,22 @@ class UserRole(models.Model):
 
     def __str__(self):
         return f"{self.user} -> {self.role}"
+
+
+class UserPermission(models.Model):
+    """
+    Materialized closure of every permission code a user holds: rbac codes via
+    UserRole -> Role -> Permission plus Django auth codes ("app_label.codename")
+    via groups and direct user permissions. Maintained by rbac.signals;
+    `rebuild_user_permissions` reconciles drift.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="perm_closure")
+    code = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "code"], name="rbac_userperm_user_code_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}: {self.code}"
@@ -0,0 +1,253 @@
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import transaction
+
+from core.services_imports import imports_in_background
+from .constants import ROLE_CANONICAL, ROLE_PERMISSIONS
+from .hashing import hash_passwords, password_hash_pool
+from .models import Role, UserPermission, UserRole
+
+User = get_user_model()
+
+
+def _desired_codes(user_ids=None) -> dict:
+    """
+    user id -> set of permission codes from all sources, in three queries:
+    rbac roles, Django groups and direct Django user permissions.
+    """
+    role_rows = UserRole.objects.filter(role__permissions__isnull=False)
+    group_rows = User.groups.through.objects.filter(group__permissions__isnull=False)
+    direct_rows = User.user_permissions.through.objects.all()
+    if user_ids is not None:
+        role_rows = role_rows.filter(user_id__in=user_ids)
+        group_rows = group_rows.filter(user_id__in=user_ids)
+        direct_rows = direct_rows.filter(user_id__in=user_ids)
+
+    codes = {}
+    for user_id, code in role_rows.values_list("user_id", "role__permissions__code"):
+        codes.setdefault(user_id, set()).add(code)
+    for user_id, app_label, codename in group_rows.values_list(
+        "user_id", "group__permissions__content_type__app_label", "group__permissions__codename"
+    ):
+        codes.setdefault(user_id, set()).add(f"{app_label}.{codename}")
+    for user_id, app_label, codename in direct_rows.values_list(
+        "user_id", "permission__content_type__app_label", "permission__codename"
+    ):
+        codes.setdefault(user_id, set()).add(f"{app_label}.{codename}")
+    return codes
+
+
+def refresh_user_permissions(user_ids, batch_size: int = 1000) -> tuple:
+    """
+    Recompute the closure rows for user_ids and write only the difference.
+    Returns (added, removed).
+    """
+    user_ids = set(user_ids)
+    if not user_ids:
+        return 0, 0
+
+    desired = _desired_codes(user_ids)
+    stale = []
+    have = set()
+    for pk, user_id, code in UserPermission.objects.filter(user_id__in=user_ids).values_list("id", "user_id", "code"):
+        if code in desired.get(user_id, ()):
+            have.add((user_id, code))
+        else:
+            stale.append(pk)
+    missing = [
+        UserPermission(user_id=user_id, code=code)
+        for user_id, codes in desired.items()
+        for code in codes
+        if (user_id, code) not in have
+    ]
+
+    if stale or missing:
+        with transaction.atomic():
+            for start in range(0, len(stale), batch_size):
+                UserPermission.objects.filter(id__in=stale[start:start + batch_size]).delete()
+            UserPermission.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+    return len(missing), len(stale)
+
+
+def rebuild_user_permissions(batch_size: int = 1000) -> tuple:
+    """Reconcile the whole closure table, batch_size users at a time. Returns (added, removed)."""
+    added = removed = 0
+    last_id = 0
+    while True:
+        ids = list(User.objects.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:batch_size])
+        if not ids:
+            break
+        last_id = ids[-1]
+        a, r = refresh_user_permissions(ids, batch_size=batch_size)
+        added += a
+        removed += r
+    return added, removed
+
+
+def _resolve_roles(labels) -> tuple:
+    """
+    {label: Role} for the role labels in an upload, from one query over Role.
+    Built-in roles missing from the table are created. Returns (map, roles created).
+    """
+    by_name = {r.name.casefold(): r for r in Role.objects.all()}
+    wanted = {label: ROLE_CANONICAL.get(label.lower(), label) for label in labels}
+    missing = sorted({name for name in wanted.values() if name.casefold() not in by_name and name in ROLE_PERMISSIONS})
+    if missing:
+        Role.objects.bulk_create(
+            [Role(name=name, description="Auto-created from bulk upload") for name in missing], ignore_conflicts=True
+        )
+        by_name.update((r.name.casefold(), r) for r in Role.objects.filter(name__in=missing))
+    roles = {label: by_name[name.casefold()] for label, name in wanted.items() if name.casefold() in by_name}
+    return roles, len(missing)
+
+
+def hash_new_user_passwords(passwords, pool=None, chunk_size: int = 500) -> dict:
+    """
+    {username: hash} for the {username: raw password} entries whose user
+    doesn't exist yet (existing users keep their password). Runs before the
+    import's transaction, so slow PBKDF2 work never holds its locks; pass a
+    pool from password_hash_pool to spread it over processes.
+    """
+    passwords = dict(passwords)
+    usernames = list(passwords)
+    for start in range(0, len(usernames), chunk_size):
+        for username in User.objects.filter(username__in=usernames[start:start + chunk_size]).values_list("username", flat=True):
+            del passwords[username]
+    return dict(zip(passwords, hash_passwords(passwords.values(), pool=pool)))
+
+
+def _row_passwords(numbered_rows) -> dict:
+    # the last non-empty password per username, as import_users keeps it
+    passwords = {}
+    for _, row in numbered_rows:
+        username = (row.get("username") or "").strip()
+        password = (row.get("password") or "").strip()
+        if username and password:
+            passwords[username] = password
+    return passwords
+
+
+def import_users(numbered_rows, default_password_hash: str, chunk_size: int = 500, pool=None, password_hashes=None) -> dict:
+    """
+    Create or update users from (line number, row) pairs with set-based writes.
+    Roles are resolved once; each chunk loads its existing users with one
+    username__in query, writes with bulk_create/bulk_update, and links roles
+    and their auth groups with bulk_create(ignore_conflicts=True). Passwords
+    given in rows are hashed first, outside the transaction (on pool if
+    given), unless password_hashes already holds them; other new users get
+    default_password_hash. Existing users keep their password.
+    """
+    summary = {"created": 0, "updated": 0, "role_attached": 0, "roles_created": 0, "skipped": 0, "errors": []}
+    # one entry per username, later rows filling in or overriding earlier values
+    entries = {}
+    for idx, row in numbered_rows:
+        username = (row.get("username") or "").strip()
+        if not username:
+            summary["skipped"] += 1
+            summary["errors"].append(f"Row {idx}: missing username, skipped.")
+            continue
+        entry = entries.setdefault(username, {"line": idx, "fields": {}, "password": "", "roles": []})
+        for field in ("email", "first_name", "last_name"):
+            value = (row.get(field) or "").strip()
+            if value:
+                entry["fields"][field] = value
+        entry["password"] = (row.get("password") or "").strip() or entry["password"]
+        role_label = (row.get("role") or row.get("type") or "").strip()
+        if role_label:
+            entry["roles"].append((idx, role_label))
+
+    roles, summary["roles_created"] = _resolve_roles({label for e in entries.values() for _, label in e["roles"]})
+    groups = {}
+    for role in {r.pk: r for r in roles.values()}.values():
+        groups[role.pk], _ = Group.objects.get_or_create(name=role.name)
+
+    if password_hashes is None:
+        password_hashes = hash_new_user_passwords(
+            {u: e["password"] for u, e in entries.items() if e["password"]}, pool=pool, chunk_size=chunk_size,
+        )
+
+    usernames = list(entries)
+    with transaction.atomic():
+        for start in range(0, len(usernames), chunk_size):
+            _import_user_chunk(
+                usernames[start:start + chunk_size], entries, roles, groups, default_password_hash, password_hashes, summary,
+            )
+    return summary
+
+
+def _import_user_chunk(usernames, entries, roles, groups, default_password_hash, password_hashes, summary) -> None:
+    existing = {u.username: u for u in User.objects.filter(username__in=usernames)}
+
+    changed = []
+    for username, user in existing.items():
+        fields = entries[username]["fields"]
+        if any(getattr(user, f) != v for f, v in fields.items()):
+            for f, v in fields.items():
+                setattr(user, f, v)
+            changed.append(user)
+    if changed:
+        User.objects.bulk_update(changed, ["email", "first_name", "last_name"])
+        summary["updated"] += len(changed)
+
+    new = [u for u in usernames if u not in existing]
+    if new:
+        # a user deleted since the passwords were hashed has none here; hash it inline
+        missing = [u for u in new if entries[u]["password"] and u not in password_hashes]
+        password_hashes.update(zip(missing, hash_passwords(entries[u]["password"] for u in missing)))
+        User.objects.bulk_create([
+            User(
+                username=u,
+                password=password_hashes[u] if entries[u]["password"] else default_password_hash,
+                **entries[u]["fields"],
+            )
+            for u in new
+        ])
+        existing.update((u.username, u) for u in User.objects.filter(username__in=new))
+        summary["created"] += len(new)
+
+    links, memberships = [], []
+    for username in usernames:
+        user = existing[username]
+        for idx, label in entries[username]["roles"]:
+            role = roles.get(label)
+            if role is None:
+                summary["errors"].append(f"Row {idx}: role '{label}' not found, user created without role.")
+                continue
+            links.append(UserRole(user_id=user.pk, role_id=role.pk))
+            memberships.append(User.groups.through(user_id=user.pk, group_id=groups[role.pk].pk))
+            summary["role_attached"] += 1
+    UserRole.objects.bulk_create(links, ignore_conflicts=True)
+    User.groups.through.objects.bulk_create(memberships, ignore_conflicts=True)
+    if links:
+        # bulk_create skips post_save / m2m_changed, so refresh the permission closure directly
+        refresh_user_permissions({link.user_id for link in links})
+
+
+def import_user_rows(numbered_rows, options) -> dict:
+    """
+    ImportJob processor for user files. options["default_password_hash"] is
+    set by the upload form, which never stores the plain default password.
+    """
+    summary = import_users(numbered_rows, options["default_password_hash"], password_hashes=options.get("password_hashes"))
+    return {
+        "created": summary["created"],
+        "skipped": summary["skipped"],
+        "errors": summary["errors"],
+        "updated": summary["updated"],
+        "role_attached": summary["role_attached"],
+        "roles_created": summary["roles_created"],
+    }
+
+
+@contextmanager
+def _prepare_user_rows(options):
+    # one hashing pool per import, and only in a background worker: inline
+    # (in-request) imports hash in-process
+    with password_hash_pool(enabled=imports_in_background()) as pool:
+        yield lambda rows: {"password_hashes": hash_new_user_passwords(_row_passwords(rows), pool=pool)}
+
+
+import_user_rows.prepare = _prepare_user_rows
+
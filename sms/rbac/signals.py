@@ -0,0 +1,98 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission as DjangoPermission
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Permission, Role, UserRole
+from .services import refresh_user_permissions
+
+User = get_user_model()
+UserGroup = User.groups.through
+UserDirectPermission = User.user_permissions.through
+
+
+def _users_with_roles(role_ids):
+    return UserRole.objects.filter(role_id__in=role_ids).values_list("user_id", flat=True)
+
+
+def _users_with_rbac_perms(perm_ids):
+    return UserRole.objects.filter(role__permissions__in=perm_ids).values_list("user_id", flat=True)
+
+
+def _users_in_groups(group_ids):
+    return UserGroup.objects.filter(group_id__in=group_ids).values_list("user_id", flat=True)
+
+
+def _users_with_group_perms(perm_ids):
+    return UserGroup.objects.filter(group__permissions__in=perm_ids).values_list("user_id", flat=True)
+
+
+def _users_with_direct_perms(perm_ids):
+    return UserDirectPermission.objects.filter(permission_id__in=perm_ids).values_list("user_id", flat=True)
+
+
+def _users_with_django_perms(perm_ids):
+    return set(_users_with_group_perms(perm_ids)) | set(_users_with_direct_perms(perm_ids))
+
+
+# m2m through model -> (users affected via the owning side, users affected via the target side)
+_M2M_AFFECTED = {
+    Role.permissions.through: (_users_with_roles, _users_with_rbac_perms),
+    UserGroup: (lambda ids: ids, _users_in_groups),
+    UserDirectPermission: (lambda ids: ids, _users_with_direct_perms),
+    Group.permissions.through: (_users_in_groups, _users_with_group_perms),
+}
+
+
+def _m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # Affected users are collected before the change (a reverse clear has no
+    # pk_set and the rows are gone afterwards) and refreshed after it.
+    owner_users, target_users = _M2M_AFFECTED[sender]
+    if action.startswith("pre_"):
+        if not reverse:
+            users = owner_users([instance.pk])
+        elif pk_set is not None:
+            users = owner_users(pk_set)
+        else:
+            users = target_users([instance.pk])
+        instance._rbac_closure_users = set(users)
+    else:
+        refresh_user_permissions(instance.__dict__.pop("_rbac_closure_users", ()))
+
+
+for _through in _M2M_AFFECTED:
+    m2m_changed.connect(_m2m_changed, sender=_through, dispatch_uid=f"rbac_closure_{_through._meta.label}")
+
+
+@receiver([post_save, post_delete], sender=UserRole)
+def _user_role_changed(sender, instance, **kwargs):
+    refresh_user_permissions([instance.user_id])
+
+
+@receiver(post_save, sender=Permission)
+def _rbac_permission_saved(sender, instance, created, **kwargs):
+    # a renamed code leaves stale rows for exactly the users holding it
+    if not created:
+        refresh_user_permissions(_users_with_rbac_perms([instance.pk]))
+
+
+@receiver(pre_delete, sender=Permission)
+def _rbac_permission_deleting(sender, instance, **kwargs):
+    instance._rbac_closure_users = set(_users_with_rbac_perms([instance.pk]))
+
+
+@receiver(pre_delete, sender=Group)
+def _group_deleting(sender, instance, **kwargs):
+    instance._rbac_closure_users = set(_users_in_groups([instance.pk]))
+
+
+@receiver(pre_delete, sender=DjangoPermission)
+def _django_permission_deleting(sender, instance, **kwargs):
+    instance._rbac_closure_users = _users_with_django_perms([instance.pk])
+
+
+@receiver(post_delete, sender=Permission)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=DjangoPermission)
+def _closure_source_deleted(sender, instance, **kwargs):
+    refresh_user_permissions(instance.__dict__.pop("_rbac_closure_users", ()))
@@ -1,3 +1,183 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from contextlib import contextmanager
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import Group
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from core.services_imports import enqueue_import, process_import_jobs
+from .hashing import hash_passwords, password_hash_pool
+from .models import Permission, Role, UserPermission, UserRole
+from .services import import_users
+from .utils import attach_permission_to_role_group, attach_user_to_role_group, user_has_perm
+
+User = get_user_model()
+
+
+class PermissionCacheTests(TestCase):
+    def setUp(self):
+        self.perm = Permission.objects.create(code="finance.verify_pop", name="Verify POP")
+        self.role = Role.objects.create(name="Bursar")
+        self.user = User.objects.create_user(username="bursar")
+        UserRole.objects.create(user=self.user, role=self.role)
+
+    def _fresh_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_one_query_per_request(self):
+        u = self._fresh_user()
+        with self.assertNumQueries(1):
+            for _ in range(100):
+                user_has_perm(u, "finance.verify_pop")
+        # next request, same user: read again, so revocations apply in every worker
+        with self.assertNumQueries(1):
+            user_has_perm(User(pk=u.pk, username=u.username), "finance.verify_pop")
+
+    def test_role_permission_change_invalidates(self):
+        self.assertFalse(user_has_perm(self._fresh_user(), "finance.verify_pop"))
+        self.role.permissions.add(self.perm)
+        self.assertTrue(user_has_perm(self._fresh_user(), "finance.verify_pop"))
+        UserRole.objects.filter(user=self.user).delete()
+        self.assertFalse(user_has_perm(self._fresh_user(), "finance.verify_pop"))
+
+
+class PermissionClosureTests(TestCase):
+    def setUp(self):
+        self.perm = Permission.objects.create(code="finance.verify_pop", name="Verify POP")
+        self.role = Role.objects.create(name="Bursar")
+        self.role.permissions.add(self.perm)
+        self.user = User.objects.create_user(username="bursar")
+
+    def _codes(self):
+        return set(UserPermission.objects.filter(user=self.user).values_list("code", flat=True))
+
+    def test_rbac_and_group_sources_are_merged(self):
+        UserRole.objects.create(user=self.user, role=self.role)
+        attach_user_to_role_group(self.user, "Bursar")
+        ok, _ = attach_permission_to_role_group("Bursar", "people.view_student")
+        self.assertTrue(ok)
+        self.assertEqual(self._codes(), {"finance.verify_pop", "people.view_student"})
+
+        Group.objects.get(name="Bursar").permissions.clear()
+        self.assertEqual(self._codes(), {"finance.verify_pop"})
+        self.role.permissions.remove(self.perm)
+        self.assertEqual(self._codes(), set())
+
+    def test_reverse_side_and_deletes(self):
+        UserRole.objects.create(user=self.user, role=self.role)
+        other = Role.objects.create(name="Auditor")
+        UserRole.objects.create(user=self.user, role=other)
+        audit = Permission.objects.create(code="finance.audit", name="Audit")
+        audit.roles.add(other)
+        self.assertEqual(self._codes(), {"finance.verify_pop", "finance.audit"})
+
+        audit.roles.clear()
+        self.assertEqual(self._codes(), {"finance.verify_pop"})
+        self.perm.code = "finance.verify_proof"
+        self.perm.save()
+        self.assertEqual(self._codes(), {"finance.verify_proof"})
+        self.role.delete()
+        self.assertEqual(self._codes(), set())
+
+    def test_check_is_one_indexed_lookup(self):
+        UserRole.objects.create(user=self.user, role=self.role)
+        attach_user_to_role_group(self.user, "Bursar")
+        attach_permission_to_role_group("Bursar", "people.view_student")
+        u = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user_has_perm(u, "people.view_student"))
+            self.assertTrue(user_has_perm(u, "finance.verify_pop"))
+
+    def test_rebuild_reconciles_drift(self):
+        UserRole.objects.create(user=self.user, role=self.role)
+        UserPermission.objects.all().delete()
+        UserPermission.objects.create(user=self.user, code="bogus.code")
+        out = StringIO()
+        call_command("rebuild_user_permissions", stdout=out)
+        self.assertIn("added 1, removed 1", out.getvalue())
+        self.assertEqual(self._codes(), {"finance.verify_pop"})
+
+
+class BulkUserImportTests(TestCase):
+    def setUp(self):
+        self.default_hash = make_password("Default123!")
+        self.teacher = Role.objects.create(name="Teacher")
+        self.perm = Permission.objects.create(code="academics.view_grade", name="View grades")
+        self.teacher.permissions.add(self.perm)
+        User.objects.create_user(username="old", email="old@example.com", password="keep-me")
+
+    def _rows(self, n, role="teacher"):
+        return [(i + 2, {"username": f"t{i}", "email": f"t{i}@example.com", "role": role}) for i in range(n)]
+
+    def test_creates_updates_and_links_roles(self):
+        rows = self._rows(3) + [
+            (5, {"username": "old", "first_name": "Olga", "role": "Parent"}),
+            (6, {"username": "pw", "password": "Secret123!", "role": "Nope"}),
+            (7, {"username": ""}),
+        ]
+        summary = import_users(rows, self.default_hash)
+
+        self.assertEqual((summary["created"], summary["updated"], summary["skipped"]), (4, 1, 1))
+        self.assertEqual((summary["role_attached"], summary["roles_created"]), (4, 1))
+        self.assertEqual(len(summary["errors"]), 2)
+        old = User.objects.get(username="old")
+        self.assertEqual(old.first_name, "Olga")
+        self.assertTrue(old.check_password("keep-me"))
+        self.assertTrue(User.objects.get(username="pw").check_password("Secret123!"))
+        self.assertTrue(User.objects.get(username="t0").check_password("Default123!"))
+        self.assertTrue(User.objects.get(username="t1").groups.filter(name="Teacher").exists())
+        self.assertTrue(UserPermission.objects.filter(user__username="t2", code="academics.view_grade").exists())
+
+        # re-uploading changes nothing
+        again = import_users(rows, self.default_hash)
+        self.assertEqual((again["created"], again["updated"]), (0, 0))
+        self.assertEqual(UserRole.objects.count(), 4)
+
+    def test_query_count_does_not_grow_with_chunk_size(self):
+        import_users(self._rows(1), self.default_hash)   # creates the Teacher group
+        counts = []
+        # sizes stay under SQLite's 999-parameter limit, where bulk_create starts splitting INSERTs
+        for n, offset in ((10, 100), (50, 1000)):
+            rows = [(i, {"username": f"u{offset + i}", "role": "Teacher"}) for i in range(n)]
+            with CaptureQueriesContext(connection) as ctx:
+                import_users(rows, self.default_hash, chunk_size=n)
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_pool_hashes_match_inputs(self):
+        raw = [f"pw-{i}" for i in range(8)]
+        with password_hash_pool(workers=2) as pool:
+            self.assertIsNotNone(pool)
+            hashed = hash_passwords(raw, pool=pool)
+        self.assertTrue(all(check_password(p, h) for p, h in zip(raw, hashed)))
+        with password_hash_pool(workers=1) as pool:
+            self.assertIsNone(pool)
+
+    def test_import_job_hashes_before_each_chunk_with_one_pool(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        pools = []
+
+        @contextmanager
+        def counting_pool(**kwargs):
+            pools.append(kwargs)
+            yield None
+
+        upload = SimpleUploadedFile("users.csv", (
+            "username,password,role\n" + "".join(f"j{i},Secret-{i},teacher\n" for i in range(5))
+        ).encode())
+        with override_settings(IMPORT_FILES_DIR=media, IMPORTS_IN_BACKGROUND=True), \
+                patch("rbac.services.password_hash_pool", counting_pool):
+            enqueue_import("users", upload, options={"default_password_hash": self.default_hash})
+            process_import_jobs(chunk_size=2)
+        self.assertEqual(pools, [{"enabled": True}])
+        self.assertTrue(User.objects.get(username="j4").check_password("Secret-4"))
 
-# Create your tests here.
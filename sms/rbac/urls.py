@@ -4,6 +4,7 @@ from .views import (
     roles_list, role_create, role_edit, role_delete,
     perms_list, perm_create,
     assignments, assign_role, revoke_role,
+    bulk_user_upload,
 )
 
 app_name = "rbac"
@@ -22,4 +23,6 @@ urlpatterns = [
     path("assignments/", assignments, name="assignments"),
     path("assign/", assign_role, name="assign_role"),
     path("revoke/<int:user_role_id>/", revoke_role, name="revoke_role"),
+
+    path("users/bulk/", bulk_user_upload, name="bulk_user_upload"),
 ]
@@ -1,4 +1,24 @@
-from .models import Permission
+from functools import wraps
+
+from django.contrib.auth.decorators import login_required
+from django.contrib.auth.models import Group, Permission as DjangoPermission
+from django.core.exceptions import PermissionDenied
+
+from .models import UserPermission
+
+
+def get_user_perm_codes(user) -> frozenset:
+    """
+    All permission codes for a user (rbac roles plus Django groups and user
+    permissions), read from the UserPermission closure with one indexed query
+    and memoized on the user object for the request (like Django's
+    _perm_cache). Nothing is kept across requests, so a revoked permission
+    stops working on the next request in every worker.
+    """
+    if not hasattr(user, "_rbac_perm_cache"):
+        user._rbac_perm_cache = frozenset(UserPermission.objects.filter(user_id=user.pk).values_list("code", flat=True))
+    return user._rbac_perm_cache
+
 
 def user_has_perm(user, perm_code: str) -> bool:
     if not user.is_authenticated:
@@ -7,4 +27,61 @@ def user_has_perm(user, perm_code: str) -> bool:
     if getattr(user, "is_superuser", False) or getattr(user, "is_principal", False) or getattr(user, "is_it_admin", False):
         return True
 
-    return user.rbac_roles.filter(role__permissions__code=perm_code).exists()
+    return perm_code in get_user_perm_codes(user)
+
+
+def require_any_perm(*perm_codes):
+    """
+    View decorator: the user needs at least one of perm_codes, either as a
+    Django auth permission (incl. role groups) or through an rbac Role. Both
+    are in the UserPermission closure, so this never hits the auth backends.
+    """
+    def decorator(view_func):
+        @login_required
+        @wraps(view_func)
+        def _wrapped(request, *args, **kwargs):
+            user = request.user
+            if any(user_has_perm(user, code) for code in perm_codes):
+                return view_func(request, *args, **kwargs)
+            raise PermissionDenied
+        return _wrapped
+    return decorator
+
+
+def attach_user_to_role_group(user, role_name: str) -> None:
+    """Mirror an rbac role assignment into the Django auth group of the same name."""
+    group, _ = Group.objects.get_or_create(name=role_name)
+    user.groups.add(group)
+
+
+def detach_user_from_role_group(user, role_name: str) -> None:
+    group = Group.objects.filter(name=role_name).first()
+    if group:
+        user.groups.remove(group)
+
+
+def _django_permission(perm_code: str):
+    app_label, _, codename = perm_code.partition(".")
+    if not codename:
+        return None
+    return DjangoPermission.objects.filter(content_type__app_label=app_label, codename=codename).first()
+
+
+def attach_permission_to_role_group(role_name: str, perm_code: str):
+    """
+    Grant the Django permission matching perm_code ("app_label.codename") to
+    the role's group. Returns (ok, message).
+    """
+    perm = _django_permission(perm_code)
+    if perm is None:
+        return False, f"No Django permission named '{perm_code}'."
+    group, _ = Group.objects.get_or_create(name=role_name)
+    group.permissions.add(perm)
+    return True, ""
+
+
+def detach_permission_from_role_group(role_name: str, perm_code: str) -> None:
+    perm = _django_permission(perm_code)
+    group = Group.objects.filter(name=role_name).first()
+    if perm and group:
+        group.permissions.remove(perm)
@@ -1,5 +1,6 @@
 from django.contrib import messages
 from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import Permission as DjangoPermission
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
@@ -16,9 +17,7 @@ from rbac.utils import (
     attach_permission_to_role_group,
     detach_permission_from_role_group,
 )
-from rbac.constants import ROLE_PERMISSIONS, ROLE_PRINCIPAL, ROLE_ADMIN, ROLE_TEACHER, ROLE_PARENT
-import csv
-from io import TextIOWrapper
+from core.services_imports import enqueue_import
 
 User = get_user_model()
 
@@ -26,14 +25,6 @@ def _can_configure(user):
     return user.is_authenticated and (getattr(user, "is_principal", False) or getattr(user, "is_it_admin", False) or getattr(user, "is_school_admin", False) or getattr(user, "is_superuser", False))
 
 
-ROLE_CANONICAL = {
-    "principal": ROLE_PRINCIPAL,
-    "school admin": ROLE_ADMIN,
-    "admin": ROLE_ADMIN,
-    "teacher": ROLE_TEACHER,
-    "parent": ROLE_PARENT,
-}
-
 @login_required
 def rbac_home(request):
     if not _can_configure(request.user):
@@ -200,75 +191,13 @@ def bulk_user_upload(request):
         return redirect("accounts:dashboard")
 
     form = BulkUserUploadForm(request.POST or None, request.FILES or None)
-    summary = None
-    errors = []
-
     if request.method == "POST" and form.is_valid():
-        f = request.FILES.get("csv_file")
-        default_password = form.cleaned_data["default_password"]
-        created = 0
-        updated = 0
-        role_attached = 0
-        skipped = 0
-        roles_created = 0
-
-        try:
-            text_wrapper = TextIOWrapper(f.file, encoding="utf-8-sig")
-            reader = csv.DictReader(text_wrapper)
-            for idx, row in enumerate(reader, start=2):
-                username = (row.get("username") or "").strip()
-                if not username:
-                    skipped += 1
-                    errors.append(f"Row {idx}: missing username, skipped.")
-                    continue
-
-                defaults = {
-                    "email": (row.get("email") or "").strip(),
-                    "first_name": (row.get("first_name") or "").strip(),
-                    "last_name": (row.get("last_name") or "").strip(),
-                }
-
-                user, was_created = User.objects.get_or_create(username=username, defaults=defaults)
-                if was_created:
-                    user.set_password((row.get("password") or "").strip() or default_password)
-                    created += 1
-                else:
-                    changed = False
-                    for field, value in defaults.items():
-                        if value and getattr(user, field) != value:
-                            setattr(user, field, value)
-                            changed = True
-                    if changed:
-                        updated += 1
-                user.save()
-
-                role_label = (row.get("role") or row.get("type") or "").strip()
-                if role_label:
-                    canonical = ROLE_CANONICAL.get(role_label.lower(), role_label)
-                    role = Role.objects.filter(name__iexact=canonical).first()
-                    if not role and canonical in ROLE_PERMISSIONS:
-                        role = Role.objects.create(name=canonical, description="Auto-created from bulk upload")
-                        roles_created += 1
-                    if not role:
-                        errors.append(f"Row {idx}: role '{role_label}' not found, user created without role.")
-                    else:
-                        UserRole.objects.get_or_create(user=user, role=role)
-                        attach_user_to_role_group(user, role.name)
-                        role_attached += 1
-
-            summary = {
-                "created": created,
-                "updated": updated,
-                "role_attached": role_attached,
-                "roles_created": roles_created,
-                "skipped": skipped,
-            }
-            messages.success(request, "Import completed.")
-        except Exception as exc:
-            messages.error(request, f"Import failed: {exc}")
+        options = {"default_password_hash": make_password(form.cleaned_data["default_password"])}
+        job = enqueue_import("users", form.cleaned_data["csv_file"], request.user, options)
+        return redirect("core:import_job_detail", job_id=job.id)
 
     available_roles = list(Role.objects.order_by("name").values_list("name", flat=True))
-    return render(request, "rbac/bulk_user_upload.html", {"form": form, "summary": summary, "errors": errors, "available_roles": available_roles})
+    return render(request, "rbac/bulk_user_upload.html", {"form": form, "available_roles": available_roles})
 
 
 @require_any_perm("rbac.view_role", "auth.view_group")
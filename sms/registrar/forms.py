@@ -23,7 +23,7 @@ class AdmissionApplicationForm(forms.ModelForm):
         }
 
 class AdmitForm(forms.Form):
-    student_id = forms.CharField(max_length=30, widget=forms.TextInput(attrs={"class":"form-control"}))
+    student_id = forms.CharField(max_length=30, required=False, widget=forms.TextInput(attrs={"class":"form-control"}))
     class_group = forms.ModelChoiceField(
         queryset=ClassGroup.objects.all().order_by("name"),
         widget=forms.Select(attrs={"class":"form-select"})
@@ -32,3 +32,24 @@ class AdmitForm(forms.Form):
         required=False,
         widget=forms.TextInput(attrs={"class":"form-control","placeholder":"Optional: link a parent username"})
     )
+    create_parent_user = forms.BooleanField(required=False)
+    parent_email = forms.EmailField(required=False)
+
+    def __init__(self, *args, grade_filter=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if grade_filter:
+            self.fields["class_group"].queryset = self.fields["class_group"].queryset.filter(grade_level__iexact=grade_filter)
+
+class BulkApplicationUploadForm(forms.Form):
+    csv_file = forms.FileField(widget=forms.ClearableFileInput(attrs={"class":"form-control","accept":".csv"}))
+
+class BulkAdmitUploadForm(forms.Form):
+    csv_file = forms.FileField(widget=forms.ClearableFileInput(attrs={"class":"form-control","accept":".csv"}))
+    default_grade = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"class":"form-control","placeholder":"Used when a row has no grade"})
+    )
+    default_class_group = forms.CharField(
+        required=False,
+        widget=forms.TextInput(attrs={"class":"form-control","placeholder":"Used when a row has no class_group"})
+    )
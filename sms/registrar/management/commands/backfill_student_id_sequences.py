@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from registrar.services import backfill_student_id_sequences
+
+
+class Command(BaseCommand):
+    help = (
+        "Raise each student ID sequence (prefix, year) to the highest existing Student.student_id. "
+        "Run once after restoring or importing students with hand-assigned IDs."
+    )
+
+    def handle(self, *args, **options):
+        touched = backfill_student_id_sequences()
+        self.stdout.write(self.style.SUCCESS(f"Student ID sequences updated: {touched}."))
@@ -0,0 +1,73 @@
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from registrar.models import AdmissionApplication
+from registrar.services import import_applications
+
+
+def _rows(n):
+    rng = random.Random(15)
+    start = date(2010, 1, 1)
+    for i in range(n):
+        yield i + 2, {
+            "first_name": f"Kid{i}",
+            "last_name": rng.choice(["Moyo", "Ncube", "Dube", "Sibanda", "Banda", "Phiri"]),
+            "date_of_birth": (start + timedelta(days=rng.randrange(3650))).isoformat(),
+            "requested_grade": f"Form {rng.randint(1, 6)}",
+            "guardian_name": f"Guardian {i}",
+            "guardian_phone": "",
+            "guardian_email": f"guardian{i}@example.com",
+            "guardian_relationship": "Parent",
+            "notes": "",
+        }
+
+
+def _one_at_a_time(rows):
+    # the previous upload loop: one INSERT per row, no duplicate check
+    for _, row in rows:
+        AdmissionApplication.objects.create(
+            first_name=row["first_name"],
+            last_name=row["last_name"],
+            date_of_birth=date.fromisoformat(row["date_of_birth"]),
+            requested_grade=row["requested_grade"],
+            guardian_name=row["guardian_name"],
+            guardian_email=row["guardian_email"],
+            guardian_relationship=row["guardian_relationship"],
+            status="new",
+        )
+
+
+class Command(BaseCommand):
+    help = "Benchmark the bulk application upload: per-row create vs import_applications. Everything is rolled back."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000)
+
+    def _measure(self, label, fn, rows):
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(1)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            start = time.perf_counter()
+            result = fn(rows)
+            elapsed = time.perf_counter() - start
+        extra = f"  created {result['created']}, duplicates {result['duplicates']}" if result else ""
+        self.stdout.write(f"{label:<28} {elapsed:8.2f} s  {len(queries):7d} queries{extra}")
+
+    def handle(self, *args, **options):
+        rows = list(_rows(options["rows"]))
+        self.stdout.write(f"Importing {len(rows)} application rows")
+        with transaction.atomic():
+            self._measure("before: one at a time", _one_at_a_time, rows)
+            transaction.set_rollback(True)
+        with transaction.atomic():
+            self._measure("after: import_applications", import_applications, rows)
+            self._measure("after: same file again", import_applications, rows)
+            transaction.set_rollback(True)
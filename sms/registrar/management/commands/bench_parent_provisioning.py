@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import User
+from rbac.constants import ROLE_PARENT
+from rbac.utils import attach_user_to_role_group
+from registrar.services_parents import DEFAULT_PARENT_PASSWORD, provision_parents
+
+
+def _one_at_a_time(emails):
+    # the previous admit path: probe loop, create_user, set_password, save, group attach
+    for email in emails:
+        base_username = email.split("@")[0].lower()
+        username = base_username
+        idx = 1
+        while User.objects.filter(username=username).exists():
+            username = f"{base_username}{idx}"
+            idx += 1
+        parent_user = User.objects.create_user(username=username, email=email)
+        parent_user.is_parent = True
+        parent_user.set_password(DEFAULT_PARENT_PASSWORD)
+        parent_user.save()
+        attach_user_to_role_group(parent_user, ROLE_PARENT)
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark parent-account provisioning: the per-user loop vs provision_parents. "
+        "The loop hashes a password per user (twice), so it runs on a sample and is extrapolated. "
+        "Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--sample", type=int, default=20, help="Accounts for the per-user loop before extrapolating.")
+
+    def _measure(self, label, fn, emails, scale=1):
+        with transaction.atomic():
+            # half the emails share a local part with an existing account, so username probing has work to do
+            User.objects.bulk_create([User(username=f"benchparent{i}") for i in range(0, len(emails), 2)])
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                fn(emails)
+                elapsed = time.perf_counter() - start
+            transaction.set_rollback(True)
+        suffix = f"  (measured {len(emails)}, x{scale:g})" if scale != 1 else ""
+        self.stdout.write(
+            f"{label:<28} {elapsed * scale:9.2f} s  {len(ctx.captured_queries) * scale:9.0f} queries{suffix}"
+        )
+
+    def handle(self, *args, **options):
+        count = options["count"]
+        sample = min(options["sample"], count)
+        emails = [f"benchparent{i}@example.com" for i in range(count)]
+
+        self.stdout.write(f"Provisioning {count} parent accounts")
+        self._measure("before: one at a time", _one_at_a_time, emails[:sample], scale=count / sample)
+        self._measure("after: provision_parents", provision_parents, emails)
+        self._measure(
+            "after: unusable passwords",
+            lambda e: provision_parents(e, password=None),
+            emails,
+        )
@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-18 04:24
+
+import re
+
+from django.db import migrations, models
+
+STUDENT_ID_RE = re.compile(r"^(?P<prefix>[A-Za-z]+)(?P<seq>\d{3,})(?P<year>\d{4})$")
+
+
+def backfill_sequences(apps, schema_editor):
+    Student = apps.get_model("people", "Student")
+    StudentIdSequence = apps.get_model("registrar", "StudentIdSequence")
+    highest = {}
+    for sid in Student.objects.values_list("student_id", flat=True).iterator(chunk_size=2000):
+        m = STUDENT_ID_RE.match(sid)
+        if m:
+            key = (m.group("prefix"), int(m.group("year")))
+            highest[key] = max(highest.get(key, 0), int(m.group("seq")))
+    StudentIdSequence.objects.bulk_create([
+        StudentIdSequence(prefix=prefix, year=year, last_value=value)
+        for (prefix, year), value in highest.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrar', '0001_initial'),
+        ('people', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentIdSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefix', models.CharField(max_length=10)),
+                ('year', models.PositiveIntegerField()),
+                ('last_value', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('prefix', 'year')},
+            },
+        ),
+        migrations.RunPython(backfill_sequences, migrations.RunPython.noop),
+    ]
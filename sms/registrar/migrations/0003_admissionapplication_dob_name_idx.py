@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-18 15:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('registrar', '0002_studentidsequence'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='admissionapplication',
+            index=models.Index(fields=['date_of_birth', 'last_name'], name='registrar_app_dob_name_idx'),
+        ),
+    ]
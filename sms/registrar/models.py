@@ -33,5 +33,22 @@ class AdmissionApplication(models.Model):
     # Filled when admitted (MVP linking)
     admitted_student_id = models.CharField(max_length=30, blank=True)
 
+    class Meta:
+        # duplicate detection on bulk upload looks applications up by date of birth
+        indexes = [models.Index(fields=["date_of_birth", "last_name"], name="registrar_app_dob_name_idx")]
+
     def __str__(self):
         return f"{self.last_name}, {self.first_name} ({self.status})"
+
+
+class StudentIdSequence(models.Model):
+    """Last sequence number handed out per student ID prefix and year (IDs look like A0012025)."""
+    prefix = models.CharField(max_length=10)
+    year = models.PositiveIntegerField()
+    last_value = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("prefix", "year")
+
+    def __str__(self):
+        return f"{self.prefix}*{self.year}: {self.last_value}"
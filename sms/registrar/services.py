@@ -0,0 +1,391 @@
+import re
+from dataclasses import dataclass
+from datetime import datetime
+
+from django.db import transaction
+from django.db.models import Count
+from django.db.models.functions import Lower
+from django.utils import timezone
+
+from academics.models import ClassGroup, Enrollment
+from accounts.models import User
+from core.models import AcademicYear
+from people.models import Student
+from reports.metrics import invalidate_dashboard_metrics
+from .models import AdmissionApplication, StudentIdSequence
+from .services_parents import link_parents, provision_parents
+
+STUDENT_ID_PREFIX = "A"
+STUDENT_ID_RE = re.compile(r"^(?P<prefix>[A-Za-z]+)(?P<seq>\d{3,})(?P<year>\d{4})$")
+
+
+@dataclass
+class AdmitRow:
+    line: int
+    student_id: str
+    first_name: str
+    last_name: str
+    date_of_birth: object
+    grade: str
+    class_name: str
+    academic_year: str
+    parent_username: str
+    parent_email: str
+
+
+def parse_admit_rows(reader, default_grade="", default_class_group=""):
+    """Validate every CSV row up front. Returns ([AdmitRow], [errors]); nothing touches the database."""
+    return parse_numbered_admit_rows(enumerate(reader, start=2), default_grade, default_class_group)
+
+
+def parse_numbered_admit_rows(numbered_rows, default_grade="", default_class_group=""):
+    """parse_admit_rows for (line number, row) pairs, as import jobs hand them out."""
+    rows, errors = [], []
+    for idx, row in numbered_rows:
+        def col(name, default=""):
+            return (row.get(name) or default).strip()
+
+        fn, ln, dob_raw = col("first_name"), col("last_name"), col("date_of_birth")
+        class_name = col("class_group", default_class_group)
+        if not (fn and ln and dob_raw):
+            errors.append(f"Row {idx}: missing required fields (names, dob).")
+            continue
+        if not class_name:
+            errors.append(f"Row {idx}: missing class_group (and no default).")
+            continue
+        try:
+            dob = datetime.strptime(dob_raw, "%Y-%m-%d").date()
+        except ValueError:
+            errors.append(f"Row {idx}: invalid date_of_birth '{dob_raw}', expected YYYY-MM-DD.")
+            continue
+        rows.append(AdmitRow(
+            line=idx,
+            student_id=col("student_id"),
+            first_name=fn,
+            last_name=ln,
+            date_of_birth=dob,
+            grade=col("grade", default_grade),
+            class_name=class_name,
+            academic_year=col("academic_year"),
+            parent_username=col("parent_username"),
+            parent_email=col("parent_email"),
+        ))
+    return rows, errors
+
+
+def format_student_id(prefix: str, seq: int, year: int) -> str:
+    return f"{prefix}{seq:03d}{year}"
+
+
+def parse_student_id(student_id: str):
+    """(prefix, seq, year) for IDs in the generated format, else None."""
+    m = STUDENT_ID_RE.match(student_id)
+    if not m:
+        return None
+    return m.group("prefix"), int(m.group("seq")), int(m.group("year"))
+
+
+def highest_student_seq(prefix: str, year: int) -> int:
+    highest = 0
+    for sid in Student.objects.filter(student_id__startswith=prefix, student_id__endswith=str(year)).values_list("student_id", flat=True):
+        parsed = parse_student_id(sid)
+        if parsed and parsed[0] == prefix and parsed[2] == year:
+            highest = max(highest, parsed[1])
+    return highest
+
+
+def allocate_student_ids(year: int, n: int = 1, prefix: str = STUDENT_ID_PREFIX) -> list:
+    """
+    Reserve n consecutive student IDs for (prefix, year). The sequence row is
+    locked with select_for_update, so concurrent admits never get the same ID;
+    a (prefix, year) seen for the first time starts after the highest ID in
+    use. IDs typed in by hand that fall in the range are skipped over.
+    """
+    if n <= 0:
+        return []
+    with transaction.atomic():
+        seq, created = StudentIdSequence.objects.select_for_update().get_or_create(prefix=prefix, year=year)
+        if created:
+            seq.last_value = highest_student_seq(prefix, year)
+        ids = []
+        while len(ids) < n:
+            candidates = [
+                format_student_id(prefix, v, year)
+                for v in range(seq.last_value + 1, seq.last_value + 1 + n - len(ids))
+            ]
+            seq.last_value += len(candidates)
+            taken = set(Student.objects.filter(student_id__in=candidates).values_list("student_id", flat=True))
+            ids.extend(c for c in candidates if c not in taken)
+        seq.save(update_fields=["last_value"])
+    return ids
+
+
+def backfill_student_id_sequences() -> int:
+    """Raise every sequence to at least the highest existing ID for its (prefix, year). Returns rows touched."""
+    highest = {}
+    for sid in Student.objects.values_list("student_id", flat=True).iterator(chunk_size=2000):
+        parsed = parse_student_id(sid)
+        if parsed:
+            prefix, value, year = parsed
+            highest[(prefix, year)] = max(highest.get((prefix, year), 0), value)
+
+    touched = 0
+    with transaction.atomic():
+        current = {
+            (s.prefix, s.year): s
+            for s in StudentIdSequence.objects.select_for_update().filter(prefix__in={p for p, _ in highest})
+        }
+        for key, value in highest.items():
+            seq = current.get(key)
+            if seq is None:
+                StudentIdSequence.objects.create(prefix=key[0], year=key[1], last_value=value)
+                touched += 1
+            elif seq.last_value < value:
+                seq.last_value = value
+                seq.save(update_fields=["last_value"])
+                touched += 1
+    return touched
+
+
+def _resolve_class_groups(chunk) -> dict:
+    """(class name, academic year id) -> ClassGroup, creating missing groups in one insert."""
+    wanted = {}
+    for r, ay in chunk:
+        wanted.setdefault((r.class_name, ay.id), ClassGroup(name=r.class_name, academic_year=ay, grade_level=r.grade or r.class_name))
+    names = {name for name, _ in wanted}
+    year_ids = {ay_id for _, ay_id in wanted}
+
+    def fetch():
+        return {
+            (cg.name, cg.academic_year_id): cg
+            for cg in ClassGroup.objects.filter(name__in=names, academic_year_id__in=year_ids)
+        }
+
+    groups = fetch()
+    missing = [cg for key, cg in wanted.items() if key not in groups]
+    if missing:
+        ClassGroup.objects.bulk_create(missing, ignore_conflicts=True)
+        groups = fetch()
+    return groups
+
+
+def _import_chunk(chunk, summary, touched_classes) -> list:
+    errors = []
+    groups = _resolve_class_groups(chunk)
+
+    # student IDs for rows without one, one allocation per admission year
+    need_ids = {}
+    for r, ay in chunk:
+        if not r.student_id:
+            year = ay.start_date.year if ay.start_date else timezone.localdate().year
+            need_ids.setdefault(year, []).append(r)
+    for year, year_rows in need_ids.items():
+        for r, sid in zip(year_rows, allocate_student_ids(year, len(year_rows))):
+            r.student_id = sid
+
+    sids = {r.student_id for r, _ in chunk}
+    students = {s.student_id: s for s in Student.objects.filter(student_id__in=sids)}
+    today = timezone.localdate()
+    new_students = {}
+    for r, _ in chunk:
+        if r.student_id not in students and r.student_id not in new_students:
+            new_students[r.student_id] = Student(
+                student_id=r.student_id,
+                first_name=r.first_name,
+                last_name=r.last_name,
+                date_of_birth=r.date_of_birth,
+                admission_date=today,
+                grade=r.grade,
+            )
+    if new_students:
+        Student.objects.bulk_create(new_students.values())
+        students.update((s.student_id, s) for s in Student.objects.filter(student_id__in=new_students))
+        summary["students_created"] += len(new_students)
+
+    enrolled = {
+        (student_id, ay_id): cg_id
+        for student_id, ay_id, cg_id in Enrollment.objects.filter(
+            student_id__in=[s.id for s in students.values()],
+            academic_year_id__in={ay.id for _, ay in chunk},
+        ).values_list("student_id", "academic_year_id", "class_group_id")
+    }
+    new_enrollments = []
+    for r, ay in chunk:
+        student, cg = students[r.student_id], groups[(r.class_name, ay.id)]
+        touched_classes[cg.id] = cg
+        current = enrolled.get((student.id, ay.id))
+        if current is None:
+            enrolled[(student.id, ay.id)] = cg.id
+            new_enrollments.append(Enrollment(student=student, class_group=cg, academic_year=ay))
+        elif current != cg.id:
+            errors.append(f"Row {r.line}: {r.student_id} is already enrolled in another class for {ay}; enrollment skipped.")
+    Enrollment.objects.bulk_create(new_enrollments)
+    summary["enrollments_created"] += len(new_enrollments)
+
+    by_username = {
+        u.username: u
+        for u in User.objects.filter(username__in={r.parent_username for r, _ in chunk if r.parent_username})
+    }
+    emails = sorted({r.parent_email for r, _ in chunk if r.parent_email and not r.parent_username})
+    by_email = provision_parents(emails) if emails else {}
+
+    links = set()
+    for r, _ in chunk:
+        student = students[r.student_id]
+        if r.parent_username:
+            parent = by_username.get(r.parent_username)
+            if parent is None:
+                errors.append(f"Row {r.line}: parent username '{r.parent_username}' not found; skipped link.")
+                continue
+        elif r.parent_email:
+            parent = by_email[r.parent_email]
+        else:
+            continue
+        links.add((student.id, parent.id))
+        summary["parents_linked"] += 1
+    link_parents(links)
+    return errors
+
+
+def import_admissions(rows, academic_year, chunk_size: int = 500) -> dict:
+    """
+    Write validated AdmitRows in one transaction. Each chunk resolves class
+    groups, students, enrollments and parent accounts with a fixed number of
+    IN queries and writes with bulk_create, so the query count does not grow
+    with the chunk size. academic_year is the fallback for rows naming none.
+    Returns the summary counters plus "errors" (per-row notes).
+    """
+    summary = {"students_created": 0, "enrollments_created": 0, "parents_linked": 0, "skipped": 0}
+    errors = []
+
+    years = {
+        ay.name: ay
+        for ay in AcademicYear.objects.filter(name__in={r.academic_year for r in rows if r.academic_year})
+    }
+    resolved = []
+    for r in rows:
+        ay = academic_year
+        if r.academic_year:
+            ay = years.get(r.academic_year)
+            if ay is None:
+                errors.append(f"Row {r.line}: academic_year '{r.academic_year}' not found; using current.")
+                ay = academic_year
+        if ay is None:
+            summary["skipped"] += 1
+            errors.append(f"Row {r.line}: no academic year available; create one first.")
+            continue
+        resolved.append((r, ay))
+
+    touched_classes = {}
+    with transaction.atomic():
+        for start in range(0, len(resolved), chunk_size):
+            errors.extend(_import_chunk(resolved[start:start + chunk_size], summary, touched_classes))
+    if summary["students_created"]:
+        invalidate_dashboard_metrics()
+
+    # capacity warnings for classes that declare one, in one grouped count
+    limited = {cg.id: cg for cg in touched_classes.values() if getattr(cg, "capacity", None)}
+    if limited:
+        counts = Enrollment.objects.filter(class_group_id__in=limited).values("class_group_id").annotate(n=Count("id"))
+        for c in counts:
+            cg = limited[c["class_group_id"]]
+            if c["n"] > cg.capacity:
+                errors.append(f"Class {cg.name} over capacity ({c['n']}/{cg.capacity}).")
+
+    summary["errors"] = errors
+    return summary
+
+
+def import_admit_rows(numbered_rows, options) -> dict:
+    """ImportJob processor for bulk admit files; options carry the form defaults and academic_year_id."""
+    rows, errors = parse_numbered_admit_rows(
+        numbered_rows, options.get("default_grade", ""), options.get("default_class_group", "")
+    )
+    academic_year = AcademicYear.objects.filter(pk=options.get("academic_year_id")).first()
+    summary = import_admissions(rows, academic_year)
+    return {
+        "created": summary["students_created"],
+        "skipped": summary["skipped"] + len(errors),
+        "errors": errors + summary["errors"],
+        "enrollments_created": summary["enrollments_created"],
+        "parents_linked": summary["parents_linked"],
+    }
+
+
+def _application_key(first_name, last_name, date_of_birth, guardian_email):
+    return (first_name.casefold(), last_name.casefold(), date_of_birth, guardian_email.casefold())
+
+
+def import_applications(numbered_rows, chunk_size: int = 500) -> dict:
+    """
+    Validate (line number, row) pairs in memory and bulk-insert them chunk_size
+    at a time. A row matching an existing application, or an earlier row, on
+    (first_name, last_name, date_of_birth, guardian_email) is a duplicate and
+    is not inserted; existing applications are checked with one query per chunk.
+    Returns {"created", "duplicates", "invalid", "errors"}.
+    """
+    summary = {"created": 0, "duplicates": 0, "invalid": 0, "errors": []}
+    valid = []
+    for idx, row in numbered_rows:
+        fn = (row.get("first_name") or "").strip()
+        ln = (row.get("last_name") or "").strip()
+        dob_raw = (row.get("date_of_birth") or "").strip()
+        guardian_name = (row.get("guardian_name") or "").strip()
+        if not (fn and ln and dob_raw and guardian_name):
+            summary["invalid"] += 1
+            summary["errors"].append(f"Row {idx}: missing required fields (first/last/dob/guardian).")
+            continue
+        try:
+            dob = datetime.strptime(dob_raw, "%Y-%m-%d").date()
+        except ValueError:
+            summary["invalid"] += 1
+            summary["errors"].append(f"Row {idx}: invalid date_of_birth '{dob_raw}', expected YYYY-MM-DD.")
+            continue
+        valid.append(AdmissionApplication(
+            first_name=fn,
+            last_name=ln,
+            date_of_birth=dob,
+            requested_grade=(row.get("requested_grade") or "").strip(),
+            guardian_name=guardian_name,
+            guardian_phone=(row.get("guardian_phone") or "").strip(),
+            guardian_email=(row.get("guardian_email") or "").strip(),
+            guardian_relationship=(row.get("guardian_relationship") or "").strip(),
+            notes=(row.get("notes") or "").strip(),
+            status="new",
+        ))
+
+    seen = set()
+    with transaction.atomic():
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
+            existing = AdmissionApplication.objects.alias(fn=Lower("first_name")).filter(
+                date_of_birth__in={a.date_of_birth for a in chunk},
+                fn__in={a.first_name.casefold() for a in chunk},
+            ).values_list("first_name", "last_name", "date_of_birth", "guardian_email")
+            seen.update(_application_key(*values) for values in existing)
+
+            new = []
+            for a in chunk:
+                key = _application_key(a.first_name, a.last_name, a.date_of_birth, a.guardian_email)
+                if key in seen:
+                    summary["duplicates"] += 1
+                    continue
+                seen.add(key)
+                new.append(a)
+            AdmissionApplication.objects.bulk_create(new, batch_size=chunk_size)
+            summary["created"] += len(new)
+    if summary["created"]:
+        invalidate_dashboard_metrics()
+    return summary
+
+
+def import_application_rows(numbered_rows, options) -> dict:
+    """ImportJob processor for admission application files."""
+    summary = import_applications(numbered_rows)
+    return {
+        "created": summary["created"],
+        "skipped": summary["duplicates"] + summary["invalid"],
+        "errors": summary["errors"],
+        "duplicates": summary["duplicates"],
+        "invalid": summary["invalid"],
+    }
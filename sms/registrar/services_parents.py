@@ -0,0 +1,102 @@
+from collections import Counter
+from functools import reduce
+from operator import or_
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group
+from django.db import transaction
+from django.db.models import Q
+
+from accounts.models import User
+from people.models import Student
+from rbac.constants import ROLE_PARENT
+from rbac.services import refresh_user_permissions
+
+DEFAULT_PARENT_PASSWORD = "ChangeMe123!"
+
+
+def username_base(email: str) -> str:
+    return (email.split("@")[0] if "@" in email else email).lower() or "parent"
+
+
+def reserve_usernames(bases, chunk_size: int = 200) -> list:
+    """
+    First unused username (base, base1, base2, ...) for each base, in order.
+    One IN query finds which bases are taken; those, and bases repeated
+    within the batch, are probed for numbered variants with a prefix query
+    per chunk_size bases.
+    """
+    bases = list(bases)
+    if not bases:
+        return []
+    unique = set(bases)
+    taken = set(User.objects.filter(username__in=unique).values_list("username", flat=True))
+    # a repeated base needs base1, base2, ... even when base itself is free
+    repeated = {b for b, n in Counter(bases).items() if n > 1}
+    colliding = sorted((unique & taken) | repeated)
+    for start in range(0, len(colliding), chunk_size):
+        prefixes = colliding[start:start + chunk_size]
+        taken.update(
+            User.objects.filter(reduce(or_, (Q(username__startswith=b) for b in prefixes))).values_list("username", flat=True)
+        )
+    usernames = []
+    for base in bases:
+        username, n = base, 1
+        while username in taken:
+            username = f"{base}{n}"
+            n += 1
+        taken.add(username)
+        usernames.append(username)
+    return usernames
+
+
+def create_parent_accounts(specs, password=DEFAULT_PARENT_PASSWORD) -> list:
+    """
+    Create one parent account per (email, username base) spec, in order, with
+    one username query, one user insert and one Parent group insert. The
+    password is hashed once for the whole batch; pass password=None to give
+    each account an unusable password so it must be reset before first login.
+    """
+    specs = list(specs)
+    if not specs:
+        return []
+    shared_hash = make_password(password) if password is not None else None
+    usernames = reserve_usernames(base for _, base in specs)
+
+    with transaction.atomic():
+        User.objects.bulk_create([
+            User(username=username, email=email, is_parent=True, password=shared_hash or make_password(None))
+            for username, (email, _) in zip(usernames, specs)
+        ])
+        by_username = {u.username: u for u in User.objects.filter(username__in=usernames)}
+        group, _ = Group.objects.get_or_create(name=ROLE_PARENT)
+        Membership = User.groups.through
+        Membership.objects.bulk_create(
+            [Membership(user_id=u.id, group_id=group.id) for u in by_username.values()], ignore_conflicts=True
+        )
+        # bulk_create skips m2m_changed, so refresh the permission closure directly
+        refresh_user_permissions([u.id for u in by_username.values()])
+    return [by_username[username] for username in usernames]
+
+
+def provision_parents(emails, password=DEFAULT_PARENT_PASSWORD) -> dict:
+    """
+    {email: parent User} for emails. Parent accounts already using an email
+    are reused; the rest are created in bulk by create_parent_accounts.
+    """
+    emails = list(dict.fromkeys(e for e in emails if e))
+    found = {}
+    for user in User.objects.filter(email__in=emails, is_parent=True).order_by("id"):
+        found.setdefault(user.email, user)
+    new_emails = [e for e in emails if e not in found]
+    for user in create_parent_accounts([(e, username_base(e)) for e in new_emails], password=password):
+        found[user.email] = user
+    return found
+
+
+def link_parents(pairs) -> None:
+    """Bulk-link (student id, parent user id) pairs; existing links are left alone."""
+    Link = Student.parent_users.through
+    Link.objects.bulk_create(
+        [Link(student_id=student_id, user_id=user_id) for student_id, user_id in set(pairs)], ignore_conflicts=True
+    )
@@ -1,3 +1,195 @@
+import csv
+from datetime import date
+from io import StringIO
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from academics.models import ClassGroup, Enrollment
+from accounts.models import User
+from core.models import AcademicYear
+from people.models import Student
+from rbac.models import UserPermission
+from .models import AdmissionApplication, StudentIdSequence
+from .services_parents import create_parent_accounts, provision_parents
+from .services import (
+    allocate_student_ids, backfill_student_id_sequences, import_admissions, import_applications, parse_admit_rows,
+)
+
+HEADER = "student_id,first_name,last_name,date_of_birth,grade,class_group,academic_year,parent_username,parent_email\n"
+
+
+def _csv(lines):
+    return csv.DictReader(StringIO(HEADER + "\n".join(lines)))
+
+
+class BulkAdmitImportTests(TestCase):
+    def setUp(self):
+        self.year = AcademicYear.objects.create(name="2025", start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+        User.objects.create_user(username="edna", email="edna@example.com", is_parent=True)
+
+    def _lines(self, n, offset=0):
+        return [
+            f",Kid,{offset + i},2015-01-0{i % 9 + 1},Form 1,Form 1{'AB'[i % 2]},,,parent{offset + i}@example.com"
+            for i in range(n)
+        ]
+
+    def _import(self, lines, chunk_size=500):
+        rows, errors = parse_admit_rows(_csv(lines))
+        with CaptureQueriesContext(connection) as ctx:
+            summary = import_admissions(rows, self.year, chunk_size=chunk_size)
+        return summary, errors, len(ctx.captured_queries)
+
+    def test_constant_queries_per_chunk(self):
+        self._import(self._lines(2))  # creates the class groups
+        counts = []
+        offset = 2
+        for chunks in (1, 2, 3):
+            summary, _, queries = self._import(self._lines(40 * chunks, offset), chunk_size=40)
+            self.assertEqual(summary["students_created"], 40 * chunks)
+            offset += 40 * chunks
+            counts.append(queries)
+        per_chunk = counts[1] - counts[0]
+        self.assertEqual(counts[2] - counts[1], per_chunk)
+        self.assertLessEqual(per_chunk, 25)
+
+        self.assertEqual(Enrollment.objects.count(), offset)
+        self.assertEqual(ClassGroup.objects.count(), 2)
+        self.assertEqual(User.objects.filter(is_parent=True, groups__name="Parent").count(), offset)
+        self.assertTrue(Student.objects.filter(student_id=f"A{offset:03d}2025").exists())
+
+    def test_row_errors_and_existing_parents(self):
+        lines = [
+            "S1,Ann,Moyo,2015-02-01,,Form 1A,,edna,",
+            "S2,Ben,Moyo,2015-02-31,,Form 1A,,,",
+            "S3,Cat,Moyo,2015-02-01,,Form 1A,1999,ghost,",
+            ",Dan,Moyo,2015-02-01,,,,,",
+            "S4,Eve,Moyo,2015-02-01,,Form 1B,,,edna@example.com",
+            "S4,Eve,Moyo,2015-02-01,,Form 1A,,,",
+        ]
+        rows, errors = parse_admit_rows(_csv(lines))
+        self.assertEqual(len(errors), 2)
+        summary = import_admissions(rows, self.year)
+        self.assertEqual(summary["students_created"], 3)
+        self.assertEqual(summary["parents_linked"], 2)
+        notes = "\n".join(summary["errors"])
+        self.assertIn("academic_year '1999' not found", notes)
+        self.assertIn("parent username 'ghost' not found", notes)
+        self.assertIn("S4 is already enrolled in another class", notes)
+        edna = User.objects.get(username="edna")
+        self.assertEqual(set(edna.linked_students.values_list("student_id", flat=True)), {"S1", "S4"})
+        self.assertEqual(User.objects.count(), 1)
+
+    def test_new_parents_get_role_group_permissions(self):
+        from django.contrib.auth.models import Group, Permission
+        group = Group.objects.create(name="Parent")
+        group.permissions.add(Permission.objects.get(codename="view_feeinvoice"))
+        self._import(self._lines(3))
+        parent = User.objects.get(email="parent0@example.com")
+        self.assertTrue(UserPermission.objects.filter(user=parent, code="finance.view_feeinvoice").exists())
+        self.assertTrue(parent.check_password("ChangeMe123!"))
+
+
+class StudentIdSequenceTests(TestCase):
+    def _student(self, sid):
+        return Student.objects.create(
+            student_id=sid, first_name="Kid", last_name=sid,
+            date_of_birth=date(2015, 1, 1), admission_date=date(2025, 1, 1),
+        )
+
+    def test_first_allocation_continues_after_existing_ids(self):
+        self._student("A0072025")
+        self._student("A0032025")
+        self._student("B0502025")
+        self.assertEqual(allocate_student_ids(2025, 2), ["A0082025", "A0092025"])
+        self.assertEqual(allocate_student_ids(2026), ["A0012026"])
+
+    def test_bulk_allocation_is_constant_queries(self):
+        allocate_student_ids(2025)
+        with self.assertNumQueries(5):  # savepoint, locked get, collision check, update, release
+            ids = allocate_student_ids(2025, 500)
+        self.assertEqual(ids[0], "A0022025")
+        self.assertEqual(ids[-1], "A5012025")
+
+    def test_hand_entered_ids_are_skipped(self):
+        allocate_student_ids(2025)
+        self._student("A0022025")
+        self.assertEqual(allocate_student_ids(2025, 2), ["A0032025", "A0042025"])
+
+    def test_backfill_raises_sequences(self):
+        allocate_student_ids(2025)
+        self._student("A0402025")
+        self._student("A0102024")
+        self.assertEqual(backfill_student_id_sequences(), 2)
+        self.assertEqual(StudentIdSequence.objects.get(prefix="A", year=2024).last_value, 10)
+        self.assertEqual(allocate_student_ids(2025), ["A0412025"])
+
+
+class ParentProvisioningTests(TestCase):
+    def test_batch_reserves_usernames_and_hashes_once(self):
+        User.objects.create_user(username="mary")
+        User.objects.create_user(username="mary1")
+        existing = User.objects.create_user(username="old", email="old@example.com", is_parent=True)
+        emails = ["mary@a.com", "mary@b.com", "old@example.com"] + [f"p{i}@example.com" for i in range(100)]
+
+        with CaptureQueriesContext(connection) as ctx:
+            parents = provision_parents(emails)
+        self.assertLess(len(ctx.captured_queries), 25)
+
+        self.assertEqual(parents["old@example.com"], existing)
+        self.assertEqual(parents["mary@a.com"].username, "mary2")
+        self.assertEqual(parents["mary@b.com"].username, "mary3")
+        self.assertEqual(User.objects.filter(is_parent=True, groups__name="Parent").count(), 102)
+        hashes = set(User.objects.filter(email__endswith="@example.com").exclude(pk=existing.pk).values_list("password", flat=True))
+        self.assertEqual(len(hashes), 1)
+        self.assertTrue(parents["p0@example.com"].check_password("ChangeMe123!"))
+
+    def test_repeated_free_base_skips_taken_numbered_names(self):
+        User.objects.create_user(username="mary1")
+        parents = provision_parents(["mary@a.com", "mary@b.com"])
+        self.assertEqual((parents["mary@a.com"].username, parents["mary@b.com"].username), ("mary", "mary2"))
+
+    def test_unusable_password_mode(self):
+        [parent] = create_parent_accounts([("", "parenta0012025")], password=None)
+        self.assertEqual(parent.username, "parenta0012025")
+        self.assertFalse(parent.has_usable_password())
+
+
+class ApplicationImportTests(TestCase):
+    def _rows(self, n, **overrides):
+        return [
+            (i + 2, {
+                "first_name": f"Kid{i}",
+                "last_name": "Moyo",
+                "date_of_birth": "2015-03-0%d" % (i % 9 + 1),
+                "guardian_name": "Rudo Moyo",
+                "guardian_email": f"rudo{i}@example.com",
+                **overrides,
+            })
+            for i in range(n)
+        ]
+
+    def test_counts_created_duplicate_and_invalid(self):
+        AdmissionApplication.objects.create(
+            first_name="KID0", last_name="moyo", date_of_birth=date(2015, 3, 1),
+            guardian_name="Rudo Moyo", guardian_email="Rudo0@example.com",
+        )
+        rows = self._rows(5) + self._rows(2)   # two repeated lines
+        rows.append((99, {"first_name": "No", "last_name": "Date", "date_of_birth": "soon", "guardian_name": "G"}))
+
+        summary = import_applications(rows)
+
+        self.assertEqual((summary["created"], summary["duplicates"], summary["invalid"]), (4, 3, 1))
+        self.assertEqual(len(summary["errors"]), 1)
+        self.assertEqual(AdmissionApplication.objects.count(), 5)
+
+    def test_reupload_creates_nothing_with_one_lookup_per_chunk(self):
+        rows = self._rows(120)
+        import_applications(rows, chunk_size=50)
+        with CaptureQueriesContext(connection) as ctx:
+            summary = import_applications(rows, chunk_size=50)
+        self.assertEqual((summary["created"], summary["duplicates"]), (0, 120))
+        lookups = [q for q in ctx.captured_queries if q["sql"].startswith("SELECT")]
+        self.assertEqual(len(lookups), 3)
 
-# Create your tests here.
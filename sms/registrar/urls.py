@@ -5,6 +5,8 @@ from .views import (
     application_detail,
     mark_status,
     admit_application,
+    bulk_applications_upload,
+    bulk_admit_upload,
 )
 
 app_name = "registrar"
@@ -15,4 +17,6 @@ urlpatterns = [
     path("application/<int:app_id>/", application_detail, name="application_detail"),
     path("application/<int:app_id>/status/<str:status>/", mark_status, name="mark_status"),
     path("application/<int:app_id>/admit/", admit_application, name="admit_application"),
+    path("bulk/applications/", bulk_applications_upload, name="bulk_applications_upload"),
+    path("bulk/admit/", bulk_admit_upload, name="bulk_admit_upload"),
 ]
@@ -11,11 +11,9 @@ from academics.models import Enrollment, ClassGroup
 from core.models import AcademicYear, SchoolSettings
 from .forms import AdmissionApplicationForm, AdmitForm, BulkApplicationUploadForm, BulkAdmitUploadForm
 from .models import AdmissionApplication
-from rbac.utils import attach_user_to_role_group
-from rbac.constants import ROLE_PARENT
-import csv
-from io import TextIOWrapper
-from datetime import datetime
+from .services import allocate_student_ids
+from .services_parents import DEFAULT_PARENT_PASSWORD, create_parent_accounts, link_parents, username_base
+from core.services_imports import enqueue_import
 from django.db import transaction
 
 def _is_registrarish(u):
@@ -31,14 +29,7 @@ def _current_academic_year():
 
 def _generate_student_id(year: int) -> str:
     """Generate a student ID like A0012025 (A + sequence + year)."""
-    prefix = "A"
-    year_suffix = str(year)
-    seq = 1
-    while True:
-        candidate = f"{prefix}{seq:03d}{year_suffix}"
-        if not Student.objects.filter(student_id=candidate).exists():
-            return candidate
-        seq += 1
+    return allocate_student_ids(year, 1)[0]
 
 
 def _build_admit_form(app, data=None):
@@ -215,19 +206,10 @@ def admit_application(request, app_id: int):
         # auto-provision parent user
         if not parent_email:
             parent_email = app.guardian_email or ""
-        base_username = (parent_email.split("@")[0] if parent_email else f"parent{student.student_id}").lower() or f"parent{student.student_id}"
-        username = base_username
-        idx = 1
-        while User.objects.filter(username=username).exists():
-            username = f"{base_username}{idx}"
-            idx += 1
-        parent_user = User.objects.create_user(username=username, email=parent_email or "")
-        parent_user.is_parent = True
-        parent_user.set_password("ChangeMe123!")
-        parent_user.save()
-        attach_user_to_role_group(parent_user, ROLE_PARENT)
-        student.parent_users.add(parent_user)
-        messages.success(request, f"Parent account created: {username} (password: ChangeMe123!).")
+        base = username_base(parent_email) if parent_email else f"parent{student.student_id}".lower()
+        parent_user = create_parent_accounts([(parent_email, base)])[0]
+        link_parents([(student.id, parent_user.id)])
+        messages.success(request, f"Parent account created: {parent_user.username} (password: {DEFAULT_PARENT_PASSWORD}).")
 
     # capacity warning
     enrolled = Enrollment.objects.filter(class_group=class_group, academic_year=ay).count()
@@ -280,50 +262,11 @@ def bulk_applications_upload(request):
         return redirect("accounts:dashboard")
 
     form = BulkApplicationUploadForm(request.POST or None, request.FILES or None)
-    summary = None
-    errors = []
-
     if request.method == "POST" and form.is_valid():
-        f = request.FILES.get("csv_file")
-        created = 0
-        skipped = 0
-        try:
-            reader = csv.DictReader(TextIOWrapper(f.file, encoding="utf-8-sig"))
-            for idx, row in enumerate(reader, start=2):
-                fn = (row.get("first_name") or "").strip()
-                ln = (row.get("last_name") or "").strip()
-                dob_raw = (row.get("date_of_birth") or "").strip()
-                guardian_name = (row.get("guardian_name") or "").strip()
-                if not (fn and ln and dob_raw and guardian_name):
-                    skipped += 1
-                    errors.append(f"Row {idx}: missing required fields (first/last/dob/guardian).")
-                    continue
-                try:
-                    dob = datetime.strptime(dob_raw, "%Y-%m-%d").date()
-                except ValueError:
-                    skipped += 1
-                    errors.append(f"Row {idx}: invalid date_of_birth '{dob_raw}', expected YYYY-MM-DD.")
-                    continue
-
-                AdmissionApplication.objects.create(
-                    first_name=fn,
-                    last_name=ln,
-                    date_of_birth=dob,
-                    requested_grade=(row.get("requested_grade") or "").strip(),
-                    guardian_name=guardian_name,
-                    guardian_phone=(row.get("guardian_phone") or "").strip(),
-                    guardian_email=(row.get("guardian_email") or "").strip(),
-                    guardian_relationship=(row.get("guardian_relationship") or "").strip(),
-                    notes=(row.get("notes") or "").strip(),
-                    status="new",
-                )
-                created += 1
-            summary = {"created": created, "skipped": skipped}
-            messages.success(request, "Bulk applications imported.")
-        except Exception as exc:
-            messages.error(request, f"Import failed: {exc}")
-
-    return render(request, "registrar/bulk_applications_upload.html", {"form": form, "summary": summary, "errors": errors})
+        job = enqueue_import("applications", form.cleaned_data["csv_file"], request.user)
+        return redirect("core:import_job_detail", job_id=job.id)
+
+    return render(request, "registrar/bulk_applications_upload.html", {"form": form})
 
 
 @login_required
@@ -334,124 +277,14 @@ def bulk_admit_upload(request):
         return redirect("accounts:dashboard")
 
     form = BulkAdmitUploadForm(request.POST or None, request.FILES or None)
-    summary = None
-    errors = []
-
     if request.method == "POST" and form.is_valid():
-        f = request.FILES.get("csv_file")
-        default_grade = (form.cleaned_data.get("default_grade") or "").strip()
-        default_class_group = (form.cleaned_data.get("default_class_group") or "").strip()
-        created_students = 0
-        enrollments_created = 0
-        parent_linked = 0
-        skipped = 0
-
-        ay = _current_academic_year()
-        try:
-            reader = csv.DictReader(TextIOWrapper(f.file, encoding="utf-8-sig"))
-            for idx, row in enumerate(reader, start=2):
-                sid = (row.get("student_id") or "").strip()
-                fn = (row.get("first_name") or "").strip()
-                ln = (row.get("last_name") or "").strip()
-                dob_raw = (row.get("date_of_birth") or "").strip()
-                grade = (row.get("grade") or default_grade).strip()
-                class_name = (row.get("class_group") or default_class_group).strip()
-                ay_name = (row.get("academic_year") or "").strip()
-                parent_username = (row.get("parent_username") or "").strip()
-                parent_email = (row.get("parent_email") or "").strip()
-
-                if not (fn and ln and dob_raw):
-                    skipped += 1
-                    errors.append(f"Row {idx}: missing required fields (names, dob).")
-                    continue
-                if not class_name:
-                    skipped += 1
-                    errors.append(f"Row {idx}: missing class_group (and no default).")
-                    continue
-                try:
-                    dob = datetime.strptime(dob_raw, "%Y-%m-%d").date()
-                except ValueError:
-                    skipped += 1
-                    errors.append(f"Row {idx}: invalid date_of_birth '{dob_raw}', expected YYYY-MM-DD.")
-                    continue
-
-                ay_obj = ay
-                if ay_name:
-                    ay_obj = AcademicYear.objects.filter(name=ay_name).first()
-                    if not ay_obj:
-                        errors.append(f"Row {idx}: academic_year '{ay_name}' not found; using current.")
-                        ay_obj = ay
-
-                if not ay_obj:
-                    skipped += 1
-                    errors.append(f"Row {idx}: no academic year available; create one first.")
-                    continue
-
-                cg, _ = ClassGroup.objects.get_or_create(
-                    name=class_name,
-                    academic_year=ay_obj,
-                    defaults={"grade_level": grade or class_name},
-                )
-
-                # Generate student ID if not provided
-                if not sid:
-                    sid = _generate_student_id(year=ay_obj.start_date.year if ay_obj.start_date else timezone.localdate().year)
-
-                student, was_created = Student.objects.get_or_create(
-                    student_id=sid,
-                    defaults={
-                        "first_name": fn,
-                        "last_name": ln,
-                        "grade": grade,
-                        "student_number": sid,
-                    },
-                )
-                if was_created:
-                    created_students += 1
-                if not student.student_number:
-                    student.student_number = sid
-                    student.save(update_fields=["student_number"])
-                enr, enr_created = Enrollment.objects.get_or_create(student=student, class_group=cg, academic_year=ay_obj)
-                if enr_created:
-                    enrollments_created += 1
-
-                if parent_username:
-                    try:
-                        parent = User.objects.get(username=parent_username)
-                        student.guardians.add(parent)
-                        parent_linked += 1
-                    except User.DoesNotExist:
-                        errors.append(f"Row {idx}: parent username '{parent_username}' not found; skipped link.")
-                elif parent_email:
-                    base_username = parent_email.split("@")[0].lower() if "@" in parent_email else parent_email
-                    if not base_username:
-                        base_username = f"parent{sid}"
-                    username = base_username
-                    u_idx = 1
-                    while User.objects.filter(username=username).exists():
-                        username = f"{base_username}{u_idx}"
-                        u_idx += 1
-                    parent_user = User.objects.create_user(username=username, email=parent_email)
-                    parent_user.is_parent = True
-                    parent_user.set_password("ChangeMe123!")
-                    parent_user.save()
-                    attach_user_to_role_group(parent_user, ROLE_PARENT)
-                    student.guardians.add(parent_user)
-                    parent_linked += 1
-
-                # capacity warning
-                enrolled = Enrollment.objects.filter(class_group=cg, academic_year=ay_obj).count()
-                if cg.capacity and enrolled > cg.capacity:
-                    errors.append(f"Row {idx}: class {cg.name} over capacity ({enrolled}/{cg.capacity}).")
-
-            summary = {
-                "students_created": created_students,
-                "enrollments_created": enrollments_created,
-                "parents_linked": parent_linked,
-                "skipped": skipped,
-            }
-            messages.success(request, "Bulk admit/import completed.")
-        except Exception as exc:
-            messages.error(request, f"Import failed: {exc}")
-
-    return render(request, "registrar/bulk_admit_upload.html", {"form": form, "summary": summary, "errors": errors})
+        academic_year = _current_academic_year()
+        options = {
+            "default_grade": (form.cleaned_data.get("default_grade") or "").strip(),
+            "default_class_group": (form.cleaned_data.get("default_class_group") or "").strip(),
+            "academic_year_id": academic_year.id if academic_year else None,
+        }
+        job = enqueue_import("admit", form.cleaned_data["csv_file"], request.user, options)
+        return redirect("core:import_job_detail", job_id=job.id)
+
+    return render(request, "registrar/bulk_admit_upload.html", {"form": form})
@@ -0,0 +1,88 @@
+from django.db.models import Avg, Count, ExpressionWrapper, F, FloatField, Q
+
+from academics.models import AttendanceRecord, Enrollment, Grade
+from finance.models import StudentBalance
+from .services import monthly_report_students
+
+COHORT_CSV_HEADER = [
+    "student_id", "first_name", "last_name", "grade", "class",
+    "present", "late", "absent", "attendance_total", "attendance_rate",
+    "grades_count", "grade_average_pct",
+    "invoiced", "paid", "balance",
+]
+
+
+def cohort_report(start_date, end_date, class_group=None, grade=None) -> list:
+    """
+    Attendance, grade and fee summaries for every student in a class group
+    (via enrollment) or grade between start_date and end_date, in five
+    queries however large the cohort: students, then one grouped query
+    each for attendance, grades, fees and enrollments. The other four
+    filter by the student query as a subquery, not an id list.
+    Returns one dict per student, ordered by name.
+    """
+    students_qs = monthly_report_students(class_group=class_group, grade=grade)
+    students = list(students_qs)
+    ids = students_qs.order_by().values("id")
+
+    attendance = {
+        r["student_id"]: r
+        for r in AttendanceRecord.objects.filter(student__in=ids, date__gte=start_date, date__lte=end_date)
+        .values("student_id").annotate(
+            present=Count("id", filter=Q(status="present")),
+            late=Count("id", filter=Q(status="late")),
+            absent=Count("id", filter=Q(status="absent")),
+            total=Count("id"),
+        ).order_by()
+    }
+
+    pct = ExpressionWrapper(F("score") * 100.0 / F("assessment__max_score"), output_field=FloatField())
+    grades = {
+        r["student_id"]: r
+        for r in Grade.objects.filter(
+            student__in=ids, assessment__date__gte=start_date, assessment__date__lte=end_date,
+            assessment__max_score__gt=0,
+        ).values("student_id").annotate(count=Count("id"), average=Avg(pct)).order_by()
+    }
+
+    fees = {b.student_id: b for b in StudentBalance.objects.filter(student__in=ids)}
+
+    # latest enrollment wins
+    classes = {}
+    for student_id, name in Enrollment.objects.filter(student__in=ids)\
+            .order_by("academic_year__start_date", "id").values_list("student_id", "class_group__name"):
+        classes[student_id] = name
+
+    rows = []
+    for s in students:
+        att = attendance.get(s.id, {"present": 0, "late": 0, "absent": 0, "total": 0})
+        g = grades.get(s.id, {"count": 0, "average": None})
+        b = fees.get(s.id) or StudentBalance(student_id=s.id)
+        rows.append({
+            "student": s,
+            "class_group": classes.get(s.id, ""),
+            "attendance": {
+                "present": att["present"], "late": att["late"], "absent": att["absent"], "total": att["total"],
+                # late counts as attended
+                "rate": round((att["present"] + att["late"]) * 100 / att["total"], 1) if att["total"] else None,
+            },
+            "grades": {
+                "count": g["count"],
+                "average": round(g["average"], 1) if g["average"] is not None else None,
+            },
+            "fees": {"invoiced": b.invoiced, "paid": b.paid, "balance": max(b.balance, 0)},
+        })
+    return rows
+
+
+def cohort_csv_rows(rows):
+    """COHORT_CSV_HEADER, then one list per cohort_report row."""
+    yield COHORT_CSV_HEADER
+    for r in rows:
+        s, att, g, fees = r["student"], r["attendance"], r["grades"], r["fees"]
+        yield [
+            s.student_id, s.first_name, s.last_name, s.grade, r["class_group"],
+            att["present"], att["late"], att["absent"], att["total"], "" if att["rate"] is None else att["rate"],
+            g["count"], "" if g["average"] is None else g["average"],
+            fees["invoiced"], fees["paid"], fees["balance"],
+        ]
@@ -0,0 +1,137 @@
+from datetime import date
+
+from django.conf import settings
+
+from academics.models import AttendanceRecord, Enrollment, Grade
+from finance.models import FeeInvoice, Payment
+from people.models import Student
+
+
+class ExportParamError(ValueError):
+    pass
+
+
+def _date(params, name, required=False):
+    raw = params.get(name)
+    if not raw:
+        if required:
+            raise ExportParamError(f"{name} is required (YYYY-MM-DD).")
+        return None
+    try:
+        return date.fromisoformat(raw)
+    except ValueError:
+        raise ExportParamError(f"{name} must be a date (YYYY-MM-DD).")
+
+
+def _int(params, name):
+    raw = params.get(name)
+    if not raw:
+        return None
+    if not raw.isdigit():
+        raise ExportParamError(f"{name} must be a number.")
+    return int(raw)
+
+
+def _students(params):
+    qs = Student.objects.order_by("id")
+    if params.get("status"):
+        qs = qs.filter(status=params["status"])
+    if params.get("grade"):
+        qs = qs.filter(grade__iexact=params["grade"])
+    return (
+        ["student_id", "first_name", "last_name", "date_of_birth", "admission_date", "grade", "status"],
+        qs.values_list("student_id", "first_name", "last_name", "date_of_birth", "admission_date", "grade", "status"),
+    )
+
+
+def _enrollments(params):
+    qs = Enrollment.objects.order_by("id")
+    if _int(params, "class_group"):
+        qs = qs.filter(class_group_id=_int(params, "class_group"))
+    return (
+        ["student_id", "first_name", "last_name", "class", "grade_level", "academic_year"],
+        qs.values_list(
+            "student__student_id", "student__first_name", "student__last_name",
+            "class_group__name", "class_group__grade_level", "academic_year__name",
+        ),
+    )
+
+
+def _attendance(params):
+    qs = AttendanceRecord.objects.filter(
+        date__gte=_date(params, "start_date", required=True), date__lte=_date(params, "end_date", required=True),
+    ).order_by("date", "id")
+    if _int(params, "class_group"):
+        qs = qs.filter(class_group_id=_int(params, "class_group"))
+    return (
+        ["date", "student_id", "first_name", "last_name", "class", "status"],
+        qs.values_list("date", "student__student_id", "student__first_name", "student__last_name", "class_group__name", "status"),
+    )
+
+
+def _grades(params):
+    assessment = _int(params, "assessment")
+    if assessment is None:
+        raise ExportParamError("assessment is required.")
+    return (
+        ["assessment", "subject", "date", "max_score", "weight", "student_id", "first_name", "last_name", "score", "comment"],
+        Grade.objects.filter(assessment_id=assessment).order_by("student__last_name", "student__first_name", "id").values_list(
+            "assessment__title", "assessment__subject__name", "assessment__date", "assessment__max_score", "assessment__weight",
+            "student__student_id", "student__first_name", "student__last_name", "score", "comment",
+        ),
+    )
+
+
+def _invoices(params):
+    qs = FeeInvoice.objects.order_by("id")
+    if params.get("status"):
+        qs = qs.filter(status=params["status"])
+    if _date(params, "start_date"):
+        qs = qs.filter(issue_date__gte=_date(params, "start_date"))
+    if _date(params, "end_date"):
+        qs = qs.filter(issue_date__lte=_date(params, "end_date"))
+    return (
+        ["invoice", "student_id", "first_name", "last_name", "fee_structure", "issue_date", "due_date", "total_amount", "paid", "balance", "status"],
+        qs.values_list(
+            "id", "student__student_id", "student__first_name", "student__last_name", "fee_structure__name",
+            "issue_date", "due_date", "total_amount", "ledger_balance__paid", "ledger_balance__balance", "status",
+        ),
+    )
+
+
+def _payments(params):
+    qs = Payment.objects.order_by("id")
+    if _date(params, "start_date"):
+        qs = qs.filter(payment_date__date__gte=_date(params, "start_date"))
+    if _date(params, "end_date"):
+        qs = qs.filter(payment_date__date__lte=_date(params, "end_date"))
+    return (
+        ["payment", "invoice", "student_id", "first_name", "last_name", "payment_date", "amount", "method", "reference"],
+        qs.values_list(
+            "id", "invoice_id", "invoice__student__student_id", "invoice__student__first_name", "invoice__student__last_name",
+            "payment_date", "amount", "method", "reference",
+        ),
+    )
+
+
+# name -> (builder, finance data: principal/school admin only)
+EXPORTS = {
+    "students": (_students, False),
+    "enrollments": (_enrollments, False),
+    "attendance": (_attendance, False),
+    "grades": (_grades, False),
+    "invoices": (_invoices, True),
+    "payments": (_payments, True),
+}
+
+
+def export_rows(name, params):
+    """
+    (header, row iterator) for an export. Rows are plain tuples from
+    values_list, fetched EXPORT_CHUNK_SIZE at a time (a server-side cursor
+    on PostgreSQL), so nothing holds the whole table. Raises
+    ExportParamError for missing or malformed filters.
+    """
+    builder, _ = EXPORTS[name]
+    header, qs = builder(params)
+    return header, qs.iterator(chunk_size=getattr(settings, "EXPORT_CHUNK_SIZE", 2000))
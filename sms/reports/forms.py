@@ -1,5 +1,6 @@
 from django import forms
 from django.utils import timezone
+from academics.models import ClassGroup
 from people.models import Student
 
 class ReportFilterForm(forms.Form):
@@ -28,3 +29,33 @@ class ReportFilterForm(forms.Form):
 def default_range():
     today = timezone.localdate()
     return today.replace(day=1), today
+
+class CohortReportForm(forms.Form):
+    class_group = forms.ModelChoiceField(
+        queryset=ClassGroup.objects.select_related("academic_year"),
+        required=False,
+        widget=forms.Select(attrs={"class": "form-select"})
+    )
+    grade = forms.CharField(
+        required=False,
+        max_length=20,
+        widget=forms.TextInput(attrs={"class": "form-control", "placeholder": "e.g. Form 2"})
+    )
+    start_date = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"})
+    )
+    end_date = forms.DateField(
+        required=False,
+        widget=forms.DateInput(attrs={"type": "date", "class": "form-control"})
+    )
+
+    def clean(self):
+        cleaned = super().clean()
+        if not cleaned.get("class_group") and not cleaned.get("grade"):
+            raise forms.ValidationError("Pick a class or enter a grade.")
+        sd = cleaned.get("start_date")
+        ed = cleaned.get("end_date")
+        if sd and ed and sd > ed:
+            self.add_error("end_date", "End date must be after start date.")
+        return cleaned
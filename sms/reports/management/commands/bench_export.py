@@ -0,0 +1,115 @@
+import gc
+import resource
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+
+from academics.models import AttendanceRecord, ClassGroup
+from accounts.models import User
+from core.models import AcademicYear
+from people.models import Student
+from reports.exports import export_rows
+from reports.views import export_data
+
+
+def _rss_kb(field: str):
+    try:
+        with open("/proc/self/status") as fh:
+            for line in fh:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _reset_peak() -> bool:
+    # Linux: writing 5 to clear_refs resets VmHWM (peak RSS) to the current RSS
+    try:
+        with open("/proc/self/clear_refs", "w") as fh:
+            fh.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _peak_kb():
+    return _rss_kb("VmHWM") or resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the streamed attendance export: seed --rows AttendanceRecord rows, drain the CSV "
+        "(and optionally XLSX) response and report the peak RSS growth. --compare also materialises "
+        "the same values_list in memory, as a non-streaming export would. Everything is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000)
+        parser.add_argument("--students", type=int, default=1000)
+        parser.add_argument("--xlsx", action="store_true", help="Also time the XLSX stream.")
+        parser.add_argument("--compare", action="store_true", help="Also measure list(values_list) of the same rows.")
+
+    def _seed(self, rows, students):
+        year = AcademicYear.objects.create(name="bench-export", start_date=date(2000, 1, 1), end_date=date(2099, 12, 31))
+        group = ClassGroup.objects.create(name="Bench", grade_level="Bench", academic_year=year)
+        kids = Student.objects.bulk_create([
+            Student(student_id=f"BX{i:06d}", first_name="Kid", last_name=str(i), date_of_birth=date(2015, 1, 1), admission_date=date(2024, 1, 1))
+            for i in range(students)
+        ], batch_size=500)
+        days = -(-rows // students)
+        start = date(2000, 1, 1)
+        statuses = ("present", "present", "present", "late", "absent")
+        batch, written = [], 0
+        for d in range(days):
+            day = start + timedelta(days=d)
+            for k in kids:
+                if written == rows:
+                    break
+                batch.append(AttendanceRecord(student_id=k.id, class_group_id=group.id, date=day, status=statuses[(d + k.id) % 5]))
+                written += 1
+            if len(batch) >= 20_000:
+                AttendanceRecord.objects.bulk_create(batch, batch_size=2000)
+                batch = []
+        AttendanceRecord.objects.bulk_create(batch, batch_size=2000)
+        return start, start + timedelta(days=days)
+
+    def _measure(self, label, fn):
+        gc.collect()
+        exact = _reset_peak()
+        base = _rss_kb("VmRSS") if exact else _peak_kb()
+        t = time.perf_counter()
+        detail = fn()
+        secs = time.perf_counter() - t
+        growth = (_peak_kb() - base) / 1024
+        note = "" if exact else " (ru_maxrss: growth over the process peak so far)"
+        self.stdout.write(f"{label:<16} {secs:7.1f}s  peak RSS +{growth:7.1f} MB  {detail}{note}")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            t = time.perf_counter()
+            start, end = self._seed(options["rows"], options["students"])
+            self.stdout.write(f"Seeded {options['rows']:,} attendance rows in {time.perf_counter() - t:.1f}s")
+            user = User.objects.create_user(username="bench-export", is_principal=True)
+            params = {"start_date": start.isoformat(), "end_date": end.isoformat()}
+
+            def drain(fmt):
+                def run():
+                    request = RequestFactory().get("/reports/export/attendance/", {**params, "format": fmt})
+                    request.user = user
+                    size = sum(len(chunk) for chunk in export_data(request, "attendance").streaming_content)
+                    return f"{size / 1024 / 1024:.1f} MB {fmt}"
+                return run
+
+            self._measure("streamed csv", drain("csv"))
+            if options["xlsx"]:
+                self._measure("streamed xlsx", drain("xlsx"))
+            if options["compare"]:
+                def materialise():
+                    rows = list(export_rows("attendance", params)[1])
+                    return f"{len(rows):,} rows in memory"
+                self._measure("list(values)", materialise)
+            transaction.set_rollback(True)
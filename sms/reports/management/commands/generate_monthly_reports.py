@@ -0,0 +1,51 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from academics.models import ClassGroup
+from reports.services import REPORT_FORMATS, generate_monthly_reports, monthly_report_students
+
+
+def _month(value):
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+class Command(BaseCommand):
+    help = (
+        "Render end-of-month student reports for a class group or grade in one batch: notes and behaviour "
+        "records are prefetched in two queries and PDFs are rendered on a process pool."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", type=_month, required=True, help="YYYY-MM")
+        target = parser.add_mutually_exclusive_group(required=True)
+        target.add_argument("--class-group", type=int, help="ClassGroup id.")
+        target.add_argument("--grade", help="Student grade, e.g. 'Form 2'.")
+        parser.add_argument("--out", required=True, help="Directory (files) or file path (zip, merged).")
+        parser.add_argument("--format", choices=REPORT_FORMATS, default="files")
+        parser.add_argument("--workers", type=int, default=None, help="Render processes (default REPORT_PDF_WORKERS).")
+
+    def handle(self, *args, **options):
+        class_group = None
+        if options["class_group"]:
+            class_group = ClassGroup.objects.filter(pk=options["class_group"]).first()
+            if class_group is None:
+                raise CommandError(f"ClassGroup {options['class_group']} does not exist.")
+        students = list(monthly_report_students(class_group=class_group, grade=options["grade"]))
+        if not students:
+            raise CommandError("No students matched.")
+
+        step = max(1, len(students) // 20)
+
+        def progress(done, total):
+            if done % step == 0 or done == total:
+                self.stdout.write(f"  {done}/{total} reports")
+
+        start = time.perf_counter()
+        paths = generate_monthly_reports(
+            students, options["month"], options["out"],
+            fmt=options["format"], workers=options["workers"], progress=progress,
+        )
+        elapsed = time.perf_counter() - start
+        where = options["out"] if options["format"] != "files" else f"{len(paths)} files in {options['out']}"
+        self.stdout.write(self.style.SUCCESS(f"Wrote {len(students)} reports ({where}) in {elapsed:.1f}s."))
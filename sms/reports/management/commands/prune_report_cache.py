@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from reports.pdf_cache import evict_report_cache, report_cache_dir
+
+class Command(BaseCommand):
+    help = (
+        "Evict cached report PDFs unused for longer than REPORT_CACHE_MAX_AGE, then the least recently "
+        "used until the cache fits in REPORT_CACHE_MAX_BYTES. Downloads also sweep every few minutes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--max-bytes", type=int, default=None)
+        parser.add_argument("--max-age", type=int, default=None, help="Seconds.")
+
+    def handle(self, *args, **options):
+        removed, left = evict_report_cache(options["max_bytes"], options["max_age"])
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} cached reports; {left} bytes left in {report_cache_dir()}."))
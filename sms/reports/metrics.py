@@ -0,0 +1,99 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from academics.models import Subject
+from academics.services_rollups import attendance_totals
+from accounts.models import User
+from comms.models import Thread
+from finance.models import FeeInvoice, StudentBalance
+from people.models import Student, TeacherProfile
+from registrar.models import AdmissionApplication
+from .models import DashboardMetricsStamp
+
+METRICS_HEADER = "X-Dashboard-Metrics"
+OPEN_INVOICE_STATUSES = ["unpaid", "partial", "pending_verification"]
+EMPLOYEE_FILTER = Q(is_principal=True) | Q(is_school_admin=True) | Q(is_teacher=True) | Q(is_staff=True)
+
+
+def _metrics_version() -> int:
+    stamp, _ = DashboardMetricsStamp.objects.get_or_create(pk=1)
+    return stamp.version
+
+
+def _bump_metrics_version() -> None:
+    DashboardMetricsStamp.objects.filter(pk=1).update(version=F("version") + 1)
+
+
+def invalidate_dashboard_metrics() -> None:
+    """
+    Drop the cached counters once the current transaction commits, so a
+    request racing the write can't cache the old numbers again. Called by the
+    signals in reports.signals and by bulk writers that bypass them.
+    """
+    transaction.on_commit(_bump_metrics_version)
+
+
+def _compute(today) -> dict:
+    since = today - timedelta(days=30)
+    m = {"today": today, "last_30": since}
+
+    m.update(Student.objects.aggregate(
+        students_total=Count("id"),
+        students_active=Count("id", filter=Q(status__iexact="active")),
+    ))
+    m["employees_count"] = User.objects.filter(EMPLOYEE_FILTER).count()
+    m["teachers_count"] = TeacherProfile.objects.count()
+    m["subjects_count"] = Subject.objects.count()
+    m["threads_count"] = Thread.objects.count()
+
+    m.update(FeeInvoice.objects.aggregate(
+        inv_total=Count("id"),
+        inv_paid=Count("id", filter=Q(status="paid")),
+        inv_partial=Count("id", filter=Q(status="partial")),
+        inv_unpaid=Count("id", filter=Q(status="unpaid")),
+        inv_pending=Count("id", filter=Q(status="pending_verification")),
+        inv_open=Count("id", filter=Q(status__in=OPEN_INVOICE_STATUSES)),
+        inv_overdue=Count("id", filter=Q(status__in=["unpaid", "partial"], due_date__lt=today)),
+        invoiced_sum=Sum("total_amount"),
+    ))
+    m["invoiced_sum"] = m["invoiced_sum"] or 0
+    # one row per student from the fee ledger instead of every Payment
+    m["paid_sum"] = StudentBalance.objects.aggregate(s=Sum("paid"))["s"] or 0
+    m["balance"] = max(m["invoiced_sum"] - m["paid_sum"], 0)
+
+    admissions = dict(AdmissionApplication.objects.values_list("status").annotate(n=Count("id")).order_by())
+    m["admissions"] = admissions
+    m["admissions_total"] = sum(admissions.values())
+
+    attendance = attendance_totals(since, today)
+    m["attendance"] = attendance
+    m["attendance_total"] = sum(attendance.values())
+    return m
+
+
+def dashboard_metrics() -> tuple:
+    """
+    School-wide counters shown on the principal/admin dashboards, computed in
+    nine grouped queries and cached for DASHBOARD_METRICS_TTL seconds (or
+    until a write invalidates them); a hit costs one stamp lookup. Returns (metrics, cache hit, milliseconds).
+    """
+    start = time.perf_counter()
+    today = timezone.localdate()
+    key = f"dashboard:metrics:{_metrics_version()}:{today.isoformat()}"
+    metrics = cache.get(key)
+    hit = metrics is not None
+    if not hit:
+        metrics = _compute(today)
+        cache.set(key, metrics, getattr(settings, "DASHBOARD_METRICS_TTL", 60))
+    return metrics, hit, (time.perf_counter() - start) * 1000
+
+
+def set_metrics_header(response, hit: bool, ms: float):
+    response[METRICS_HEADER] = f"{'hit' if hit else 'miss'}; {ms:.1f}ms"
+    return response
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+def create_stamp(apps, schema_editor):
+    apps.get_model("reports", "DashboardMetricsStamp").objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_reportdatastamp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardMetricsStamp',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(create_stamp, migrations.RunPython.noop),
+    ]
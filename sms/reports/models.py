@@ -1,3 +1,23 @@
 from django.db import models
+from django.utils import timezone
 
-# Create your models here.
+from people.models import Student
+
+
+class ReportDataStamp(models.Model):
+    """
+    Per-student data version for cached report PDFs. Bumped whenever the
+    student's attendance, grades, fee ledger, enrollment or details change,
+    so a cached PDF keyed on an older version is never served again.
+    """
+    student = models.OneToOneField(Student, on_delete=models.CASCADE, primary_key=True, related_name="report_stamp")
+    version = models.PositiveBigIntegerField(default=0)
+    changed_at = models.DateTimeField(default=timezone.now)
+
+
+class DashboardMetricsStamp(models.Model):
+    """
+    Single row (pk 1) holding the version of the cached dashboard counters.
+    Kept in the database so a bump reaches every worker, whatever the cache backend.
+    """
+    version = models.PositiveBigIntegerField(default=0)
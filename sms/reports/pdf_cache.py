@@ -0,0 +1,115 @@
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+from django.utils.crypto import salted_hmac
+
+from .models import ReportDataStamp
+
+REPORT_LAYOUT_VERSION = 1  # bump when the report PDF layout changes
+PRUNE_KEY = "reports:pdf-cache:pruned"
+
+
+def report_cache_dir() -> str:
+    # never under MEDIA_ROOT: /media/ is served without a login check
+    return getattr(settings, "REPORT_CACHE_DIR", None) or os.path.join(settings.BASE_DIR, "var", "report_cache")
+
+
+def touch_report_data(student_ids) -> None:
+    """
+    Bump the data version of these students' reports (ids or a values
+    subquery). Only existing stamps are bumped; a stamp is created the first
+    time a report is cached, so a student without one has nothing cached.
+    """
+    ReportDataStamp.objects.filter(student_id__in=student_ids).update(version=F("version") + 1, changed_at=timezone.now())
+
+
+def report_data_version(student) -> int:
+    stamp, _ = ReportDataStamp.objects.get_or_create(student=student)
+    return stamp.version
+
+
+def report_cache_key(student_id, start_date, end_date, version) -> str:
+    # keyed with SECRET_KEY, so a file name can't be derived from a student id and dates
+    raw = f"{REPORT_LAYOUT_VERSION}:{student_id}:{start_date}:{end_date}:{version}"
+    return salted_hmac("reports.pdf_cache", raw, algorithm="sha256").hexdigest()
+
+
+def _path(key) -> str:
+    return os.path.join(report_cache_dir(), key[:2], f"{key}.pdf")
+
+
+def open_cached_report(student, start_date, end_date, render):
+    """
+    Open the cached PDF for (student, range, data version), calling render()
+    and storing its bytes on a miss. Returns (binary file, cache hit).
+    Files are written to a temp name and renamed, so readers never see a
+    partial PDF; a hit refreshes the file's mtime for eviction.
+    """
+    path = _path(report_cache_key(student.pk, start_date, end_date, report_data_version(student)))
+    try:
+        fh = open(path, "rb")
+    except FileNotFoundError:
+        pass
+    else:
+        os.utime(path)
+        return fh, True
+
+    pdf = render()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    with os.fdopen(fd, "wb") as out:
+        out.write(pdf)
+    os.replace(tmp, path)
+    fh = open(path, "rb")
+    # at most one sweep per interval across processes sharing the cache backend
+    if cache.add(PRUNE_KEY, 1, getattr(settings, "REPORT_CACHE_PRUNE_INTERVAL", 300)):
+        evict_report_cache()
+    return fh, False
+
+
+def evict_report_cache(max_bytes=None, max_age=None) -> tuple:
+    """
+    Remove cached PDFs unused (by mtime) for more than max_age seconds, then
+    the least recently used until the cache fits in max_bytes. Defaults come
+    from REPORT_CACHE_MAX_AGE / REPORT_CACHE_MAX_BYTES. Returns (files
+    removed, bytes left).
+    """
+    max_bytes = getattr(settings, "REPORT_CACHE_MAX_BYTES", 200 * 1024 * 1024) if max_bytes is None else max_bytes
+    max_age = getattr(settings, "REPORT_CACHE_MAX_AGE", 7 * 24 * 3600) if max_age is None else max_age
+    root = report_cache_dir()
+    if not os.path.isdir(root):
+        return 0, 0
+
+    now = time.time()
+    files, removed = [], 0
+    for bucket in os.scandir(root):
+        if not bucket.is_dir():
+            continue
+        for entry in os.scandir(bucket.path):
+            st = entry.stat()
+            stale = now - st.st_mtime > (3600 if entry.name.endswith(".tmp") else max_age)
+            if stale:
+                removed += _remove(entry.path)
+            elif entry.name.endswith(".pdf"):
+                files.append((st.st_mtime, st.st_size, entry.path))
+
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= max_bytes:
+            break
+        removed += _remove(path)
+        total -= size
+    return removed, total
+
+
+def _remove(path) -> int:
+    try:
+        os.remove(path)
+        return 1
+    except FileNotFoundError:
+        return 0
@@ -0,0 +1,222 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+
+# Kept free of model imports so pool workers started with "spawn" can import it.
+# A payload is plain data built by reports.services.monthly_report_payloads:
+# {"student_id", "name", "grade", "month", "generated", "notes": [(teacher, summary)],
+#  "behaviours": [(date, teacher, note)]}
+
+
+def _draw_wrapped(c, text, x, y, max_width):
+    words = text.split()
+    line = ""
+    for w in words:
+        test = (line + " " + w).strip()
+        if c.stringWidth(test, "Helvetica", 11) <= max_width:
+            line = test
+        else:
+            c.drawString(x, y, line)
+            y -= 14
+            line = w
+            if y < 60:
+                c.showPage()
+                y = 780
+                c.setFont("Helvetica", 11)
+    if line:
+        c.drawString(x, y, line)
+        y -= 14
+    return y
+
+
+def draw_monthly_report(c, payload) -> None:
+    """Draw one student's monthly report (two or more pages) onto canvas c."""
+    width, height = A4
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(40, height - 60, "BusyBee Connect - Monthly Student Report")
+
+    c.setFont("Helvetica", 11)
+    c.drawString(40, height - 85, f"Student: {payload['name']} ({payload['student_id']})")
+    c.drawString(40, height - 105, f"Grade: {payload['grade']}")
+    c.drawString(40, height - 125, f"Month: {payload['month']:%B %Y}")
+    c.drawString(40, height - 145, f"Generated: {payload['generated']:%Y-%m-%d %H:%M}")
+
+    y = height - 185
+
+    c.setFont("Helvetica-Bold", 13)
+    c.drawString(40, y, "Performance Summary")
+    y -= 20
+
+    c.setFont("Helvetica", 11)
+    if not payload["notes"]:
+        c.drawString(40, y, "- No performance notes recorded for this month.")
+        y -= 18
+    else:
+        for teacher, summary in payload["notes"]:
+            y = _draw_wrapped(c, f"- ({teacher}) {summary}", 40, y, width - 80)
+            y -= 8
+
+    y -= 10
+    c.setFont("Helvetica-Bold", 13)
+    c.drawString(40, y, "Behaviour Notes")
+    y -= 20
+
+    c.setFont("Helvetica", 11)
+    if not payload["behaviours"]:
+        c.drawString(40, y, "- No behaviour records recorded for this month.")
+        y -= 18
+    else:
+        for occurred_on, teacher, note in payload["behaviours"]:
+            y = _draw_wrapped(c, f"- ({occurred_on:%Y-%m-%d}, {teacher}) {note}", 40, y, width - 80)
+            y -= 8
+
+    c.showPage()
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, height - 60, "Suggestions for Parents (MVP)")
+    c.setFont("Helvetica", 11)
+    c.drawString(40, height - 90, "1) Review performance notes with your child weekly.")
+    c.drawString(40, height - 110, "2) Encourage consistent homework routines and attendance.")
+    c.drawString(40, height - 130, "3) Communicate with the teacher via BusyBee messages if unclear.")
+    c.showPage()
+
+
+def render_monthly_report(payload) -> bytes:
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    draw_monthly_report(c, payload)
+    c.save()
+    return buf.getvalue()
+
+
+def render_merged_reports(payloads) -> bytes:
+    """All reports in one PDF, each starting on a new page."""
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    for payload in payloads:
+        draw_monthly_report(c, payload)
+    c.save()
+    return buf.getvalue()
+
+
+def render_monthly_reports(payloads, workers: int = None, min_parallel: int = 8):
+    """
+    Yield render_monthly_report for each payload, in order. ReportLab is
+    CPU-bound, so batches of min_parallel or more are spread over a process
+    pool of REPORT_PDF_WORKERS (default: CPU count) processes.
+    """
+    payloads = list(payloads)
+    workers = workers or getattr(settings, "REPORT_PDF_WORKERS", None) or os.cpu_count() or 1
+    if workers <= 1 or len(payloads) < min_parallel:
+        yield from map(render_monthly_report, payloads)
+        return
+    with ProcessPoolExecutor(max_workers=min(workers, len(payloads))) as pool:
+        yield from pool.map(render_monthly_report, payloads, chunksize=max(1, len(payloads) // (workers * 4)))
+
+
+def render_student_report(ctx) -> bytes:
+    """The printable student report for a reports.views._build_report context."""
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    width, height = A4
+    y = height - 60
+    student = ctx["student"]
+
+    c.setFont("Helvetica-Bold", 16)
+    c.drawString(50, y, "Student Report")
+    y -= 22
+
+    c.setFont("Helvetica", 10)
+    c.drawString(50, y, f"Student: {student.first_name} {student.last_name} ({student.student_id})")
+    y -= 14
+    if ctx["enrollment"]:
+        c.drawString(50, y, f"Class: {ctx['enrollment'].class_group}")
+        y -= 14
+    c.drawString(50, y, f"Range: {ctx['start_date']} to {ctx['end_date']}")
+    y -= 22
+
+    att = ctx["attendance"]
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "Attendance Summary")
+    y -= 14
+    c.setFont("Helvetica", 10)
+    c.drawString(50, y, f"Present: {att['present']}  Late: {att['late']}  Absent: {att['absent']}  Total: {att['total']}")
+    y -= 20
+
+    fees = ctx["fees"]
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "Fees Summary")
+    y -= 14
+    c.setFont("Helvetica", 10)
+    c.drawString(50, y, f"Invoiced: {fees['total_invoiced']}  Paid: {fees['total_paid']}  Balance: {fees['balance']}")
+    y -= 20
+
+    c.setFont("Helvetica-Bold", 12)
+    c.drawString(50, y, "Recent Grades")
+    y -= 14
+    c.setFont("Helvetica", 9)
+
+    for g in ctx["grades"][:15]:
+        line = f"{g.assessment.date} · {g.assessment.subject} · {g.assessment.title}: {g.score}"
+        c.drawString(50, y, line[:110])
+        y -= 12
+        if y < 80:
+            c.showPage()
+            y = height - 60
+            c.setFont("Helvetica", 9)
+
+    c.showPage()
+    c.save()
+    return buf.getvalue()
+
+
+def render_cohort_report(rows, title, start_date, end_date) -> bytes:
+    """One summary page per reports.cohort.cohort_report row, in a single PDF."""
+    buf = BytesIO()
+    c = canvas.Canvas(buf, pagesize=A4)
+    width, height = A4
+
+    for r in rows:
+        student, att, grades, fees = r["student"], r["attendance"], r["grades"], r["fees"]
+        y = height - 60
+        c.setFont("Helvetica-Bold", 16)
+        c.drawString(50, y, "Student Report")
+        y -= 22
+
+        c.setFont("Helvetica", 10)
+        c.drawString(50, y, f"Student: {student.first_name} {student.last_name} ({student.student_id})")
+        y -= 14
+        c.drawString(50, y, f"Cohort: {title}" + (f"  Class: {r['class_group']}" if r["class_group"] else ""))
+        y -= 14
+        c.drawString(50, y, f"Range: {start_date} to {end_date}")
+        y -= 22
+
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(50, y, "Attendance Summary")
+        y -= 14
+        c.setFont("Helvetica", 10)
+        rate = "-" if att["rate"] is None else f"{att['rate']}%"
+        c.drawString(50, y, f"Present: {att['present']}  Late: {att['late']}  Absent: {att['absent']}  Total: {att['total']}  Rate: {rate}")
+        y -= 20
+
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(50, y, "Grades Summary")
+        y -= 14
+        c.setFont("Helvetica", 10)
+        average = "-" if grades["average"] is None else f"{grades['average']}%"
+        c.drawString(50, y, f"Assessments: {grades['count']}  Average: {average}")
+        y -= 20
+
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(50, y, "Fees Summary")
+        y -= 14
+        c.setFont("Helvetica", 10)
+        c.drawString(50, y, f"Invoiced: {fees['invoiced']}  Paid: {fees['paid']}  Balance: {fees['balance']}")
+        c.showPage()
+
+    c.save()
+    return buf.getvalue()
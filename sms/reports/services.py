@@ -1,92 +1,113 @@
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+import os
+import zipfile
+
 from django.utils import timezone
+from django.utils.text import get_valid_filename
 
+from academics.services_rollups import month_end
 from people.models import Student
 from comms.models import PerformanceNote, BehaviourRecord
+from .rendering import render_merged_reports, render_monthly_report, render_monthly_reports
+
+REPORT_FORMATS = ("files", "zip", "merged")
+
+
+def _teacher_name(user):
+    return user.get_full_name() if user else "Teacher"
+
+
+def monthly_report_payloads(students, month_first_day) -> list:
+    """
+    Plain-data payloads (see reports.rendering) for each student's monthly
+    report, in the order given. Notes and behaviour records for every student
+    are fetched in two queries, teachers joined in.
+    """
+    students = list(students)
+    ids = [s.id for s in students]
+    notes, behaviours = {}, {}
+
+    for n in PerformanceNote.objects.filter(student_id__in=ids, term_month=month_first_day)\
+            .select_related("teacher_user").order_by("student_id", "created_at"):
+        notes.setdefault(n.student_id, []).append((_teacher_name(n.teacher_user), n.summary))
+
+    for b in BehaviourRecord.objects.filter(
+        student_id__in=ids, occurred_on__gte=month_first_day, occurred_on__lte=month_end(month_first_day)
+    ).select_related("teacher_user").order_by("student_id", "occurred_on"):
+        behaviours.setdefault(b.student_id, []).append((b.occurred_on, _teacher_name(b.teacher_user), b.note))
+
+    generated = timezone.now()
+    return [
+        {
+            "student_id": s.student_id,
+            "name": f"{s.first_name} {s.last_name}",
+            "grade": s.grade,
+            "month": month_first_day,
+            "generated": generated,
+            "notes": notes.get(s.id, []),
+            "behaviours": behaviours.get(s.id, []),
+        }
+        for s in students
+    ]
+
 
 def generate_student_monthly_report_pdf(student: Student, month_first_day):
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    width, height = A4
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(40, height - 60, "BusyBee Connect - Monthly Student Report")
-
-    c.setFont("Helvetica", 11)
-    c.drawString(40, height - 85, f"Student: {student.first_name} {student.last_name} ({student.student_id})")
-    c.drawString(40, height - 105, f"Grade: {student.grade}")
-    c.drawString(40, height - 125, f"Month: {month_first_day:%B %Y}")
-    c.drawString(40, height - 145, f"Generated: {timezone.now():%Y-%m-%d %H:%M}")
-
-    y = height - 185
-
-    c.setFont("Helvetica-Bold", 13)
-    c.drawString(40, y, "Performance Summary")
-    y -= 20
-
-    notes = PerformanceNote.objects.filter(student=student, term_month=month_first_day).order_by("created_at")
-    c.setFont("Helvetica", 11)
-    if not notes.exists():
-        c.drawString(40, y, "- No performance notes recorded for this month.")
-        y -= 18
-    else:
-        for n in notes:
-            teacher = n.teacher_user.get_full_name() if n.teacher_user else "Teacher"
-            y = _draw_wrapped(c, f"- ({teacher}) {n.summary}", 40, y, width - 80)
-            y -= 8
-
-    y -= 10
-    c.setFont("Helvetica-Bold", 13)
-    c.drawString(40, y, "Behaviour Notes")
-    y -= 20
-
-    behaviours = BehaviourRecord.objects.filter(
-        student=student,
-        occurred_on__year=month_first_day.year,
-        occurred_on__month=month_first_day.month
-    ).order_by("occurred_on")
-
-    c.setFont("Helvetica", 11)
-    if not behaviours.exists():
-        c.drawString(40, y, "- No behaviour records recorded for this month.")
-        y -= 18
-    else:
-        for b in behaviours:
-            teacher = b.teacher_user.get_full_name() if b.teacher_user else "Teacher"
-            y = _draw_wrapped(c, f"- ({b.occurred_on:%Y-%m-%d}, {teacher}) {b.note}", 40, y, width - 80)
-            y -= 8
-
-    c.showPage()
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(40, height - 60, "Suggestions for Parents (MVP)")
-    c.setFont("Helvetica", 11)
-    c.drawString(40, height - 90, "1) Review performance notes with your child weekly.")
-    c.drawString(40, height - 110, "2) Encourage consistent homework routines and attendance.")
-    c.drawString(40, height - 130, "3) Communicate with the teacher via BusyBee messages if unclear.")
-
-    c.save()
-    pdf = buf.getvalue()
-    buf.close()
-    return pdf
-
-def _draw_wrapped(c, text, x, y, max_width):
-    words = text.split()
-    line = ""
-    for w in words:
-        test = (line + " " + w).strip()
-        if c.stringWidth(test, "Helvetica", 11) <= max_width:
-            line = test
-        else:
-            c.drawString(x, y, line)
-            y -= 14
-            line = w
-            if y < 60:
-                c.showPage()
-                y = 780
-                c.setFont("Helvetica", 11)
-    if line:
-        c.drawString(x, y, line)
-        y -= 14
-    return y
+    return render_monthly_report(monthly_report_payloads([student], month_first_day)[0])
+
+
+def monthly_report_students(class_group=None, grade=None):
+    """Students in a class group (via enrollment) or with a given grade."""
+    qs = Student.objects.all()
+    if class_group is not None:
+        qs = qs.filter(enrollment__class_group=class_group)
+    if grade:
+        qs = qs.filter(grade__iexact=grade)
+    return qs.distinct().order_by("last_name", "first_name", "id")
+
+
+def monthly_report_filename(payload) -> str:
+    return get_valid_filename(f"{payload['student_id']}_{payload['month']:%Y-%m}.pdf")
+
+
+def generate_monthly_reports(students, month_first_day, out, fmt="files", workers=None, progress=None):
+    """
+    Render the month's report for every student and write them to out:
+      files  - one PDF per student in directory out
+      zip    - one PDF per student inside zip archive out
+      merged - a single PDF at out (rendered in this process)
+    PDFs are rendered on a process pool (reports.rendering) and written as
+    they finish. progress(done, total) is called after each one. Returns the
+    paths written (the archive or merged file for zip/merged).
+    """
+    if fmt not in REPORT_FORMATS:
+        raise ValueError(f"Unknown report format {fmt!r}; expected one of {', '.join(REPORT_FORMATS)}.")
+    payloads = monthly_report_payloads(students, month_first_day)
+    total = len(payloads)
+
+    if fmt == "merged":
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "wb") as fh:
+            fh.write(render_merged_reports(payloads))
+        if progress:
+            progress(total, total)
+        return [out]
+
+    rendered = zip(payloads, render_monthly_reports(payloads, workers=workers))
+    if fmt == "zip":
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with zipfile.ZipFile(out, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for done, (payload, pdf) in enumerate(rendered, 1):
+                archive.writestr(monthly_report_filename(payload), pdf)
+                if progress:
+                    progress(done, total)
+        return [out]
+
+    os.makedirs(out, exist_ok=True)
+    paths = []
+    for done, (payload, pdf) in enumerate(rendered, 1):
+        path = os.path.join(out, monthly_report_filename(payload))
+        with open(path, "wb") as fh:
+            fh.write(pdf)
+        paths.append(path)
+        if progress:
+            progress(done, total)
+    return paths
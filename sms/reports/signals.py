@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from academics.models import Assessment, AttendanceRecord, Enrollment, Grade, Subject
+from comms.models import Thread
+from finance.models import FeeInvoice, LedgerEntry, Payment
+from people.models import Student, TeacherProfile
+from registrar.models import AdmissionApplication
+from .metrics import invalidate_dashboard_metrics
+from .pdf_cache import touch_report_data
+
+EMPLOYEE_FIELDS = {"is_principal", "is_school_admin", "is_teacher", "is_staff"}
+
+
+@receiver([post_save, post_delete], sender=Student)
+@receiver([post_save, post_delete], sender=TeacherProfile)
+@receiver([post_save, post_delete], sender=Subject)
+@receiver([post_save, post_delete], sender=Thread)
+@receiver([post_save, post_delete], sender=FeeInvoice)
+@receiver([post_save, post_delete], sender=Payment)
+@receiver([post_save, post_delete], sender=AdmissionApplication)
+@receiver([post_save, post_delete], sender=AttendanceRecord)
+def _invalidate_metrics(sender, **kwargs):
+    invalidate_dashboard_metrics()
+
+
+@receiver([post_save, post_delete], sender=settings.AUTH_USER_MODEL)
+def _invalidate_metrics_for_user(sender, update_fields=None, **kwargs):
+    # logins save last_login only; employee counts can't change
+    if update_fields is not None and not EMPLOYEE_FIELDS & set(update_fields):
+        return
+    invalidate_dashboard_metrics()
+
+
+@receiver([post_save, post_delete], sender=AttendanceRecord)
+@receiver([post_save, post_delete], sender=Grade)
+@receiver([post_save, post_delete], sender=Enrollment)
+@receiver(post_save, sender=LedgerEntry)
+def _touch_student_report(sender, instance, **kwargs):
+    # fee changes are seen through the ledger, which only moves when amounts do;
+    # bulk writers (academics.services) touch the stamps themselves
+    touch_report_data([instance.student_id])
+
+
+@receiver(post_save, sender=Student)
+def _touch_report_for_student(sender, instance, **kwargs):
+    touch_report_data([instance.pk])
+
+
+@receiver(post_save, sender=Assessment)
+def _touch_reports_for_assessment(sender, instance, **kwargs):
+    touch_report_data(Grade.objects.filter(assessment=instance).values("student_id"))
@@ -1,3 +1,305 @@
-from django.test import TestCase
+import os
+import tempfile
+import zipfile
+from datetime import date, timedelta
+from unittest.mock import patch
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from accounts.models import User
+from comms.models import BehaviourRecord, PerformanceNote
+from academics.models import Assessment, AttendanceRecord, Enrollment, Grade, GradeResultsStamp, Subject, ClassGroup
+from finance.models import FeeInvoice, FeeStructure, Payment
+from core.models import AcademicYear
+from people.models import Student
+from registrar.models import AdmissionApplication
+from sms import settings as project_settings
+from .pdf_cache import evict_report_cache, open_cached_report, report_cache_dir, report_cache_key
+from .rendering import render_student_report
+from .cohort import cohort_report
+from .views import _build_report, cohort_report_view, export_data, generate_report
+from .metrics import METRICS_HEADER, dashboard_metrics, set_metrics_header
+from .models import DashboardMetricsStamp
+from .services import generate_monthly_reports, generate_student_monthly_report_pdf, monthly_report_payloads
+
+
+class DashboardMetricsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        Student.objects.create(student_id="A0012025", first_name="Ada", last_name="Moyo", date_of_birth=date(2015, 1, 1), admission_date=date(2025, 1, 1), status="active")
+        AdmissionApplication.objects.create(first_name="Bo", last_name="Dube", date_of_birth=date(2016, 1, 1), guardian_name="G")
+
+    def test_grouped_queries_then_cached(self):
+        # the stamp lookup, then nine grouped queries
+        with self.assertNumQueries(10):
+            metrics, hit, _ = dashboard_metrics()
+        self.assertFalse(hit)
+        self.assertEqual((metrics["students_total"], metrics["students_active"]), (1, 1))
+        self.assertEqual(metrics["admissions"], {"new": 1})
+
+        with self.assertNumQueries(1):
+            _, hit, _ = dashboard_metrics()
+        self.assertTrue(hit)
+
+    def test_writes_invalidate_after_commit(self):
+        dashboard_metrics()
+        with self.captureOnCommitCallbacks(execute=True):
+            AdmissionApplication.objects.create(first_name="Cy", last_name="Dube", date_of_birth=date(2016, 1, 2), guardian_name="G")
+        metrics, hit, _ = dashboard_metrics()
+        self.assertFalse(hit)
+        self.assertEqual(metrics["admissions_total"], 2)
+
+    def test_version_is_shared_through_the_database(self):
+        dashboard_metrics()
+        # another worker's write bumps the row; this process's cache is left as it was
+        DashboardMetricsStamp.objects.filter(pk=1).update(version=F("version") + 1)
+        self.assertFalse(dashboard_metrics()[1])
+
+    def test_login_saves_keep_the_cache(self):
+        user = User.objects.create_user(username="t", is_teacher=True)
+        dashboard_metrics()
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save(update_fields=["last_login"])
+        self.assertTrue(dashboard_metrics()[1])
+
+    def test_header(self):
+        response = set_metrics_header(HttpResponse(), True, 0.25)
+        self.assertEqual(response[METRICS_HEADER], "hit; 0.2ms")
+
+
+class MonthlyReportBatchTests(TestCase):
+    month = date(2026, 9, 1)
+
+    def setUp(self):
+        teacher = User.objects.create_user(username="t", first_name="Tee", last_name="Cher")
+        self.students = []
+        for i in range(3):
+            student = Student.objects.create(
+                student_id=f"S{i}", first_name="Kid", last_name=str(i), grade="Form 2",
+                date_of_birth=date(2015, 1, 1), admission_date=date(2024, 1, 1),
+            )
+            PerformanceNote.objects.create(student=student, teacher_user=teacher, term_month=self.month, summary="Steady work")
+            BehaviourRecord.objects.create(student=student, occurred_on=date(2026, 9, 15), note="Helpful")
+            BehaviourRecord.objects.create(student=student, occurred_on=date(2026, 10, 1), note="Next month")
+            self.students.append(student)
+
+    def test_payloads_prefetch_in_two_queries(self):
+        with self.assertNumQueries(2):
+            payloads = monthly_report_payloads(self.students, self.month)
+        self.assertEqual(payloads[0]["notes"], [("Tee Cher", "Steady work")])
+        self.assertEqual(payloads[0]["behaviours"], [(date(2026, 9, 15), "Teacher", "Helpful")])
+
+    def test_zip_and_files_output(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            seen = []
+            path = os.path.join(tmp, "september.zip")
+            generate_monthly_reports(self.students, self.month, path, fmt="zip", workers=1, progress=lambda d, t: seen.append(d))
+            with zipfile.ZipFile(path) as archive:
+                self.assertEqual(archive.namelist(), ["S0_2026-09.pdf", "S1_2026-09.pdf", "S2_2026-09.pdf"])
+                self.assertTrue(archive.read("S0_2026-09.pdf").startswith(b"%PDF"))
+            self.assertEqual(seen, [1, 2, 3])
+
+            paths = generate_monthly_reports(self.students[:1], self.month, os.path.join(tmp, "files"), workers=1)
+            with open(paths[0], "rb") as fh:
+                self.assertEqual(fh.read(4), b"%PDF")
+
+    def test_single_report_still_renders(self):
+        self.assertTrue(generate_student_monthly_report_pdf(self.students[0], self.month).startswith(b"%PDF"))
+
+
+class ReportPdfCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        override = override_settings(REPORT_CACHE_DIR=self.tmp.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.student = Student.objects.create(student_id="S1", first_name="Ada", last_name="Moyo", date_of_birth=date(2015, 1, 1), admission_date=date(2024, 1, 1))
+        year = AcademicYear.objects.create(name="2026", start_date=date(2026, 1, 1), end_date=date(2026, 12, 1))
+        group = ClassGroup.objects.create(name="Form 2A", grade_level="Form 2", academic_year=year)
+        Enrollment.objects.create(student=self.student, class_group=group, academic_year=year)
+        subject = Subject.objects.create(name="Maths", code="MAT")
+        self.assessment = Assessment.objects.create(subject=subject, class_group=group, title="Quiz", date=date(2026, 9, 10), max_score=20)
+        self.renders = 0
+
+    def _open(self):
+        def render():
+            self.renders += 1
+            return render_student_report(_build_report(self.student, date(2026, 9, 1), date(2026, 9, 30)))
+        fh, hit = open_cached_report(self.student, date(2026, 9, 1), date(2026, 9, 30), render)
+        with fh:
+            self.assertEqual(fh.read(4), b"%PDF")
+        return hit
+
+    def test_report_shows_enrollment(self):
+        ctx = _build_report(self.student, date(2026, 9, 1), date(2026, 9, 30))
+        self.assertEqual(ctx["enrollment"].class_group.name, "Form 2A")
+
+    def test_repeat_downloads_hit_until_data_changes(self):
+        self.assertFalse(self._open())
+        self.assertTrue(self._open())
+        Grade.objects.create(assessment=self.assessment, student=self.student, score=15)
+        self.assertFalse(self._open())
+        self.assertEqual(self.renders, 2)
+
+    def test_cache_is_private_and_keyed_by_secret(self):
+        media = os.path.realpath(settings.MEDIA_ROOT) + os.sep
+        with override_settings(REPORT_CACHE_DIR=None):
+            default_root = report_cache_dir()
+        for root in (project_settings.REPORT_CACHE_DIR, default_root):
+            self.assertFalse((os.path.realpath(root) + os.sep).startswith(media), root)
+        key = report_cache_key(self.student.pk, date(2026, 9, 1), date(2026, 9, 30), 0)
+        with override_settings(SECRET_KEY="another-secret"):
+            self.assertNotEqual(report_cache_key(self.student.pk, date(2026, 9, 1), date(2026, 9, 30), 0), key)
+
+    def test_eviction_by_size_and_age(self):
+        self._open()
+        Grade.objects.create(assessment=self.assessment, student=self.student, score=15)
+        self._open()
+        self.assertEqual(evict_report_cache(max_bytes=10**9, max_age=3600)[0], 0)
+        removed, left = evict_report_cache(max_bytes=1, max_age=3600)
+        self.assertEqual((removed, left), (2, 0))
+
+
+def _render_like_template(request, template, ctx):
+    # touch everything reports/report.html does, so lazy lookups are counted
+    str(ctx["enrollment"].class_group)
+    for r in ctx["attendance"]["qs"]:
+        str(r.class_group)
+    for g in ctx["grades"]:
+        str(g.assessment.subject)
+    list(ctx["fees"]["invoices"])
+    return HttpResponse()
+
+
+class GenerateReportQueryTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="head", is_principal=True)
+        self.student = Student.objects.create(student_id="S1", first_name="Ada", last_name="Moyo", date_of_birth=date(2015, 1, 1), admission_date=date(2024, 1, 1))
+        year = AcademicYear.objects.create(name="2026", start_date=date(2026, 1, 1), end_date=date(2026, 12, 1))
+        self.group = ClassGroup.objects.create(name="Form 2A", grade_level="Form 2", academic_year=year)
+        Enrollment.objects.create(student=self.student, class_group=self.group, academic_year=year)
+        self.subject = Subject.objects.create(name="Maths", code="MAT")
+        self.fs = FeeStructure.objects.create(name="Term 1", amount=100)
+
+    def _add_rows(self, n, offset=0):
+        for i in range(offset, offset + n):
+            AttendanceRecord.objects.create(student=self.student, class_group=self.group, date=date(2026, 9, 1) + timedelta(days=i), status=("present", "late", "absent")[i % 3])
+            assessment = Assessment.objects.create(subject=self.subject, class_group=self.group, title=f"Quiz {i}", type="test", date=date(2026, 9, 1) + timedelta(days=i))
+            Grade.objects.create(assessment=assessment, student=self.student, score=10)
+            invoice = FeeInvoice.objects.create(student=self.student, fee_structure=self.fs, due_date=date(2026, 9, 30), total_amount=100)
+            Payment.objects.create(invoice=invoice, amount=40)
+
+    def _generate(self):
+        request = RequestFactory().get("/reports/generate/", {"student": self.student.id, "start_date": "2026-09-01", "end_date": "2026-09-30"})
+        request.user = self.staff
+        with patch("reports.views.render", side_effect=_render_like_template) as render:
+            generate_report(request)
+        return render.call_args.args[2]
+
+    def test_generate_report_runs_a_fixed_number_of_queries(self):
+        # form's student lookup, attendance aggregate, attendance rows, grades,
+        # enrollment, ledger balance, invoices, plus the term lookup, the
+        # class's grade-results stamp and its grades for the weighted averages
+        cache.clear()
+        GradeResultsStamp.objects.create(class_group=self.group)
+        self._add_rows(3)
+        with self.assertNumQueries(10):
+            ctx = self._generate()
+        self.assertEqual((ctx["attendance"]["present"], ctx["attendance"]["late"], ctx["attendance"]["total"]), (1, 1, 3))
+        self.assertEqual((ctx["fees"]["total_invoiced"], ctx["fees"]["total_paid"], ctx["fees"]["balance"]), (300, 120, 180))
+        self.assertEqual((ctx["results"]["average"], ctx["results"]["rank"], ctx["results"]["of"]), (10.0, 1, 1))
+
+        # new grades bump the stamp, so the averages are recomputed once
+        self._add_rows(12, offset=3)
+        with self.assertNumQueries(10):
+            ctx = self._generate()
+        self.assertEqual(ctx["results"]["subjects"][0]["count"], 15)
+        with self.assertNumQueries(9):
+            self._generate()
+
+
+class CohortReportTests(TestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="head", is_principal=True)
+        year = AcademicYear.objects.create(name="2026", start_date=date(2026, 1, 1), end_date=date(2026, 12, 1))
+        self.group = ClassGroup.objects.create(name="Form 2A", grade_level="Form 2", academic_year=year)
+        subject = Subject.objects.create(name="Maths", code="MAT")
+        assessment = Assessment.objects.create(subject=subject, class_group=self.group, title="Quiz", type="test", date=date(2026, 9, 5), max_score=20)
+        fs = FeeStructure.objects.create(name="Term 1", amount=100)
+        for i in range(4):
+            student = Student.objects.create(student_id=f"S{i}", first_name="Kid", last_name=str(i), grade="Form 2", date_of_birth=date(2015, 1, 1), admission_date=date(2024, 1, 1))
+            Enrollment.objects.create(student=student, class_group=self.group, academic_year=year)
+            AttendanceRecord.objects.create(student=student, class_group=self.group, date=date(2026, 9, 1), status="present")
+            AttendanceRecord.objects.create(student=student, class_group=self.group, date=date(2026, 9, 2), status="absent")
+            Grade.objects.create(assessment=assessment, student=student, score=5 * i)
+            FeeInvoice.objects.create(student=student, fee_structure=fs, due_date=date(2026, 9, 30), total_amount=100)
+
+    def test_whole_class_in_five_queries(self):
+        with self.assertNumQueries(5):
+            rows = cohort_report(date(2026, 9, 1), date(2026, 9, 30), class_group=self.group)
+        self.assertEqual([r["student"].student_id for r in rows], ["S0", "S1", "S2", "S3"])
+        self.assertEqual(rows[1]["attendance"], {"present": 1, "late": 0, "absent": 1, "total": 2, "rate": 50.0})
+        self.assertEqual(rows[1]["grades"], {"count": 1, "average": 25.0})
+        self.assertEqual((rows[1]["fees"]["balance"], rows[1]["class_group"]), (100, "Form 2A"))
+        self.assertEqual(len(cohort_report(date(2026, 9, 1), date(2026, 9, 30), grade="form 2")), 4)
+
+    def test_csv_and_pdf_exports(self):
+        params = {"class_group": self.group.id, "start_date": "2026-09-01", "end_date": "2026-09-30"}
+        request = RequestFactory().get("/reports/cohort/", {**params, "format": "csv"})
+        request.user = self.staff
+        lines = cohort_report_view(request).content.decode().splitlines()
+        self.assertEqual(len(lines), 5)
+        self.assertTrue(lines[0].startswith("student_id,first_name"))
+        self.assertIn("S3,Kid,3,Form 2,Form 2A,1,0,1,2,50.0,1,75.0", lines[4])
+
+        request = RequestFactory().get("/reports/cohort/", {**params, "format": "pdf"})
+        request.user = self.staff
+        pdf = cohort_report_view(request).content
+        self.assertTrue(pdf.startswith(b"%PDF"))
+        self.assertEqual(pdf.count(b"/Type /Page\n"), 4)
+
+
+class ExportViewTests(TestCase):
+    def setUp(self):
+        self.head = User.objects.create_user(username="head", is_principal=True)
+        self.teacher = User.objects.create_user(username="t", is_teacher=True)
+        year = AcademicYear.objects.create(name="2026", start_date=date(2026, 1, 1), end_date=date(2026, 12, 1))
+        group = ClassGroup.objects.create(name="Form 2A", grade_level="Form 2", academic_year=year)
+        fs = FeeStructure.objects.create(name="Term 1", amount=100)
+        for i in range(3):
+            student = Student.objects.create(student_id=f"S{i}", first_name="Kid", last_name=str(i), date_of_birth=date(2015, 1, 1), admission_date=date(2024, 1, 1))
+            AttendanceRecord.objects.create(student=student, class_group=group, date=date(2026, 9, 1 + i), status="present")
+            invoice = FeeInvoice.objects.create(student=student, fee_structure=fs, due_date=date(2026, 9, 30), total_amount=100)
+            Payment.objects.create(invoice=invoice, amount=25)
+
+    def _get(self, user, name, **params):
+        request = RequestFactory().get(f"/reports/export/{name}/", params)
+        request.user = user
+        return export_data(request, name)
+
+    def test_attendance_csv_streams_with_filters(self):
+        response = self._get(self.teacher, "attendance", start_date="2026-09-02", end_date="2026-09-30")
+        self.assertTrue(response.streaming)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines, [
+            "date,student_id,first_name,last_name,class,status",
+            "2026-09-02,S1,Kid,1,Form 2A,present",
+            "2026-09-03,S2,Kid,2,Form 2A,present",
+        ])
+        self.assertEqual(self._get(self.teacher, "attendance").status_code, 400)
+
+    def test_finance_exports_are_admin_only(self):
+        self.assertEqual(self._get(self.teacher, "invoices").status_code, 403)
+        response = self._get(self.head, "invoices", format="xlsx")
+        self.assertIn("invoices_", response["Content-Disposition"])
+        self.assertTrue(response["Content-Disposition"].endswith('.xlsx"'))
+        lines = b"".join(self._get(self.head, "invoices").streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].endswith(",100.00,25.00,75.00,unpaid"))
@@ -3,6 +3,8 @@ from .views import (
     report_home,
     generate_report,
     report_pdf,
+    cohort_report_view,
+    export_data,
     dashboard
 )
 
@@ -12,5 +14,7 @@ urlpatterns = [
     path("", report_home, name="home"),
     path("generate/", generate_report, name="generate"),
     path("pdf/<int:student_id>/", report_pdf, name="pdf"),
+    path("cohort/", cohort_report_view, name="cohort"),
+    path("export/<slug:name>/", export_data, name="export"),
     path("dashboard/", dashboard, name="dashboard"),
 ]
@@ -1,15 +1,26 @@
+import csv
 from decimal import Decimal
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
-from django.http import FileResponse, HttpResponse
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseBadRequest
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils import timezone
+from django.utils.text import slugify
 from finance.models import FeeInvoice, Payment
 from people.models import Student
-from academics.models import AttendanceRecord, Grade
+from django.db.models import Count, Q
+from academics.models import AttendanceRecord, Enrollment, Grade
 from finance.models import FeeInvoice, Payment
-from .forms import ReportFilterForm, default_range
-from django.db import models
+from academics.services_grades import enrollment_results
+from finance.services_ledger import student_balance
+from core.exports import streaming_export
+from .cohort import cohort_csv_rows, cohort_report
+from .exports import EXPORTS, ExportParamError, export_rows
+from .forms import CohortReportForm, ReportFilterForm, default_range
+from .pdf_cache import open_cached_report
+from .rendering import render_cohort_report, render_student_report
+
+REPORT_CACHE_HEADER = "X-Report-Cache"
 
 def _has_field(Model, name: str) -> bool:
     try:
@@ -18,19 +29,17 @@ def _has_field(Model, name: str) -> bool:
     except Exception:
         return False
 
-def _sum_field(qs, field_candidates):
-    for f in field_candidates:
-        if qs.model and _has_field(qs.model, f):
-            return qs.aggregate(s=models.Sum(f))["s"] or 0
-    return 0
-
-def _order_by_first_existing(qs, candidates, default="-id"):
+def _first_existing_order(Model, candidates, default="-id"):
     for f in candidates:
         # allow "-field"
         raw = f[1:] if f.startswith("-") else f
-        if _has_field(qs.model, raw):
-            return qs.order_by(f)
-    return qs.order_by(default)
+        if _has_field(Model, raw):
+            return f
+    return default
+
+# resolved once at import, not per request
+INVOICE_ORDER = _first_existing_order(FeeInvoice, ["-issue_date", "-created_at", "-id"])
+PAYMENT_ORDER = _first_existing_order(Payment, ["-payment_date", "-paymentDate", "-created_at", "-id"])
 
 
 def _is_staffish(u):
@@ -49,12 +58,19 @@ def _build_report(student: Student, start_date, end_date):
     # Attendance
     attendance_qs = AttendanceRecord.objects.filter(
         student=student, date__gte=start_date, date__lte=end_date
-    ).order_by("-date")
-
-    present = attendance_qs.filter(status="present").count()
-    late = attendance_qs.filter(status="late").count()
-    absent = attendance_qs.filter(status="absent").count()
-    total_att = attendance_qs.count()
+    ).select_related("class_group__academic_year").order_by("-date")
+
+    # one conditional aggregate over the student's rows (unique index leads with student)
+    counts = attendance_qs.aggregate(
+        present=Count("id", filter=Q(status="present")),
+        late=Count("id", filter=Q(status="late")),
+        absent=Count("id", filter=Q(status="absent")),
+        total=Count("id"),
+    )
+    present = counts["present"]
+    late = counts["late"]
+    absent = counts["absent"]
+    total_att = counts["total"]
 
     # Grades
     grades_qs = Grade.objects.filter(
@@ -63,20 +79,23 @@ def _build_report(student: Student, start_date, end_date):
         assessment__date__lte=end_date,
     ).select_related("assessment", "assessment__subject").order_by("-assessment__date")
 
-    # Fees
-    invoices_qs = FeeInvoice.objects.filter(student=student)
-    invoices_qs = _order_by_first_existing(invoices_qs, ["-issue_date", "-created_at", "-id"])
+    enrollment = Enrollment.objects.filter(student=student).select_related("class_group__academic_year")\
+        .order_by("-academic_year__start_date", "-id").first()
 
-    payments_qs = Payment.objects.filter(invoice__student=student)
-    payments_qs = _order_by_first_existing(payments_qs, ["-payment_date", "-paymentDate", "-created_at", "-id"])
+    # Fees
+    invoices_qs = FeeInvoice.objects.filter(student=student).order_by(INVOICE_ORDER)
+    payments_qs = Payment.objects.filter(invoice__student=student).order_by(PAYMENT_ORDER)
 
-    total_invoiced = _sum_field(invoices_qs, ["total_amount", "amount", "totalAmount"])
-    total_paid = _sum_field(payments_qs, ["amount", "paid_amount", "paidAmount"])
+    # running totals from the fee ledger: one indexed read
+    ledger = student_balance(student.id)
+    total_invoiced = ledger.invoiced
+    total_paid = ledger.paid
 
-    balance = max(total_invoiced - total_paid, 0)
+    balance = max(ledger.balance, 0)
 
     return {
         "student": student,
+        "enrollment": enrollment,
         "start_date": start_date,
         "end_date": end_date,
         "attendance": {
@@ -150,6 +169,8 @@ def generate_report(request):
         return redirect("reports:home")
 
     ctx = _build_report(student, start_date, end_date)
+    # page only: ranks move with classmates' grades, which the PDF cache stamp doesn't track
+    ctx["results"] = enrollment_results(ctx["enrollment"], end_date)
     ctx["form"] = form
     return render(request, "reports/report.html", ctx)
 
@@ -174,69 +195,85 @@ def report_pdf(request, student_id: int):
     except Exception:
         start_date, end_date = sd_default, ed_default
 
-    ctx = _build_report(student, start_date, end_date)
+    # served from the on-disk cache unless this student's data changed since it was rendered
+    pdf, hit = open_cached_report(
+        student, start_date, end_date,
+        lambda: render_student_report(_build_report(student, start_date, end_date)),
+    )
+    response = FileResponse(
+        pdf, as_attachment=True, content_type="application/pdf",
+        filename=f"report_{student.student_id}_{start_date}_{end_date}.pdf",
+    )
+    response[REPORT_CACHE_HEADER] = "hit" if hit else "miss"
+    return response
+
+
+@login_required
+def cohort_report_view(request):
+    """
+    Attendance/grades/fees roll-up for a whole class or grade, as a page,
+    a CSV (?format=csv) or one PDF with a page per student (?format=pdf).
+    """
+    if not _is_staffish(request.user):
+        messages.error(request, "Not allowed.")
+        return redirect("reports:home")
+
+    sd_default, ed_default = default_range()
+    form = CohortReportForm(request.GET or None, initial={"start_date": sd_default, "end_date": ed_default})
+    if not form.is_valid():
+        return render(request, "reports/cohort.html", {"form": form, "rows": None})
+
+    class_group = form.cleaned_data.get("class_group")
+    grade = form.cleaned_data.get("grade")
+    start_date = form.cleaned_data.get("start_date") or sd_default
+    end_date = form.cleaned_data.get("end_date") or ed_default
+    rows = cohort_report(start_date, end_date, class_group=class_group, grade=grade)
+
+    title = str(class_group) if class_group else f"Grade {grade}"
+    slug = slugify(class_group.name if class_group else grade)
+    fmt = request.GET.get("format")
+    if fmt == "csv":
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = f'attachment; filename="cohort_{slug}_{start_date}_{end_date}.csv"'
+        csv.writer(response).writerows(cohort_csv_rows(rows))
+        return response
+    if fmt == "pdf":
+        response = HttpResponse(render_cohort_report(rows, title, start_date, end_date), content_type="application/pdf")
+        response["Content-Disposition"] = f'attachment; filename="cohort_{slug}_{start_date}_{end_date}.pdf"'
+        return response
+
+    return render(request, "reports/cohort.html", {
+        "form": form,
+        "rows": rows,
+        "title": title,
+        "start_date": start_date,
+        "end_date": end_date,
+        "query": request.GET.urlencode(),
+    })
 
-    # ---- ReportLab PDF ----
-    from reportlab.lib.pagesizes import A4
-    from reportlab.pdfgen import canvas
-    from io import BytesIO
-
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    width, height = A4
-    y = height - 60
-
-    c.setFont("Helvetica-Bold", 16)
-    c.drawString(50, y, "Student Report")
-    y -= 22
-
-    c.setFont("Helvetica", 10)
-    c.drawString(50, y, f"Student: {student.first_name} {student.last_name} ({student.student_id})")
-    y -= 14
-    if ctx["enrollment"]:
-        c.drawString(50, y, f"Class: {ctx['enrollment'].class_group}")
-        y -= 14
-    c.drawString(50, y, f"Range: {start_date} to {end_date}")
-    y -= 22
-
-    att = ctx["attendance"]
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y, "Attendance Summary")
-    y -= 14
-    c.setFont("Helvetica", 10)
-    c.drawString(50, y, f"Present: {att['present']}  Late: {att['late']}  Absent: {att['absent']}  Total: {att['total']}")
-    y -= 20
-
-    fees = ctx["fees"]
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y, "Fees Summary")
-    y -= 14
-    c.setFont("Helvetica", 10)
-    c.drawString(50, y, f"Invoiced: {fees['total_invoiced']}  Paid: {fees['total_paid']}  Balance: {fees['balance']}")
-    y -= 20
-
-    c.setFont("Helvetica-Bold", 12)
-    c.drawString(50, y, "Recent Grades")
-    y -= 14
-    c.setFont("Helvetica", 9)
-
-    for g in ctx["grades"][:15]:
-        line = f"{g.assessment.date} · {g.assessment.subject} · {g.assessment.title}: {g.score}"
-        c.drawString(50, y, line[:110])
-        y -= 12
-        if y < 80:
-            c.showPage()
-            y = height - 60
-            c.setFont("Helvetica", 9)
-
-    c.showPage()
-    c.save()
-    buf.seek(0)
-
-    return FileResponse(buf, as_attachment=True, filename=f"report_{student.student_id}_{start_date}_{end_date}.pdf")
+
+@login_required
+def export_data(request, name: str):
+    """
+    Streamed CSV (or ?format=xlsx) download of a whole register or ledger;
+    see reports.exports for the datasets and their filters.
+    """
+    if name not in EXPORTS:
+        raise Http404("Unknown export.")
+    finance_only = EXPORTS[name][1]
+    allowed = _is_adminish(request.user) if finance_only else _is_staffish(request.user)
+    if not allowed:
+        return HttpResponse("Not allowed", status=403)
+    try:
+        header, rows = export_rows(name, request.GET)
+    except ExportParamError as exc:
+        return HttpResponseBadRequest(str(exc))
+    filename = f"{name}_{timezone.localdate():%Y%m%d}"
+    return streaming_export(filename, header, rows, fmt=request.GET.get("format", "csv"))
 
 
 from registrar.models import AdmissionApplication
+from .metrics import dashboard_metrics, set_metrics_header
 
 def _is_adminish(u):
     return u.is_authenticated and (u.is_principal or u.is_school_admin)
@@ -247,57 +284,35 @@ def dashboard(request):
         messages.error(request, "Not allowed.")
         return redirect("accounts:dashboard")
 
-    today = timezone.localdate()
-    last_30 = today - timezone.timedelta(days=30)
-
-    # Students
-    students_total = Student.objects.count()
-    students_active = Student.objects.filter(status__iexact="active").count()
-
-    # Admissions pipeline
-    admissions_new = AdmissionApplication.objects.filter(status="new").count()
-    admissions_reviewed = AdmissionApplication.objects.filter(status="reviewed").count()
-    admissions_accepted = AdmissionApplication.objects.filter(status="accepted").count()
-
-    # Attendance (last 30 days)
-    att_qs = AttendanceRecord.objects.filter(date__gte=last_30, date__lte=today)
-    att_total = att_qs.count()
-    att_present = att_qs.filter(status="present").count()
-    att_absent = att_qs.filter(status="absent").count()
-    att_late = att_qs.filter(status="late").count()
-
-    # Fees
-    inv_total = FeeInvoice.objects.count()
-    inv_paid = FeeInvoice.objects.filter(status="paid").count()
-    inv_pending = FeeInvoice.objects.filter(status="pending_verification").count()
-    invoiced_sum = FeeInvoice.objects.aggregate(s=models.Sum("total_amount"))["s"] or 0
-    paid_sum = Payment.objects.aggregate(s=models.Sum("amount"))["s"] or 0
-    balance = max(invoiced_sum - paid_sum, 0)
+    metrics, hit, ms = dashboard_metrics()
 
     # Recent activity tables
     recent_apps = AdmissionApplication.objects.all().order_by("-created_at")[:10]
     recent_invoices = FeeInvoice.objects.select_related("student").order_by("-issue_date")[:10]
     recent_absences = AttendanceRecord.objects.filter(status="absent").select_related("student").order_by("-date")[:10]
 
-    return render(request, "reports/dashboard.html", {
-        "today": today,
-        "students_total": students_total,
-        "students_active": students_active,
-        "admissions_new": admissions_new,
-        "admissions_reviewed": admissions_reviewed,
-        "admissions_accepted": admissions_accepted,
-        "att_total": att_total,
-        "att_present": att_present,
-        "att_absent": att_absent,
-        "att_late": att_late,
-        "inv_total": inv_total,
-        "inv_paid": inv_paid,
-        "inv_pending": inv_pending,
-        "invoiced_sum": invoiced_sum,
-        "paid_sum": paid_sum,
-        "balance": balance,
+    response = render(request, "reports/dashboard.html", {
+        "today": metrics["today"],
+        "students_total": metrics["students_total"],
+        "students_active": metrics["students_active"],
+        "admissions_new": metrics["admissions"].get("new", 0),
+        "admissions_reviewed": metrics["admissions"].get("reviewed", 0),
+        "admissions_accepted": metrics["admissions"].get("accepted", 0),
+        "att_total": metrics["attendance_total"],
+        "att_present": metrics["attendance"].get("present", 0),
+        "att_absent": metrics["attendance"].get("absent", 0),
+        "att_late": metrics["attendance"].get("late", 0),
+        "inv_total": metrics["inv_total"],
+        "inv_paid": metrics["inv_paid"],
+        "inv_partial": metrics["inv_partial"],
+        "inv_unpaid": metrics["inv_unpaid"],
+        "inv_pending": metrics["inv_pending"],
+        "invoiced_sum": metrics["invoiced_sum"],
+        "paid_sum": metrics["paid_sum"],
+        "balance": metrics["balance"],
         "recent_apps": recent_apps,
         "recent_invoices": recent_invoices,
         "recent_absences": recent_absences,
-        "last_30": last_30,
+        "last_30": metrics["last_30"],
     })
+    return set_metrics_header(response, hit, ms)
@@ -151,8 +151,48 @@ MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+
+# Notifications
+# With NOTIFICATION_OUTBOX on, sends are queued and delivered by `manage.py process_notification_outbox`.
+NOTIFICATION_PROVIDER = os.environ.get("NOTIFICATION_PROVIDER", "comms.services.ConsoleNotificationProvider")
+NOTIFICATION_OUTBOX = os.environ.get("NOTIFICATION_OUTBOX", "0") == "1"
+NOTIFICATION_WORKER_CONCURRENCY = 8
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 30
+NOTIFICATION_RETRY_MAX_SECONDS = 3600
+NOTIFICATION_CONTACT_CACHE_SIZE = 2048
+NOTIFICATION_CONTACT_CACHE_TTL = 300  # seconds
+
 AUTH_USER_MODEL = "accounts.User"
 
 LOGIN_URL = "accounts:login"
 LOGIN_REDIRECT_URL = "accounts:dashboard"
-LOGOUT_REDIRECT_URL = "accounts:login"
\ No newline at end of file
+LOGOUT_REDIRECT_URL = "accounts:login"
+
+
+# CSV imports
+# With IMPORTS_IN_BACKGROUND on, uploads are queued and run by `manage.py process_import_jobs`.
+# Off (the default), a whole upload runs inside its request; turn it on and run the
+# worker as a service wherever uploads can be large.
+IMPORTS_IN_BACKGROUND = os.environ.get("IMPORTS_IN_BACKGROUND", "0") == "1"
+IMPORT_CHUNK_SIZE = 500
+# uploaded CSVs (personal data, passwords) until their job ends; private, so never under MEDIA_ROOT
+IMPORT_FILES_DIR = os.path.join(BASE_DIR, "var", "imports")
+IMPORT_QUEUED_MAX_AGE = 24 * 3600  # seconds; the worker discards jobs queued longer, with their files
+PASSWORD_HASH_WORKERS = None  # processes for hashing bulk-uploaded passwords in background imports; None = CPU count
+
+
+# Dashboards
+DASHBOARD_METRICS_TTL = 60  # seconds; writes invalidate sooner via reports.signals
+
+
+# Reports
+REPORT_PDF_WORKERS = None  # processes for batch PDF rendering; None = CPU count
+# rendered report PDFs, keyed by an HMAC of inputs + data version; private, so
+# never under MEDIA_ROOT (served at /media/ without a login check)
+REPORT_CACHE_DIR = os.path.join(BASE_DIR, "var", "report_cache")
+REPORT_CACHE_MAX_BYTES = 200 * 1024 * 1024
+REPORT_CACHE_MAX_AGE = 7 * 24 * 3600  # seconds since last download
+REPORT_CACHE_PRUNE_INTERVAL = 300  # seconds between eviction sweeps
+EXPORT_CHUNK_SIZE = 2000  # rows per fetch for streamed CSV/XLSX exports
+GRADE_RESULTS_TTL = 3600  # seconds; cached class averages are also dropped on any grade/assessment change
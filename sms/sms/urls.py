@@ -13,6 +13,7 @@ urlpatterns = [
     path("reports/", include(("reports.urls", "reports"), namespace="reports")),
     path("rbac/", include(("rbac.urls", "rbac"), namespace="rbac")),
     path("registrar/", include(("registrar.urls", "registrar"), namespace="registrar")),
+    path("core/", include(("core.urls", "core"), namespace="core")),
 
 ]
 